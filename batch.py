@@ -0,0 +1,261 @@
+"""
+Modo batch (sin interacción): ejecuta un fichero JSONL de prompts a través del agente.
+
+Entrada (una conversación por línea):
+    {"id": "informe-1", "prompt": "Resume las noticias de hoy sobre IA"}
+    {"id": "cartera", "messages": ["Precio de AAPL y MSFT", "Envíamelo a Telegram"]}
+
+Cada línea se ejecuta como una sesión aislada (historial propio) y varias a la vez.
+Los resultados se escriben en el JSONL de salida según terminan:
+    {"id": "...", "status": "ok", "responses": ["..."], "duration_ms": 1234.5}
+    {"id": "...", "status": "error", "error": "...", "responses": [...], ...}
+
+Si el proceso se interrumpe, al relanzar el mismo comando se saltan las
+conversaciones que ya terminaron bien (las fallidas se reintentan). Si un id
+aparece varias veces en la salida, la línea válida es la última.
+
+Uso:
+    python batch.py prompts.jsonl resultados.jsonl [--concurrency 8]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from main import SYSTEM_PROMPT, run_turn
+from core import tracing, rate_limiter
+
+# Conversaciones que se ejecutan a la vez
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+
+def load_jobs(path):
+    """
+    Lee el fichero de entrada.
+
+    Args:
+        path (str): JSONL con una conversación por línea
+
+    Returns:
+        list: Lista de (id, lista de mensajes del usuario)
+    """
+    jobs = []
+    seen = set()
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Línea {line_number}: JSON inválido ({e})")
+
+            if isinstance(item, str):
+                item = {"prompt": item}
+
+            messages = item.get("messages")
+            if messages is None and item.get("prompt") is not None:
+                messages = [item["prompt"]]
+            if not messages or not all(isinstance(m, str) for m in messages):
+                raise ValueError(f"Línea {line_number}: falta 'prompt' o 'messages' (lista de textos)")
+
+            job_id = str(item.get("id", f"line-{line_number}"))
+            if job_id in seen:
+                raise ValueError(f"Línea {line_number}: id repetido '{job_id}'")
+            seen.add(job_id)
+            jobs.append((job_id, messages))
+
+    return jobs
+
+
+def load_finished(path, include_failed=False):
+    """
+    Devuelve los ids que ya tienen resultado en el fichero de salida.
+
+    Args:
+        path (str): JSONL de salida de una ejecución anterior
+        include_failed (bool): Cuenta también las conversaciones que fallaron
+
+    Returns:
+        set: Ids ya terminados
+    """
+    if not os.path.exists(path):
+        return set()
+
+    status = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                # Última línea a medio escribir si el proceso murió
+                continue
+            status[item.get("id")] = item.get("status")
+
+    return {
+        job_id for job_id, value in status.items()
+        if value == "ok" or (include_failed and value == "error")
+    }
+
+
+def run_job(job_id, messages, include_history=False):
+    """
+    Ejecuta una conversación completa en una sesión aislada.
+
+    Returns:
+        dict: Resultado (se escribe tal cual en el JSONL de salida)
+    """
+    history = [{"role": "system", "content": SYSTEM_PROMPT}]
+    responses = []
+    start = time.perf_counter()
+    result = {"id": job_id}
+
+    try:
+        # Las peticiones del batch ceden el turno a las interactivas en los backends con límite
+        with rate_limiter.priority(rate_limiter.PRIORITY_BATCH):
+            for user_message in messages:
+                responses.append(run_turn(history, user_message))
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["responses"] = responses
+    result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    if include_history:
+        result["history"] = history[1:]
+    return result
+
+
+class ResultWriter:
+    """
+    Escribe los resultados en el JSONL de salida a medida que terminan
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, result):
+        line = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            # Cada resultado llega a disco antes de seguir: es lo que permite reanudar
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def run_batch(input_path, output_path, concurrency=None, include_history=False,
+              skip_failed=False, log=None):
+    """
+    Ejecuta todas las conversaciones pendientes del fichero de entrada.
+
+    Args:
+        input_path (str): JSONL de entrada
+        output_path (str): JSONL de salida (se añaden líneas; sirve para reanudar)
+        concurrency (int, optional): Conversaciones simultáneas (por defecto BATCH_CONCURRENCY)
+        include_history (bool): Guarda también el historial completo de cada conversación
+        skip_failed (bool): Al reanudar, no reintenta las que fallaron
+        log (callable, optional): Recibe las líneas de progreso
+
+    Returns:
+        dict: Resumen (total, saltadas, ok, errores, segundos)
+    """
+    log = log or (lambda line: print(line, file=sys.stderr, flush=True))
+    jobs = load_jobs(input_path)
+    finished = load_finished(output_path, include_failed=skip_failed)
+    pending = [(job_id, messages) for job_id, messages in jobs if job_id not in finished]
+
+    summary = {"total": len(jobs), "skipped": len(jobs) - len(pending), "ok": 0, "errors": 0}
+    if summary["skipped"]:
+        log(f"Reanudando: {summary['skipped']} de {len(jobs)} conversaciones ya terminadas")
+
+    writer = ResultWriter(output_path)
+    pool = ThreadPoolExecutor(max_workers=concurrency or BATCH_CONCURRENCY)
+    start = time.monotonic()
+
+    try:
+        futures = {
+            pool.submit(run_job, job_id, messages, include_history): job_id
+            for job_id, messages in pending
+        }
+
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            writer.write(result)
+            summary["ok" if result["status"] == "ok" else "errors"] += 1
+
+            elapsed = time.monotonic() - start
+            eta = elapsed / done * (len(pending) - done)
+            status = "ok" if result["status"] == "ok" else f"ERROR {result['error'][:80]}"
+            log(f"[{done}/{len(pending)}] {result['id']} {status} "
+                f"({result['duration_ms'] / 1000:.1f}s, quedan ~{_format_duration(eta)})")
+
+    except KeyboardInterrupt:
+        # Lo ya escrito se conserva; el resto se ejecuta al relanzar el comando
+        pool.shutdown(wait=False, cancel_futures=True)
+        log("Interrumpido: vuelve a lanzar el mismo comando para continuar")
+        raise
+    finally:
+        pool.shutdown(wait=True)
+        writer.close()
+
+    summary["seconds"] = round(time.monotonic() - start, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta un JSONL de prompts a través del agente")
+    parser.add_argument("input", help="JSONL de entrada (prompt o messages por línea)")
+    parser.add_argument("output", help="JSONL de salida (se reanuda si ya existe)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help=f"Conversaciones simultáneas (por defecto {BATCH_CONCURRENCY})")
+    parser.add_argument("--include-history", action="store_true",
+                        help="Incluye el historial completo (con tools) en cada resultado")
+    parser.add_argument("--skip-failed", action="store_true",
+                        help="Al reanudar, no reintenta las conversaciones que fallaron")
+    parser.add_argument("--verbose", action="store_true", help="Muestra las tools que se ejecutan")
+    args = parser.parse_args()
+
+    # Las tools informan por stdout; en batch solo se muestran con --verbose
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+
+    try:
+        with quiet:
+            summary = run_batch(args.input, args.output, args.concurrency,
+                                include_history=args.include_history, skip_failed=args.skip_failed)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        tracing.dump_metrics()
+
+    print(f"Terminado: {summary['ok']} ok, {summary['errors']} con error, "
+          f"{summary['skipped']} ya hechas, en {_format_duration(summary['seconds'])}",
+          file=sys.stderr)
+    sys.exit(1 if summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Benchmark end-to-end del bucle del agente contra backends simulados.
+
+Arranca los mocks de OpenRouter, Tavily, Jina, Yahoo y Telegram en un subproceso,
+redirige a ellos todas las peticiones del agente y reproduce escenarios
+multi-turno con send_message. Informa de los percentiles de latencia por turno,
+las llamadas al modelo por turno, los bytes enviados por petición y el pico de RSS.
+
+Uso:
+    python -m benchmarks.e2e_benchmark [--iterations 5] [--stream] [--warm-cache]
+        [--latency jina=2000] [--payload jina=80000] [--error-rate tavily=0.1]
+        [--scenarios escenarios.json] [--json resultados.json] [--max-p95-ms 8000]
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import resource
+import contextlib
+import subprocess
+import urllib.request
+
+from benchmarks.mock_backends import BACKEND_HOSTS
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Escenarios por defecto: cada turno indica qué devuelve el modelo en cada paso
+DEFAULT_SCENARIOS = [
+    {
+        "name": "investigacion",
+        "turns": [
+            {
+                "user": "Investiga las novedades de IA de esta semana",
+                "steps": [
+                    {"tool_calls": [
+                        {"name": "search_internet", "arguments": {"query": "novedades inteligencia artificial"}},
+                        {"name": "search_internet", "arguments": {"query": "nuevos modelos de lenguaje"}},
+                        {"name": "search_internet", "arguments": {"query": "regulación IA Europa"}},
+                    ]},
+                    {"tool_calls": [
+                        {"name": "scrape_website", "arguments": {"url": "https://example.com/1"}},
+                        {"name": "scrape_website", "arguments": {"url": "https://example.com/2"}},
+                    ]},
+                    {"content": "Resumen de las novedades de IA de esta semana."},
+                ]
+            },
+            {
+                "user": "Envíame ese resumen por Telegram",
+                "steps": [
+                    {"tool_calls": [
+                        {"name": "send_telegram_message", "arguments": {"message": "Resumen de IA"}},
+                    ]},
+                    {"content": "Listo, te lo he enviado."},
+                ]
+            },
+        ]
+    },
+    {
+        "name": "cartera",
+        "turns": [
+            {
+                "user": "¿Cómo va mi cartera? AAPL, MSFT y TSLA",
+                "steps": [
+                    {"tool_calls": [
+                        {"name": "get_stock_price", "arguments": {"symbol": "AAPL"}},
+                        {"name": "get_stock_price", "arguments": {"symbol": "MSFT"}},
+                        {"name": "get_stock_price", "arguments": {"symbol": "TSLA"}},
+                    ]},
+                    {"content": "Tu cartera sube un 1,5% hoy."},
+                ]
+            },
+        ]
+    },
+    {
+        "name": "charla",
+        "turns": [
+            {"user": "Hola, ¿qué tal?", "steps": [{"content": "¡Hola! ¿En qué te ayudo?"}]},
+            {"user": "Cuéntame un dato curioso", "steps": [{"content": "Los pulpos tienen tres corazones."}]},
+        ]
+    },
+]
+
+
+def percentile(values, p):
+    """
+    Percentil por rango más cercano (p entre 0 y 100)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(p / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def _parse_overrides(items, cast):
+    # "backend=valor" -> {backend: valor}
+    overrides = {}
+    for item in items or []:
+        backend, value = item.split("=", 1)
+        if backend not in BACKEND_HOSTS:
+            raise SystemExit(f"Backend desconocido: {backend} (opciones: {', '.join(BACKEND_HOSTS)})")
+        overrides[backend] = cast(value)
+    return overrides
+
+
+def _fetch_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.loads(response.read())
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB y macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(scenarios, iterations=5, stream=False, config=None, warm_cache=False):
+    """
+    Ejecuta los escenarios contra los mocks y devuelve las métricas.
+
+    Args:
+        scenarios (list): Escenarios (ver DEFAULT_SCENARIOS)
+        iterations (int): Repeticiones de cada escenario
+        stream (bool): Usa el modo streaming de send_message
+        config (dict, optional): Configuración de los mocks por backend
+        warm_cache (bool): Conserva las cachés de búsquedas, páginas y cotizaciones
+            entre iteraciones (por defecto cada iteración empieza en frío)
+
+    Returns:
+        dict: Métricas agregadas y por escenario
+    """
+    scripts = {turn["user"]: turn["steps"] for scenario in scenarios for turn in scenario["turns"]}
+
+    mocks = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_backends",
+         "--config", json.dumps(config or {}), "--scripts", json.dumps(scripts)],
+        cwd=PROJECT_ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+
+    try:
+        urls = json.loads(mocks.stdout.readline())
+
+        # Configuración del agente antes de importarlo: credenciales ficticias,
+        # artefactos en un directorio temporal y todos los hosts hacia los mocks
+        os.environ.update({
+            "OPENROUTER_API_KEY": "mock",
+            "TAVILY_API_KEY": "mock",
+            "TELEGRAM_BOT_TOKEN": "mock",
+            "TELEGRAM_CHAT_ID": "1",
+            "ARTIFACTS_DIR": tempfile.mkdtemp(prefix="agent-bench-"),
+            # Caché nueva en cada ejecución, para no arrastrar resultados de la anterior
+            "CACHE_DB_PATH": os.path.join(tempfile.mkdtemp(prefix="agent-bench-cache-"), "cache.db"),
+            # Lo que indexan las tools tampoco va al knowledge.db del proyecto
+            "KNOWLEDGE_DB_PATH": os.path.join(tempfile.mkdtemp(prefix="agent-bench-knowledge-"), "knowledge.db"),
+            # Las páginas se leen con el mock de Jina: en auto se descargarían del origen real
+            "SCRAPE_ENGINE": "jina",
+            "HTTP_HOST_OVERRIDES": ",".join(f"{BACKEND_HOSTS[name]}={url}" for name, url in urls.items()),
+        })
+        import main
+        from core.cache import clear_caches
+
+        results = {}
+        for scenario in scenarios:
+            turns = results.setdefault(scenario["name"], [])
+
+            for _ in range(iterations):
+                main.conversation_history[1:] = []
+                if not warm_cache:
+                    # Si no, desde la segunda iteración las tools responden de caché
+                    clear_caches()
+
+                for turn in scenario["turns"]:
+                    before = _fetch_stats(urls["openrouter"])
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(open(os.devnull, "w")):
+                        main.send_message(turn["user"], on_token=(lambda token: None) if stream else None)
+                    elapsed = time.perf_counter() - start
+                    after = _fetch_stats(urls["openrouter"])
+
+                    turns.append({
+                        "latency_ms": elapsed * 1000,
+                        "llm_requests": after["llm_requests"] - before["llm_requests"],
+                        "request_bytes": after["llm_request_bytes"][len(before["llm_request_bytes"]):],
+                    })
+
+        # Con METRICS_FILE / TRACE_FILE quedan también las métricas y spans del agente
+        main.tracing.dump_metrics()
+    finally:
+        mocks.stdin.close()
+        mocks.wait(timeout=10)
+
+    def summarize(turns):
+        latencies = [t["latency_ms"] for t in turns]
+        sizes = [size for t in turns for size in t["request_bytes"]]
+        round_trips = [t["llm_requests"] for t in turns]
+        return {
+            "turns": len(turns),
+            "latency_ms": {p: percentile(latencies, p) for p in (50, 90, 95, 99)},
+            "latency_max_ms": max(latencies, default=0),
+            "llm_requests_per_turn": sum(round_trips) / len(round_trips) if round_trips else 0,
+            "request_bytes": {p: percentile(sizes, p) for p in (50, 95)},
+            "request_bytes_max": max(sizes, default=0),
+        }
+
+    all_turns = [t for turns in results.values() for t in turns]
+    return {
+        "stream": stream,
+        "warm_cache": warm_cache,
+        "iterations": iterations,
+        "overall": summarize(all_turns),
+        "scenarios": {name: summarize(turns) for name, turns in results.items()},
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def print_report(report):
+    print(f"Benchmark end-to-end ({report['iterations']} iteraciones, "
+          f"streaming: {'sí' if report['stream'] else 'no'}, "
+          f"cachés: {'conservadas' if report['warm_cache'] else 'vacías en cada iteración'})\n")
+    print(f"{'escenario':<16}{'turnos':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'LLM/turno':>11}{'bytes p50':>11}{'bytes max':>11}")
+
+    rows = list(report["scenarios"].items()) + [("TOTAL", report["overall"])]
+    for name, s in rows:
+        print(f"{name:<16}{s['turns']:>7}{s['latency_ms'][50]:>9.0f}{s['latency_ms'][95]:>9.0f}"
+              f"{s['latency_ms'][99]:>9.0f}{s['llm_requests_per_turn']:>11.2f}"
+              f"{s['request_bytes'][50]:>11.0f}{s['request_bytes_max']:>11.0f}")
+
+    print(f"\nPico de RSS del agente: {report['peak_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end del agente con backends simulados")
+    parser.add_argument("--iterations", type=int, default=5, help="Repeticiones de cada escenario")
+    parser.add_argument("--stream", action="store_true", help="Usa el modo streaming")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="No vacía las cachés de las tools entre iteraciones")
+    parser.add_argument("--scenarios", help="Fichero JSON con escenarios (formato de DEFAULT_SCENARIOS)")
+    parser.add_argument("--latency", action="append", help="backend=ms de latencia base")
+    parser.add_argument("--jitter", action="append", help="backend=ms de jitter máximo")
+    parser.add_argument("--payload", action="append", help="backend=bytes de la respuesta")
+    parser.add_argument("--error-rate", action="append", help="backend=tasa de errores (0-1)")
+    parser.add_argument("--json", help="Guarda el informe en este fichero JSON")
+    parser.add_argument("--max-p95-ms", type=float, help="Falla si el p95 total supera este valor")
+    args = parser.parse_args()
+
+    config = {}
+    for key, items, cast in [
+        ("latency_ms", args.latency, float),
+        ("jitter_ms", args.jitter, float),
+        ("payload_bytes", args.payload, int),
+        ("error_rate", args.error_rate, float),
+    ]:
+        for backend, value in _parse_overrides(items, cast).items():
+            config.setdefault(backend, {})[key] = value
+
+    scenarios = DEFAULT_SCENARIOS
+    if args.scenarios:
+        with open(args.scenarios, encoding="utf-8") as f:
+            scenarios = json.load(f)
+
+    report = run_benchmark(scenarios, iterations=args.iterations, stream=args.stream, config=config,
+                           warm_cache=args.warm_cache)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.max_p95_ms and report["overall"]["latency_ms"][95] > args.max_p95_ms:
+        print(f"\n❌ p95 por encima del límite ({report['overall']['latency_ms'][95]:.0f} ms > {args.max_p95_ms:.0f} ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
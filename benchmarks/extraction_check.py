@@ -0,0 +1,82 @@
+"""
+Comprobación sin red del extractor local (core/html_extractor.py).
+
+Convierte a markdown las páginas guardadas en benchmarks/fixtures/extraction
+y verifica, según expected.json, el título, los fragmentos que deben salir y
+los que no (navegación, publicidad, comentarios...). Incluye además un HTML
+generado con miles de niveles de anidamiento, que no debe romper el extractor.
+
+Uso:
+    python -m benchmarks.extraction_check [--show article.html]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from core.html_extractor import extract_markdown
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "extraction")
+
+# Niveles de <div> del HTML generado (muy por encima del límite de recursión de Python)
+DEEP_NESTING_LEVELS = 5000
+
+
+def _deep_html(levels):
+    paragraph = "<p>Texto del artículo dentro de muchos niveles de anidamiento, con comas, y largo.</p>"
+    return f"<html><body>{'<div>' * levels}{paragraph}{'</div>' * levels}</body></html>"
+
+
+def check_page(name, html, expected):
+    """
+    Extrae una página y compara el resultado con lo esperado.
+
+    Returns:
+        tuple: (lista de fallos, milisegundos, markdown)
+    """
+    start = time.perf_counter()
+    try:
+        title, markdown = extract_markdown(html, expected.get("url"))
+    except Exception as e:
+        return [f"{type(e).__name__}: {e}"], (time.perf_counter() - start) * 1000, ""
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    failures = []
+    if "title" in expected and title != expected["title"]:
+        failures.append(f"título {title!r} (esperado {expected['title']!r})")
+    failures += [f"falta {text!r}" for text in expected.get("contains", []) if text not in markdown]
+    failures += [f"sobra {text!r}" for text in expected.get("excludes", []) if text in markdown]
+    return failures, elapsed_ms, markdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprobación del extractor local con HTML guardados")
+    parser.add_argument("--show", help="Imprime el markdown extraído de esta página")
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES_DIR, "expected.json"), encoding="utf-8") as f:
+        cases = json.load(f)
+
+    pages = []
+    for name, expected in cases.items():
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            pages.append((name, f.read(), expected))
+    pages.append((f"anidado-{DEEP_NESTING_LEVELS}", _deep_html(DEEP_NESTING_LEVELS),
+                  {"contains": ["muchos niveles de anidamiento"]}))
+
+    ok = True
+    for name, html, expected in pages:
+        failures, elapsed_ms, markdown = check_page(name, html, expected)
+        print(f"{'✓' if not failures else '❌'} {name:<24}{elapsed_ms:8.1f} ms{len(markdown):>8} caracteres")
+        for failure in failures:
+            print(f"    {failure}")
+        ok = ok and not failures
+        if args.show == name:
+            print(f"\n{markdown}\n")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Servidores locales que imitan a los backends del agente (OpenRouter, Tavily, Jina,
+Yahoo Finance y Telegram) con latencia, tamaño de respuesta y tasa de errores
+configurables.
+
+El mock de OpenRouter sigue un guion: para cada mensaje de usuario conocido
+devuelve, paso a paso, las tool_calls y la respuesta final indicadas en el
+escenario. También expone GET /__stats con las peticiones recibidas.
+"""
+import json
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Host real de cada backend (para redirigirlo con http_client.set_host_override)
+BACKEND_HOSTS = {
+    "openrouter": "openrouter.ai",
+    "tavily": "api.tavily.com",
+    "jina": "r.jina.ai",
+    "yahoo": "query1.finance.yahoo.com",
+    "telegram": "api.telegram.org",
+}
+
+DEFAULT_BACKEND_CONFIG = {
+    "openrouter": {"latency_ms": 400, "jitter_ms": 200, "payload_bytes": 400, "error_rate": 0.0},
+    "tavily": {"latency_ms": 800, "jitter_ms": 400, "payload_bytes": 4000, "error_rate": 0.0},
+    "jina": {"latency_ms": 1200, "jitter_ms": 800, "payload_bytes": 30000, "error_rate": 0.0},
+    "yahoo": {"latency_ms": 150, "jitter_ms": 100, "payload_bytes": 0, "error_rate": 0.0},
+    "telegram": {"latency_ms": 200, "jitter_ms": 100, "payload_bytes": 0, "error_rate": 0.0},
+}
+
+# Fragmentos en los que se trocea la respuesta del modelo en streaming
+STREAM_CHUNK_CHARS = 20
+STREAM_CHUNK_DELAY = 0.005
+
+
+def _filler(size, seed="Lorem ipsum dolor sit amet, consectetur adipiscing elit. "):
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+class MockState:
+    """
+    Configuración y estadísticas compartidas por los mocks
+    """
+
+    def __init__(self, config, scripts):
+        self.config = config
+        # Mensaje de usuario -> lista de pasos (respuestas del modelo) de ese turno
+        self.scripts = scripts
+        self.lock = threading.Lock()
+        self.stats = {"llm_requests": 0, "llm_request_bytes": [], "tool_requests": {}}
+
+    def record_llm(self, size):
+        with self.lock:
+            self.stats["llm_requests"] += 1
+            self.stats["llm_request_bytes"].append(size)
+
+    def record_tool(self, backend):
+        with self.lock:
+            counts = self.stats["tool_requests"]
+            counts[backend] = counts.get(backend, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+
+def _make_handler(backend, state):
+    config = state.config[backend]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _send(self, status, body, content_type="application/json"):
+            data = body if isinstance(body, bytes) else body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _simulate(self):
+            # Latencia con jitter y errores aleatorios; devuelve True si hay que fallar
+            delay = config["latency_ms"] + random.uniform(0, config["jitter_ms"])
+            time.sleep(delay / 1000)
+            if random.random() < config["error_rate"]:
+                self._send(503, json.dumps({"error": {"message": f"{backend} no disponible (mock)"}}))
+                return True
+            return False
+
+        def do_GET(self):
+            if self.path.startswith("/__stats"):
+                self._send(200, json.dumps(state.snapshot()))
+                return
+
+            state.record_tool(backend)
+            if self._simulate():
+                return
+
+            if backend == "jina":
+                url = self.path[1:]
+                self._send(200, f"Title: {url}\n\n# Artículo\n\n{_filler(config['payload_bytes'])}",
+                           "text/plain; charset=utf-8")
+            elif backend == "yahoo":
+                symbol = self.path.split("/chart/")[-1].split("?")[0]
+                self._send(200, json.dumps(_yahoo_chart(symbol)))
+            else:
+                self._send(404, json.dumps({"error": "not found"}))
+
+        def do_POST(self):
+            body = self._read_body()
+
+            if backend == "openrouter":
+                state.record_llm(len(body))
+                if self._simulate():
+                    return
+                self._chat_completion(json.loads(body))
+                return
+
+            state.record_tool(backend)
+            if self._simulate():
+                return
+
+            if backend == "tavily":
+                self._send(200, json.dumps(_tavily_results(json.loads(body), config["payload_bytes"])))
+            elif backend == "telegram":
+                self._send(200, json.dumps({"ok": True, "result": {"message_id": 1}}))
+            else:
+                self._send(404, json.dumps({"error": "not found"}))
+
+        def _chat_completion(self, request):
+            message = _scripted_message(request["messages"], state.scripts, config["payload_bytes"])
+            usage = {"prompt_tokens": sum(len(json.dumps(m)) for m in request["messages"]) // 4,
+                     "completion_tokens": len(message.get("content") or "") // 4}
+
+            if not request.get("stream"):
+                self._send(200, json.dumps({
+                    "choices": [{"message": message, "finish_reason": "stop"}],
+                    "usage": usage
+                }))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def event(payload):
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            content = message.get("content") or ""
+            for i in range(0, len(content), STREAM_CHUNK_CHARS):
+                event({"choices": [{"delta": {"content": content[i:i + STREAM_CHUNK_CHARS]}}]})
+                time.sleep(STREAM_CHUNK_DELAY)
+
+            for index, tool_call in enumerate(message.get("tool_calls") or []):
+                event({"choices": [{"delta": {"tool_calls": [{**tool_call, "index": index}]}}]})
+                time.sleep(STREAM_CHUNK_DELAY)
+
+            event({"choices": [], "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    return Handler
+
+
+def _scripted_message(messages, scripts, payload_bytes):
+    """
+    Decide la respuesta del modelo según el guion del turno en curso
+    """
+    last_user = max(i for i, m in enumerate(messages) if m.get("role") == "user")
+    step = sum(1 for m in messages[last_user:] if m.get("role") == "assistant")
+    steps = scripts.get(messages[last_user].get("content"), [])
+
+    if step < len(steps):
+        scripted = steps[step]
+    else:
+        scripted = {"content": _filler(payload_bytes, "Respuesta final del mock. ")}
+
+    message = {"role": "assistant", "content": scripted.get("content", "")}
+    if scripted.get("tool_calls"):
+        message["tool_calls"] = [
+            {
+                "id": f"call_{step}_{i}",
+                "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}
+            }
+            for i, call in enumerate(scripted["tool_calls"])
+        ]
+    return message
+
+
+def _tavily_results(payload, payload_bytes):
+    results = []
+    per_result = max(payload_bytes // 10, 100)
+    for i in range(payload.get("max_results", 10)):
+        results.append({
+            "title": f"Resultado {i + 1} para {payload.get('query')}",
+            "url": f"https://example.com/{i + 1}",
+            "content": _filler(per_result),
+            "score": round(0.9 - i * 0.05, 2)
+        })
+    return {"answer": f"Respuesta resumida sobre {payload.get('query')}", "results": results}
+
+
+def _yahoo_chart(symbol):
+    return {
+        "chart": {
+            "error": None,
+            "result": [{
+                "meta": {
+                    "symbol": symbol,
+                    "longName": f"{symbol} Inc.",
+                    "regularMarketPrice": 101.5,
+                    "chartPreviousClose": 100.0,
+                    "currency": "USD",
+                    "exchangeName": "NMS",
+                },
+                "indicators": {"quote": [{
+                    "open": [100.5], "high": [102.0], "low": [99.8], "volume": [1234567]
+                }]}
+            }]
+        }
+    }
+
+
+def start_mock_backends(config=None, scripts=None, host="127.0.0.1"):
+    """
+    Arranca un servidor local por backend en puertos libres.
+
+    Args:
+        config (dict, optional): Configuración por backend (se mezcla con DEFAULT_BACKEND_CONFIG)
+        scripts (dict, optional): Mensaje de usuario -> pasos del modelo para ese turno
+        host (str): Interfaz donde escuchar
+
+    Returns:
+        tuple: (dict backend -> URL base, función para parar los servidores)
+    """
+    merged = {name: dict(values) for name, values in DEFAULT_BACKEND_CONFIG.items()}
+    for name, values in (config or {}).items():
+        merged[name].update(values)
+
+    state = MockState(merged, scripts or {})
+    servers = {}
+    for backend in BACKEND_HOSTS:
+        server = ThreadingHTTPServer((host, 0), _make_handler(backend, state))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers[backend] = server
+
+    urls = {name: f"http://{host}:{server.server_address[1]}" for name, server in servers.items()}
+
+    def stop():
+        for server in servers.values():
+            server.shutdown()
+            server.server_close()
+
+    return urls, stop
+
+
+if __name__ == "__main__":
+    # Modo subproceso: recibe la configuración por argumentos, imprime las URLs
+    # en una línea JSON y sigue sirviendo hasta que se cierre stdin
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backends simulados del agente")
+    parser.add_argument("--config", default="{}", help="JSON con la configuración por backend")
+    parser.add_argument("--scripts", default="{}", help="JSON mensaje de usuario -> pasos del modelo")
+    args = parser.parse_args()
+
+    urls, stop = start_mock_backends(json.loads(args.config), json.loads(args.scripts))
+    print(json.dumps(urls), flush=True)
+    sys.stdin.read()
+    stop()
@@ -0,0 +1,93 @@
+"""
+Benchmark de arranque del agente basado en `python -X importtime`.
+
+Importa main.py en un proceso limpio, suma el tiempo de importación de los
+módulos de primer nivel y falla si se supera el presupuesto o si al arrancar
+se cargan dependencias que deberían ser perezosas (pygame, replicate...).
+
+Uso:
+    python -m benchmarks.startup_benchmark [--budget-ms 300] [--top 15]
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+# Presupuesto de arranque por defecto (milisegundos)
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "300"))
+
+# Módulos que no deben importarse hasta que se use la tool correspondiente
+LAZY_MODULES = ["pygame", "replicate", "googleapiclient", "google_auth_oauthlib", "edge_tts"]
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_imports(module="main"):
+    """
+    Importa un módulo en un subproceso con -X importtime.
+
+    Args:
+        module (str): Módulo a importar
+
+    Returns:
+        list: Tuplas (self_us, cumulative_us, profundidad, nombre) por cada import
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+
+    if completed.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}:\n{completed.stderr[-2000:]}")
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        imports.append((int(self_us), int(cumulative_us), depth, name.strip()))
+
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del agente")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help="Presupuesto máximo de importación en milisegundos")
+    parser.add_argument("--top", type=int, default=15,
+                        help="Número de imports más lentos a mostrar")
+    args = parser.parse_args()
+
+    imports = measure_imports()
+
+    total_ms = sum(cumulative for _, cumulative, depth, _ in imports if depth == 0) / 1000
+    loaded = {name for _, _, _, name in imports}
+    eager = [m for m in LAZY_MODULES if m in loaded]
+
+    print(f"Tiempo total de importación: {total_ms:.1f} ms (presupuesto: {args.budget_ms:.0f} ms)\n")
+    print("Imports más lentos (acumulado):")
+    top_level = sorted((i for i in imports if i[2] == 0), key=lambda i: i[1], reverse=True)
+    for _, cumulative, _, name in top_level[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    ok = True
+    if eager:
+        print(f"\n❌ Dependencias cargadas al arrancar (deberían ser perezosas): {', '.join(eager)}")
+        ok = False
+
+    if total_ms > args.budget_ms:
+        print(f"\n❌ Arranque por encima del presupuesto ({total_ms:.1f} ms > {args.budget_ms:.0f} ms)")
+        ok = False
+
+    if ok:
+        print("\n✓ Arranque dentro del presupuesto")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
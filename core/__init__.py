@@ -0,0 +1 @@
+# Core package for IA Agent
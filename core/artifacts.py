@@ -0,0 +1,119 @@
+import os
+import hashlib
+
+# Directorio donde se guardan los resultados grandes de las tools
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", "artifacts")
+
+# A partir de este tamaño (caracteres) el resultado de una tool se guarda en disco
+ARTIFACT_THRESHOLD_CHARS = int(os.getenv("ARTIFACT_THRESHOLD_CHARS", "4000"))
+
+# Caracteres del principio del resultado que se incluyen en el mensaje
+ARTIFACT_HEAD_CHARS = 1200
+
+# Máximo de encabezados que se muestran en el índice del artefacto
+ARTIFACT_OUTLINE_LINES = 20
+
+# Tools cuyos resultados nunca se guardan como artefacto: read_artifact ya
+# devuelve una página del artefacto y el scraper recorta su resultado eligiendo
+# las secciones relevantes (SCRAPE_MAX_LENGTH), que quedarían fuera del principio
+NEVER_OFFLOAD = {"read_artifact", "scrape_website", "scrape_websites"}
+
+
+def _artifact_path(artifact_id):
+    return os.path.join(ARTIFACTS_DIR, f"{artifact_id}.txt")
+
+
+def store_artifact(content):
+    """
+    Guarda un contenido en el almacén de artefactos (direccionado por contenido).
+
+    Args:
+        content (str): Texto a guardar
+
+    Returns:
+        str: Identificador del artefacto (hash del contenido)
+    """
+    data = content.encode("utf-8")
+    artifact_id = hashlib.sha256(data).hexdigest()[:16]
+    path = _artifact_path(artifact_id)
+
+    # Mismo contenido -> mismo identificador: no hace falta volver a escribirlo
+    if not os.path.exists(path):
+        os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    return artifact_id
+
+
+def load_artifact(artifact_id):
+    """
+    Devuelve los bytes de un artefacto, o None si no existe
+    """
+    # El identificador es hexadecimal: evita rutas fuera del almacén
+    if not artifact_id or not all(c in "0123456789abcdef" for c in artifact_id):
+        return None
+
+    path = _artifact_path(artifact_id)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _outline(content):
+    """
+    Extrae los encabezados markdown del contenido con su número de línea
+    """
+    outline = []
+    for number, line in enumerate(content.splitlines(), 1):
+        if line.startswith("#"):
+            outline.append(f"  línea {number}: {line.strip()[:100]}")
+            if len(outline) >= ARTIFACT_OUTLINE_LINES:
+                outline.append("  ...")
+                break
+    return outline
+
+
+def offload_tool_result(function_name, content):
+    """
+    Si el resultado de una tool es grande, lo guarda en disco y devuelve un resumen.
+
+    El resumen incluye el identificador, el tamaño, el principio del contenido y
+    un índice de encabezados, para que el modelo pida con read_artifact solo la
+    parte que necesite.
+
+    Args:
+        function_name (str): Nombre de la tool que generó el resultado
+        content (str): Resultado de la tool
+
+    Returns:
+        str: El resultado original o el resumen con el handle del artefacto
+    """
+    if (
+        function_name in NEVER_OFFLOAD
+        or not isinstance(content, str)
+        or len(content) <= ARTIFACT_THRESHOLD_CHARS
+    ):
+        return content
+
+    artifact_id = store_artifact(content)
+    size = len(content.encode("utf-8"))
+    lines = content.count("\n") + 1
+
+    parts = [
+        f"[Artefacto {artifact_id}: resultado de {function_name} guardado en disco, "
+        f"{size} bytes, {lines} líneas. Usa read_artifact con este id para leer más.]",
+        "",
+        "--- INICIO ---",
+        content[:ARTIFACT_HEAD_CHARS].rstrip() + "\n...",
+    ]
+
+    outline = _outline(content)
+    if outline:
+        parts += ["", "--- ÍNDICE ---", *outline]
+
+    return "\n".join(parts)
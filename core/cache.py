@@ -0,0 +1,310 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from core import tracing
+
+# Base de datos SQLite compartida por las cachés en disco ("" = solo memoria)
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "cache.db")
+
+# Cada cuántas escrituras se borran del disco las entradas ya caducadas
+CACHE_PURGE_EVERY = 200
+
+_caches = []
+_disk = {}
+_disk_lock = threading.Lock()
+
+
+class _DiskStore:
+    """
+    Tabla clave-valor en SQLite (modo WAL) con los valores comprimidos
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        """)
+
+    def get(self, namespace, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0])), row[1], row[2]
+
+    def set(self, namespace, key, value, stored_at, expires_at):
+        data = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, data, stored_at, expires_at)
+            )
+
+    def clear(self, namespace):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+
+    def purge(self, namespace, older_than):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at < ?",
+                (namespace, older_than)
+            )
+
+
+def _get_disk_store(path):
+    with _disk_lock:
+        if path not in _disk:
+            _disk[path] = _DiskStore(path)
+        return _disk[path]
+
+
+class TTLCache:
+    """
+    Caché en dos niveles (LRU en memoria + SQLite en disco) con caducidad y
+    stale-while-revalidate.
+
+    Una entrada caducada hace menos de stale_ttl segundos se sigue devolviendo
+    al instante mientras se refresca en segundo plano. Las peticiones
+    simultáneas de la misma clave que no está en caché esperan a una única
+    llamada a fetch.
+
+    Args:
+        name (str): Nombre de la caché (espacio de claves en disco y en las métricas)
+        ttl (float): Segundos que una entrada se considera fresca
+        stale_ttl (float): Segundos extra en los que se sirve caducada mientras se refresca
+        max_entries (int): Entradas máximas en memoria
+        path (str, optional): Base de datos en disco (por defecto CACHE_DB_PATH; "" = solo memoria)
+    """
+
+    def __init__(self, name, ttl, stale_ttl=0, max_entries=256, path=None):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # La base de datos se abre al primer uso: importar las tools no toca el disco
+        self._path = CACHE_DB_PATH if path is None else path
+        self._disk = None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._writes = 0
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0,
+                      "revalidations": 0, "errors": 0}
+        _caches.append(self)
+
+    def _store(self):
+        # Almacén en disco compartido (None si la caché es solo en memoria)
+        if self._disk is None and self._path:
+            self._disk = _get_disk_store(self._path)
+        return self._disk
+
+    def count(self, stat):
+        """
+        Suma uno a una estadística (para quien usa get/set directamente)
+        """
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        disk = self._store()
+        if disk is None:
+            return None
+
+        entry = disk.get(self.name, key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Busca una clave sin contar estadísticas ni refrescar.
+
+        Returns:
+            tuple | None: (valor, fresca) o None si no está o ya no se puede servir
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+
+        value, _, expires_at = entry
+        now = time.time()
+        if now < expires_at:
+            return value, True
+        if now < expires_at + self.stale_ttl:
+            return value, False
+        return None
+
+    def set(self, key, value, ttl=None):
+        """
+        Guarda un valor (serializable a JSON) en memoria y en disco.
+
+        Args:
+            key (str): Clave
+            value: Valor
+            ttl (float, optional): Caducidad propia de esta entrada (por defecto self.ttl)
+        """
+        now = time.time()
+        entry = (value, now, now + (self.ttl if ttl is None else ttl))
+        self._remember(key, entry)
+
+        disk = self._store()
+        if disk is not None:
+            disk.set(self.name, key, *entry)
+            with self._lock:
+                self._writes += 1
+                purge = self._writes % CACHE_PURGE_EVERY == 0
+            if purge:
+                disk.purge(self.name, now - self.stale_ttl)
+
+    def get_or_fetch(self, key, fetch, ttl=None):
+        """
+        Devuelve el valor de la caché o lo obtiene con fetch() y lo guarda.
+
+        Args:
+            key (str): Clave
+            fetch (callable): Función sin argumentos que devuelve el valor (o lanza excepción)
+            ttl (float | callable, optional): Caducidad de la entrada si hay que guardarla,
+                o función que la calcula a partir del valor obtenido
+
+        Returns:
+            Valor cacheado o recién obtenido (los errores de fetch no se cachean)
+        """
+        cached = self.get(key)
+        if cached is not None:
+            value, fresh = cached
+            if fresh:
+                self.count("hits")
+            else:
+                self.count("stale_hits")
+                self._refresh_in_background(key, fetch, ttl)
+            return value
+
+        self.count("misses")
+        return self._fetch_once(key, fetch, ttl)
+
+    def _fetch_once(self, key, fetch, ttl):
+        # Si otra llamada ya está pidiendo esta clave, se espera su resultado
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch()
+            self.set(key, value, ttl(value) if callable(ttl) else ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            self.count("errors")
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key, fetch, ttl):
+        with self._lock:
+            if key in self._inflight:
+                return
+            self.stats["refreshes"] += 1
+
+        def refresh():
+            try:
+                self._fetch_once(key, fetch, ttl)
+            except Exception:
+                # Se sigue sirviendo la versión anterior hasta que deje de valer
+                pass
+
+        threading.Thread(target=tracing.run_in_context(refresh), daemon=True).start()
+
+    def clear(self):
+        """
+        Borra todas las entradas (en memoria y en disco); las estadísticas se mantienen
+        """
+        with self._lock:
+            self._memory.clear()
+        disk = self._store()
+        if disk is not None:
+            disk.clear(self.name)
+
+    def get_stats(self):
+        """
+        Devuelve las estadísticas de uso y la tasa de aciertos
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+def get_cache_stats():
+    """
+    Devuelve las estadísticas de todas las cachés por nombre
+    """
+    return {cache.name: cache.get_stats() for cache in _caches}
+
+
+def clear_caches():
+    """
+    Vacía todas las cachés (ej: entre iteraciones de un benchmark)
+    """
+    for cache in _caches:
+        cache.clear()
+
+
+def _prometheus_lines():
+    lines = ["# TYPE agent_cache_requests_total counter"]
+    for name, stats in get_cache_stats().items():
+        for result, stat in (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses")):
+            lines.append(f'agent_cache_requests_total{{cache="{name}",result="{result}"}} {stats[stat]}')
+    lines.append("# TYPE agent_cache_fetch_errors_total counter")
+    for name, stats in get_cache_stats().items():
+        lines.append(f'agent_cache_fetch_errors_total{{cache="{name}"}} {stats["errors"]}')
+    return lines
+
+
+tracing.register_collector(_prometheus_lines)
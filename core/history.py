@@ -0,0 +1,199 @@
+import os
+import json
+
+# Presupuesto aproximado de tokens para el historial que se envía al modelo
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "32000"))
+
+# Turnos más recientes (mensaje del usuario + respuestas y tools) que nunca se tocan
+KEEP_RECENT_TURNS = int(os.getenv("KEEP_RECENT_TURNS", "4"))
+
+# Caracteres que se conservan de un resultado de tool antiguo al resumirlo
+TOOL_STUB_CHARS = 400
+
+# Tamaño máximo del resumen acumulado de turnos antiguos
+SUMMARY_MAX_CHARS = 6000
+
+# Estimación local: ~4 caracteres por token más un pequeño coste fijo por mensaje
+CHARS_PER_TOKEN = 4
+TOKENS_PER_MESSAGE = 4
+
+SUMMARY_HEADER = "Resumen de la conversación anterior (turnos antiguos compactados):"
+STUB_MARKER = "[Resultado resumido"
+
+
+def estimate_message_tokens(message):
+    """
+    Estima los tokens de un mensaje sin llamar a ningún tokenizer externo.
+
+    Args:
+        message (dict): Mensaje del historial
+
+    Returns:
+        int: Número aproximado de tokens
+    """
+    chars = len(message.get("content") or "")
+
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {})
+        chars += len(function.get("name", "")) + len(function.get("arguments", ""))
+
+    return TOKENS_PER_MESSAGE + chars // CHARS_PER_TOKEN
+
+
+def estimate_tokens(messages):
+    """
+    Estima los tokens de una lista de mensajes
+    """
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+def _split_turns(messages):
+    """
+    Separa el historial en prefijo (system + resumen) y turnos.
+
+    Un turno empieza en un mensaje del usuario e incluye todas las respuestas
+    del asistente y resultados de tools hasta el siguiente mensaje del usuario,
+    así nunca se separa una tool_call de su resultado.
+    """
+    user_indexes = [i for i, message in enumerate(messages) if message.get("role") == "user"]
+    if not user_indexes:
+        return list(messages), []
+
+    prefix = messages[:user_indexes[0]]
+    bounds = user_indexes + [len(messages)]
+    turns = [messages[start:end] for start, end in zip(bounds, bounds[1:])]
+    return prefix, turns
+
+
+def _tool_names_by_id(turn):
+    """
+    Relaciona cada tool_call_id del turno con el nombre y argumentos de la tool
+    """
+    names = {}
+    for message in turn:
+        for tool_call in message.get("tool_calls") or []:
+            names[tool_call.get("id")] = tool_call.get("function", {})
+    return names
+
+
+def _stub_tool_result(message, function):
+    """
+    Sustituye el contenido de un resultado de tool antiguo por un resumen corto
+    """
+    content = message.get("content") or ""
+    if content.startswith(STUB_MARKER) or len(content) <= TOOL_STUB_CHARS * 2:
+        return message
+
+    name = function.get("name", "tool")
+    head = content[:TOOL_STUB_CHARS].rstrip()
+    return {
+        **message,
+        "content": f"{STUB_MARKER} de {name}, {len(content)} caracteres originales]\n{head}..."
+    }
+
+
+def _shorten(text, limit):
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _summarize_turn(turn):
+    """
+    Resume un turno completo en unas pocas líneas (extractivo, sin llamar al modelo)
+    """
+    lines = [f"- Usuario: {_shorten(turn[0].get('content'), 200)}"]
+
+    tools_used = []
+    for function in _tool_names_by_id(turn).values():
+        try:
+            arguments = json.loads(function.get("arguments") or "{}")
+        except ValueError:
+            arguments = {}
+        detail = next((str(v) for v in arguments.values() if isinstance(v, str)), "")
+        tools_used.append(f"{function.get('name')}({_shorten(detail, 60)})")
+
+    if tools_used:
+        lines.append(f"  Tools: {', '.join(tools_used)}")
+
+    answers = [m.get("content") for m in turn if m.get("role") == "assistant" and m.get("content")]
+    if answers:
+        lines.append(f"  Asistente: {_shorten(answers[-1], 300)}")
+
+    return "\n".join(lines)
+
+
+def _merge_summary(prefix, new_lines):
+    """
+    Añade líneas al mensaje de resumen del prefijo (lo crea si no existe)
+    """
+    summary = next((m for m in prefix if (m.get("content") or "").startswith(SUMMARY_HEADER)), None)
+
+    previous = summary["content"][len(SUMMARY_HEADER):].strip() if summary else ""
+    body = "\n".join(part for part in [previous, *new_lines] if part)
+
+    # Si el resumen crece demasiado se descartan las líneas más antiguas
+    if len(body) > SUMMARY_MAX_CHARS:
+        body = "..." + body[-SUMMARY_MAX_CHARS:]
+
+    content = f"{SUMMARY_HEADER}\n{body}"
+
+    if summary:
+        return [m if m is not summary else {**m, "content": content} for m in prefix]
+
+    # El resumen va justo después del system prompt
+    system = [m for m in prefix if m.get("role") == "system"]
+    rest = [m for m in prefix if m.get("role") != "system"]
+    return system + [{"role": "system", "content": content}] + rest
+
+
+def compact_history(messages, budget=None, keep_recent_turns=None):
+    """
+    Compacta el historial en el sitio si supera el presupuesto de tokens.
+
+    Primero resume los resultados de tools de los turnos antiguos; si no basta,
+    pliega los turnos más antiguos en un mensaje de resumen acumulado. El system
+    prompt y los turnos recientes se mantienen siempre literales.
+
+    Args:
+        messages (list): Historial de conversación (se modifica en el sitio)
+        budget (int, optional): Presupuesto de tokens (por defecto CONTEXT_TOKEN_BUDGET)
+        keep_recent_turns (int, optional): Turnos recientes intactos (por defecto KEEP_RECENT_TURNS)
+
+    Returns:
+        int: Tokens estimados del historial tras compactar
+    """
+    budget = budget or CONTEXT_TOKEN_BUDGET
+    keep_recent_turns = KEEP_RECENT_TURNS if keep_recent_turns is None else keep_recent_turns
+
+    tokens = estimate_tokens(messages)
+    if tokens <= budget:
+        return tokens
+
+    prefix, turns = _split_turns(messages)
+    old_count = max(len(turns) - keep_recent_turns, 0)
+    if old_count == 0:
+        return tokens
+
+    # 1) Resultados de tools antiguos -> resumen corto
+    for index in range(old_count):
+        functions = _tool_names_by_id(turns[index])
+        turns[index] = [
+            _stub_tool_result(m, functions.get(m.get("tool_call_id"), {})) if m.get("role") == "tool" else m
+            for m in turns[index]
+        ]
+
+    tokens = estimate_tokens(prefix) + sum(estimate_tokens(turn) for turn in turns)
+
+    # 2) Turnos antiguos -> resumen acumulado, del más antiguo al más reciente
+    folded = []
+    while tokens > budget and len(folded) < old_count:
+        turn = turns[len(folded)]
+        folded.append(_summarize_turn(turn))
+        tokens -= estimate_tokens(turn)
+
+    if folded:
+        prefix = _merge_summary(prefix, folded)
+        turns = turns[len(folded):]
+
+    messages[:] = prefix + [m for turn in turns for m in turn]
+    return estimate_tokens(messages)
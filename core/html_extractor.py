@@ -0,0 +1,412 @@
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+# Elementos cuyo contenido nunca forma parte del texto principal
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe",
+             "object", "embed", "form", "button", "select", "textarea", "head"}
+
+# Elementos que casi siempre son navegación o adornos alrededor del artículo
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside"}
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+             "meta", "param", "source", "track", "wbr"}
+
+# Elementos de bloque: los que, al cerrarse, separan el texto en párrafos
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "h1", "h2", "h3", "h4", "h5", "h6",
+              "ul", "ol", "li", "pre", "blockquote", "table", "tr", "figure", "figcaption",
+              "dl", "dt", "dd", "hr", "br"}
+
+# Elementos que cierran implícitamente un <p> o <li> abierto (HTML permite omitir el cierre)
+_IMPLICIT_CLOSE = {
+    "p": {"p", "div", "ul", "ol", "pre", "blockquote", "table", "h1", "h2", "h3", "h4", "h5", "h6"},
+    "li": {"li"},
+    "dt": {"dt", "dd"},
+    "dd": {"dt", "dd"},
+    "tr": {"tr"},
+    "td": {"td", "th", "tr"},
+    "th": {"td", "th", "tr"},
+}
+
+# Pistas en class / id de que un bloque es (o no es) el contenido principal
+POSITIVE_HINTS = re.compile(r"article|body|content|entry|main|page|post|story|text|blog", re.I)
+NEGATIVE_HINTS = re.compile(
+    r"comment|meta|footer|footnote|sidebar|share|social|related|promo|sponsor|advert|\bads?\b|"
+    r"banner|breadcrumb|nav|menu|cookie|consent|subscribe|newsletter|popup|modal|widget", re.I)
+
+# Longitud mínima (caracteres) de un párrafo para puntuar a sus contenedores
+MIN_PARAGRAPH_CHARS = 25
+
+# Profundidad máxima del árbol: lo que está más anidado se cuelga del último
+# nivel (el conversor a markdown es recursivo y no debe pasar del límite de Python)
+MAX_TREE_DEPTH = 200
+
+
+class Element:
+    """
+    Nodo del árbol HTML simplificado
+    """
+
+    __slots__ = ("tag", "attrs", "children", "parent", "depth")
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs or {})
+        self.children = []
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+
+    def text(self):
+        """
+        Devuelve todo el texto del elemento con los espacios normalizados
+        """
+        parts = []
+        # Recorrido con pila (no recursivo); tras cada bloque se apila un espacio
+        stack = self.children[::-1]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+                continue
+            if node.tag in BLOCK_TAGS:
+                stack.append(" ")
+            stack.extend(reversed(node.children))
+        return re.sub(r"\s+", " ", "".join(parts)).strip()
+
+    def iter(self):
+        """
+        Recorre el elemento y todos sus descendientes (sin los nodos de texto)
+        """
+        stack = [self]
+        while stack:
+            element = stack.pop()
+            yield element
+            stack.extend(child for child in reversed(element.children) if not isinstance(child, str))
+
+
+class _TreeBuilder(HTMLParser):
+    """
+    Construye un árbol tolerante a HTML mal formado, sin scripts ni estilos
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("root")
+        self.current = self.root
+        self.title = ""
+        self.meta = {}
+        self._skip_depth = 0
+        self._overflow_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            name = (attrs.get("property") or attrs.get("name") or "").lower()
+            if name and attrs.get("content"):
+                self.meta.setdefault(name, attrs["content"])
+            return
+        if tag == "title":
+            self._in_title = True
+            return
+
+        if self._skip_depth:
+            if tag not in VOID_TAGS:
+                self._skip_depth += 1
+            return
+        if tag in SKIP_TAGS:
+            if tag not in VOID_TAGS:
+                self._skip_depth = 1
+            return
+
+        # <p>, <li>... sin cerrar se cierran al abrir un elemento que no pueden contener
+        while self.current.tag in _IMPLICIT_CLOSE and tag in _IMPLICIT_CLOSE[self.current.tag]:
+            self.current = self.current.parent
+
+        # Demasiado anidado: se ignora la etiqueta y su texto queda en el nivel actual
+        if self.current.depth >= MAX_TREE_DEPTH:
+            if tag not in VOID_TAGS:
+                self._overflow_depth += 1
+            return
+
+        element = Element(tag, attrs, self.current)
+        self.current.children.append(element)
+        if tag not in VOID_TAGS:
+            self.current = element
+
+    def handle_startendtag(self, tag, attrs):
+        # <x/> se abre y se cierra en el acto (también dentro de un <svg> ignorado)
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+            return
+        if self._skip_depth:
+            if tag not in VOID_TAGS:
+                self._skip_depth -= 1
+            return
+        if self._overflow_depth and tag not in VOID_TAGS:
+            self._overflow_depth -= 1
+            return
+
+        # Se cierra el elemento abierto más cercano con ese nombre (si lo hay)
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self.current.children.append(data)
+
+
+def _class_weight(element):
+    hints = f"{element.attrs.get('class') or ''} {element.attrs.get('id') or ''}"
+    weight = 0
+    if NEGATIVE_HINTS.search(hints):
+        weight -= 25
+    if POSITIVE_HINTS.search(hints):
+        weight += 25
+    return weight
+
+
+def _link_density(element):
+    text_length = len(element.text())
+    if not text_length:
+        return 1.0
+    link_length = sum(len(a.text()) for a in element.iter() if a.tag == "a")
+    return link_length / text_length
+
+
+def _find_main_content(root):
+    """
+    Elige el contenedor del contenido principal (puntuación al estilo Readability).
+
+    Cada párrafo suficientemente largo suma puntos a su padre y la mitad a su
+    abuelo según su longitud y número de comas; después se ajusta por las
+    pistas de class / id y se penaliza la densidad de enlaces.
+    """
+    scores = {}
+
+    for element in root.iter():
+        if element.tag in BOILERPLATE_TAGS:
+            continue
+        if element.tag not in ("p", "pre", "td", "blockquote", "li"):
+            continue
+        text = element.text()
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+
+        points = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = element.parent
+        for share in (1.0, 0.5):
+            if parent is None or parent is root:
+                break
+            if parent not in scores:
+                scores[parent] = _class_weight(parent) + (5 if parent.tag in ("article", "main") else 0)
+            scores[parent] += points * share
+            parent = parent.parent
+
+    if not scores:
+        return None
+
+    best = max(scores, key=lambda element: scores[element] * (1 - _link_density(element)))
+
+    # Si el elegido es solo un fragmento, se sube al contenedor que lo agrupa con sus hermanos
+    parent = best.parent
+    if parent is not None and parent is not root and parent in scores and scores[parent] >= scores[best] * 0.75:
+        best = parent
+    return best
+
+
+class _MarkdownWriter:
+    """
+    Convierte un subárbol a markdown
+    """
+
+    def __init__(self, base_url, root=None):
+        self.base_url = base_url
+        self.root = root
+        self.blocks = []
+
+    def _absolute(self, url):
+        return urljoin(self.base_url, url) if self.base_url else url
+
+    def inline(self, node):
+        if isinstance(node, str):
+            return re.sub(r"\s+", " ", node)
+
+        tag = node.tag
+        if tag in BOILERPLATE_TAGS or _class_weight(node) < 0:
+            return ""
+        if tag == "br":
+            return "\n"
+        if tag == "img":
+            src = node.attrs.get("src")
+            alt = (node.attrs.get("alt") or "").strip()
+            return f"![{alt}]({self._absolute(src)})" if src and alt else ""
+
+        content = "".join(self.inline(child) for child in node.children)
+        stripped = content.strip()
+        if not stripped:
+            return content
+
+        if tag == "a":
+            href = node.attrs.get("href") or ""
+            if href and not href.startswith(("#", "javascript:")):
+                return f"[{stripped}]({self._absolute(href)})"
+        elif tag in ("strong", "b"):
+            return f"**{stripped}**"
+        elif tag in ("em", "i"):
+            return f"_{stripped}_"
+        elif tag == "code":
+            return f"`{stripped}`"
+        return content
+
+    def block(self, node, list_prefix=None):
+        """
+        Añade a self.blocks los bloques de markdown de un elemento
+        """
+        if isinstance(node, str):
+            text = re.sub(r"\s+", " ", node).strip()
+            if text:
+                self.blocks.append(text)
+            return
+
+        tag = node.tag
+        # Dentro del contenido principal también sobran los bloques de compartir, comentarios...
+        if tag in BOILERPLATE_TAGS or (node is not self.root and _class_weight(node) < 0):
+            return
+
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            text = re.sub(r"\s+", " ", node.text())
+            if text:
+                self.blocks.append(f"{'#' * int(tag[1])} {text}")
+        elif tag == "pre":
+            code = "".join(self._raw_text(node)).strip("\n")
+            if code.strip():
+                self.blocks.append(f"```\n{code}\n```")
+        elif tag in ("ul", "ol"):
+            items = []
+            for number, item in enumerate((c for c in node.children if not isinstance(c, str) and c.tag == "li"), 1):
+                text = self._paragraph(item)
+                if text:
+                    prefix = f"{number}." if tag == "ol" else "-"
+                    items.append(f"{prefix} " + text.replace("\n", "\n   "))
+            if items:
+                self.blocks.append("\n".join(items))
+        elif tag == "blockquote":
+            text = self._paragraph(node)
+            if text:
+                self.blocks.append("\n".join(f"> {line}" for line in text.splitlines()))
+        elif tag == "table":
+            rows = []
+            for row in node.iter():
+                if row.tag == "tr":
+                    cells = [self._paragraph(cell).replace("\n", " ") for cell in row.children
+                             if not isinstance(cell, str) and cell.tag in ("td", "th")]
+                    if any(cells):
+                        rows.append("| " + " | ".join(cells) + " |")
+            if rows:
+                self.blocks.append("\n".join(rows))
+        elif tag == "hr":
+            self.blocks.append("---")
+        elif any(not isinstance(child, str) and child.tag in BLOCK_TAGS for child in node.children):
+            # Contenedor con bloques dentro: el texto suelto entre ellos va en su propio párrafo
+            inline = []
+            for child in node.children:
+                if isinstance(child, str) or child.tag not in BLOCK_TAGS:
+                    inline.append(child)
+                    continue
+                self._flush(inline)
+                self.block(child)
+            self._flush(inline)
+        else:
+            text = self._paragraph(node)
+            if text:
+                self.blocks.append(text)
+
+    def _flush(self, nodes):
+        text = self._clean("".join(self.inline(node) for node in nodes))
+        if text:
+            self.blocks.append(text)
+        nodes.clear()
+
+    def _paragraph(self, node):
+        return self._clean("".join(self.inline(child) for child in node.children))
+
+    @staticmethod
+    def _clean(text):
+        lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n")]
+        return "\n".join(line for line in lines if line)
+
+    def _raw_text(self, node):
+        for child in node.children:
+            if isinstance(child, str):
+                yield child
+            else:
+                yield from self._raw_text(child)
+                if child.tag == "br":
+                    yield "\n"
+
+
+def extract_markdown(html, url=None):
+    """
+    Extrae el contenido principal de una página HTML y lo devuelve en markdown.
+
+    Solo usa la librería estándar: descarta scripts, estilos, navegación y
+    bloques con pinta de publicidad, elige el contenedor con más texto
+    (ver _find_main_content) y lo convierte a markdown con enlaces absolutos.
+
+    Args:
+        html (str): HTML de la página
+        url (str, optional): URL de la página (para resolver enlaces relativos)
+
+    Returns:
+        tuple: (título, markdown del contenido principal)
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+
+    title = (builder.meta.get("og:title") or builder.title).strip()
+    main = _find_main_content(builder.root)
+    if main is None:
+        # Sin párrafos largos: se convierte el <body> entero
+        main = next((element for element in builder.root.iter() if element.tag == "body"), builder.root)
+
+    writer = _MarkdownWriter(url, main)
+    writer.block(main)
+
+    markdown = "\n\n".join(writer.blocks)
+    return title, markdown
+
+
+def html_to_markdown(html, url=None):
+    """
+    Igual que extract_markdown pero con la cabecera que devuelve Jina AI Reader
+    (Title / URL Source / Markdown Content), para que ambos motores den el mismo formato
+    """
+    title, markdown = extract_markdown(html, url)
+    header = [f"Title: {title}", ""]
+    if url:
+        header += [f"URL Source: {url}", ""]
+    return "\n".join(header + ["Markdown Content:", markdown])
+
+
+if __name__ == "__main__":
+    # Prueba sin red contra un HTML guardado:
+    #   python -m core.html_extractor pagina.html https://ejemplo.com/articulo
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit("Uso: python -m core.html_extractor fichero.html [url]")
+
+    with open(sys.argv[1], "r", encoding="utf-8", errors="replace") as f:
+        print(html_to_markdown(f.read(), sys.argv[2] if len(sys.argv) > 2 else None))
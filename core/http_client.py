@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+
+from core import tracing, rate_limiter
+
+# Número de hosts distintos con pool propio (OpenRouter, Tavily, Jina, Yahoo, Telegram...)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "16"))
+
+# Conexiones keep-alive que se mantienen abiertas por host
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+
+# Timeouts (conexión, lectura) en segundos para cada tool / backend
+TIMEOUTS = {
+    # En streaming el timeout de lectura se aplica entre fragmentos, no al total
+    "openrouter": (10, 120),
+    "search_internet": (5, 30),
+    "scrape_website": (5, 30),
+    "get_stock_price": (5, 10),
+    "telegram": (5, 10),
+    "telegram_upload": (5, 30),
+    "generate_image": (5, 30),
+}
+
+DEFAULT_TIMEOUT = (5, 30)
+
+# Redirección de hosts (para apuntar el agente a backends locales en benchmarks/tests).
+# Formato: "api.tavily.com=http://127.0.0.1:9001,r.jina.ai=http://127.0.0.1:9002"
+HOST_OVERRIDES = dict(
+    item.split("=", 1)
+    for item in os.getenv("HTTP_HOST_OVERRIDES", "").split(",")
+    if "=" in item
+)
+
+# Parámetros de seguimiento que no cambian la página a la que apunta una URL
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Devuelve la sesión HTTP compartida por el agente y todas las tools.
+
+    La sesión reutiliza conexiones TCP+TLS entre llamadas (keep-alive) con un
+    pool por host, así que solo se paga el handshake la primera vez.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+
+    return _session
+
+
+def set_host_override(host, base_url):
+    """
+    Redirige todas las peticiones a un host hacia otra URL base.
+
+    Args:
+        host (str): Host original (ej: "api.tavily.com")
+        base_url (str): URL base de destino (ej: "http://127.0.0.1:9001"), o None para quitarla
+    """
+    if base_url is None:
+        HOST_OVERRIDES.pop(host, None)
+    else:
+        HOST_OVERRIDES[host] = base_url.rstrip("/")
+
+
+def _apply_override(url):
+    if not HOST_OVERRIDES:
+        return url
+
+    parts = urlsplit(url)
+    base_url = HOST_OVERRIDES.get(parts.hostname)
+    if base_url is None:
+        return url
+
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    return base_url + path
+
+
+def canonicalize_url(url):
+    """
+    Normaliza una URL para reconocer la misma página (deduplicar resultados, claves de caché).
+
+    Ignora el esquema, "www.", el fragmento, la barra final, los parámetros de
+    seguimiento (utm_*, fbclid...) y el orden de los parámetros.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/")
+
+    return urlunsplit(("", host, path, urlencode(query), ""))
+
+
+def get_timeout(tool=None):
+    """
+    Devuelve el timeout (conexión, lectura) configurado para una tool
+    """
+    return TIMEOUTS.get(tool, DEFAULT_TIMEOUT)
+
+
+def request(method, url, tool=None, rate_key=None, **kwargs):
+    """
+    Hace una petición HTTP a través de la sesión compartida.
+
+    Las peticiones a backends con límite (ver core/rate_limiter.py) esperan
+    turno en su token bucket y, si el backend responde 429, se reintentan
+    cuando indique Retry-After en vez de devolver el error.
+
+    Args:
+        method (str): Método HTTP ("GET", "POST"...)
+        url (str): URL de destino
+        tool (str, optional): Nombre de la tool/backend para elegir el timeout
+        rate_key (str, optional): Credencial con límite propio (chat, API key...)
+        **kwargs: Argumentos extra de requests (json, data, files, headers, stream...)
+
+    Returns:
+        requests.Response: Respuesta HTTP
+    """
+    kwargs.setdefault("timeout", get_timeout(tool))
+    host = urlsplit(url).hostname
+    backend = rate_limiter.backend_for_host(host)
+
+    with tracing.span("http", host or url, method=method, tool=tool) as current:
+        body = kwargs.get("data")
+        if body is None and kwargs.get("json") is not None:
+            body = json.dumps(kwargs["json"])
+        if isinstance(body, (bytes, str)):
+            current.set(bytes_out=len(body))
+
+        if backend is None:
+            response = get_session().request(method, _apply_override(url), **kwargs)
+        else:
+            response = _rate_limited_request(method, url, backend, rate_key, current, kwargs)
+
+        current.set(status=response.status_code)
+        # En streaming el cuerpo todavía no se ha leído: se usa Content-Length si viene
+        if kwargs.get("stream"):
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit():
+                current.set(bytes_in=int(length))
+        else:
+            current.set(bytes_in=len(response.content))
+        return response
+
+
+def _rate_limited_request(method, url, backend, rate_key, current, kwargs):
+    bucket = rate_limiter.get_bucket(backend, rate_key)
+    priority = rate_limiter.current_priority()
+    deadline = time.monotonic() + rate_limiter.RATE_LIMIT_MAX_WAIT
+
+    for retry in range(rate_limiter.RATE_LIMIT_MAX_RETRIES + 1):
+        waited = bucket.acquire(priority, timeout=max(deadline - time.monotonic(), 0))
+        current.add(queue_ms=round(waited * 1000, 1))
+
+        response = get_session().request(method, _apply_override(url), **kwargs)
+        if response.status_code != 429 or retry == rate_limiter.RATE_LIMIT_MAX_RETRIES:
+            return response
+
+        # 429: se bloquea el bucket (para todas las peticiones de esa credencial)
+        # el tiempo que pida el backend y se reintenta si cabe en la espera máxima
+        retry_after = rate_limiter.parse_retry_after(response)
+        if retry_after is None:
+            retry_after = min(2 ** retry, rate_limiter.RATE_LIMIT_MAX_WAIT)
+        if time.monotonic() + retry_after > deadline:
+            return response
+
+        bucket.penalize(retry_after)
+        current.add(throttled=1)
+        response.close()
+
+        # Los ficheros adjuntos se vuelven a leer desde el principio
+        for value in (kwargs.get("files") or {}).values():
+            if isinstance(value, tuple):
+                value = value[1]
+            if hasattr(value, "seek"):
+                value.seek(0)
+
+    return response
+
+
+def get(url, tool=None, **kwargs):
+    """
+    Atajo para request("GET", ...)
+    """
+    return request("GET", url, tool=tool, **kwargs)
+
+
+def post(url, tool=None, **kwargs):
+    """
+    Atajo para request("POST", ...)
+    """
+    return request("POST", url, tool=tool, **kwargs)
@@ -0,0 +1,196 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+
+from core import http_client
+
+# Base de datos SQLite con el índice de todo lo buscado y leído ("" = desactivado)
+KNOWLEDGE_DB_PATH = os.getenv("KNOWLEDGE_DB_PATH", "knowledge.db")
+
+# Tamaño máximo del texto indexado; al superarlo se borran los documentos más antiguos
+KNOWLEDGE_MAX_BYTES = int(os.getenv("KNOWLEDGE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Al desalojar se deja el índice en este porcentaje del máximo (para no desalojar en cada inserción)
+KNOWLEDGE_EVICT_TARGET = 0.9
+
+# Caracteres máximos que se guardan de cada documento
+KNOWLEDGE_MAX_DOCUMENT_CHARS = 200000
+
+# Palabras del fragmento que se muestra alrededor de las coincidencias
+KNOWLEDGE_SNIPPET_WORDS = 32
+
+_index = None
+_index_lock = threading.Lock()
+
+
+class KnowledgeIndex:
+    """
+    Índice de texto completo (SQLite FTS5) de las páginas y resultados de búsqueda vistos.
+
+    Cada documento se identifica por su URL canónica y la tool que lo obtuvo:
+    volver a leer una página sustituye la versión anterior. El tamaño total
+    se mantiene por debajo de max_bytes borrando los documentos más antiguos.
+    """
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or KNOWLEDGE_DB_PATH
+        self.max_bytes = max_bytes or KNOWLEDGE_MAX_BYTES
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                canonical_url TEXT NOT NULL,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                UNIQUE (canonical_url, source)
+            );
+            CREATE INDEX IF NOT EXISTS documents_fetched_at ON documents (fetched_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                title, content, tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()
+        self._size = row[0]
+
+    def add(self, url, title, content, source):
+        """
+        Añade (o sustituye) un documento en el índice.
+
+        Args:
+            url (str): URL del documento
+            title (str): Título
+            content (str): Texto a indexar
+            source (str): Tool que lo obtuvo ("search_internet", "scrape_website"...)
+        """
+        content = content[:KNOWLEDGE_MAX_DOCUMENT_CHARS]
+        size = len(title.encode("utf-8")) + len(content.encode("utf-8"))
+        canonical = http_client.canonicalize_url(url)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete_where("canonical_url = ? AND source = ?", (canonical, source))
+                cursor = self._conn.execute(
+                    "INSERT INTO documents (canonical_url, source, url, title, fetched_at, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (canonical, source, url, title, time.time(), size)
+                )
+                self._conn.execute(
+                    "INSERT INTO documents_fts (rowid, title, content) VALUES (?, ?, ?)",
+                    (cursor.lastrowid, title, content)
+                )
+                self._size += size
+                if self._size > self.max_bytes:
+                    self._evict()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                # El tamaño en memoria puede haber quedado desfasado: se recalcula
+                self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+                raise
+
+    def _delete_where(self, condition, params):
+        rows = self._conn.execute(f"SELECT id, size FROM documents WHERE {condition}", params).fetchall()
+        for doc_id, size in rows:
+            self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+            self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            self._size -= size
+
+    def _evict(self):
+        # Se borran los documentos más antiguos hasta quedar en KNOWLEDGE_EVICT_TARGET del máximo
+        target = self.max_bytes * KNOWLEDGE_EVICT_TARGET
+        rows = self._conn.execute("SELECT id, size FROM documents ORDER BY fetched_at").fetchall()
+        for doc_id, size in rows:
+            if self._size <= target:
+                break
+            self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+            self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            self._size -= size
+
+    def search(self, query, limit=5, source=None):
+        """
+        Busca documentos por texto, ordenados por relevancia (BM25, el título pesa más).
+
+        Args:
+            query (str): Palabras a buscar (basta con que aparezca alguna)
+            limit (int): Resultados máximos
+            source (str, optional): Solo documentos de esta tool
+
+        Returns:
+            list: Resultados ({"url", "title", "source", "fetched_at", "snippet"})
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        # Cada palabra va entre comillas: así no se interpreta la sintaxis de FTS5
+        match = " OR ".join(f'"{word}"' for word in words)
+
+        sql = (
+            "SELECT d.url, d.title, d.source, d.fetched_at, "
+            f"snippet(documents_fts, 1, '**', '**', '...', {KNOWLEDGE_SNIPPET_WORDS}) "
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+            "WHERE documents_fts MATCH ?"
+        )
+        params = [match]
+        if source:
+            sql += " AND d.source = ?"
+            params.append(source)
+        sql += " ORDER BY bm25(documents_fts, 5.0, 1.0) LIMIT ?"
+        params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            {"url": url, "title": title, "source": doc_source, "fetched_at": fetched_at, "snippet": snippet}
+            for url, title, doc_source, fetched_at, snippet in rows
+        ]
+
+    def get_stats(self):
+        """
+        Devuelve el número de documentos y el tamaño del texto indexado
+        """
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            return {"documents": count, "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+def get_index():
+    """
+    Devuelve el índice compartido (o None si KNOWLEDGE_DB_PATH está vacío)
+    """
+    global _index
+
+    if not KNOWLEDGE_DB_PATH:
+        return None
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = KnowledgeIndex()
+    return _index
+
+
+def index_document(url, title, content, source):
+    """
+    Añade un documento al índice compartido sin que un fallo afecte a la tool que lo llama
+    """
+    try:
+        index = get_index()
+        if index is not None and content:
+            index.add(url, title or url, content, source)
+    except sqlite3.Error:
+        pass
@@ -0,0 +1,408 @@
+import os
+import time
+import queue
+import random
+import itertools
+import threading
+from collections import deque
+
+from core import http_client, tracing
+from core.streaming import iter_sse_events, ChatStreamAccumulator
+
+# Modelos en orden de preferencia: el primero es el principal, el resto son fallback
+LLM_MODELS = [m.strip() for m in os.getenv("LLM_MODELS", "x-ai/grok-4.1-fast").split(",") if m.strip()]
+
+# Tiempo máximo (segundos) para conseguir una respuesta, contando reintentos
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "180"))
+
+# Intentos máximos por petición (incluidos los de fallback)
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+
+# Hedging: si la petición tarda más que el p95 habitual, se lanza la misma
+# petición al siguiente modelo del pool y se usa la que responda antes
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "10"))
+LLM_HEDGE_MIN_DELAY = 1.0
+
+# Backoff exponencial con jitter completo entre reintentos (segundos)
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+# Circuit breaker: tras N fallos seguidos el modelo se deja de usar durante un rato
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_COOLDOWN = 30.0
+
+# Muestras de latencia que se guardan por modelo (y mínimo para calcular el p95)
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+# Códigos HTTP que merece la pena reintentar
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """
+    Error al pedir una respuesta al modelo
+    """
+
+    def __init__(self, message, status=None, retryable=True):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por modelo: cerrado -> abierto (tras fallos seguidos) -> semiabierto
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def is_available(self):
+        """
+        Indica si el modelo se puede usar ahora (circuito cerrado o prueba pendiente).
+
+        Solo consulta el estado: la petición de prueba se reserva con try_acquire().
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            return time.monotonic() - self._opened_at >= self.cooldown and not self._trial_running
+
+    def try_acquire(self):
+        """
+        Reserva el modelo para una petición que se va a enviar ya.
+
+        Con el circuito semiabierto solo la primera reserva tras el cooldown lo
+        consigue: es la petición de prueba, que queda reservada hasta
+        record_success / record_failure o release_trial.
+
+        Returns:
+            str | None: "closed", "trial" o None si no se puede usar
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.cooldown and not self._trial_running:
+                self._trial_running = True
+                return "trial"
+            return None
+
+    def release_trial(self):
+        """
+        Libera la petición de prueba que no ha llegado a dar resultado
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class _Round:
+    """
+    Grupo de intentos simultáneos (principal + hedge) de los que gana el primero
+    """
+
+    def __init__(self):
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def deliver(self, attempt, payload, error):
+        # Si ya hay ganador, la respuesta que llega tarde se cierra y se descarta
+        with self.lock:
+            if not self.closed:
+                self.results.put((attempt, payload, error))
+                return
+        _close_payload(payload)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        while True:
+            try:
+                _, payload, _ = self.results.get_nowait()
+            except queue.Empty:
+                break
+            _close_payload(payload)
+
+
+def _close_payload(payload):
+    if payload and payload.get("response") is not None:
+        payload["response"].close()
+
+
+class LLMClient:
+    """
+    Cliente de chat/completions con pool de modelos, reintentos y hedging.
+
+    Args:
+        url (str): Endpoint de chat/completions
+        headers (dict): Cabeceras HTTP (autorización, etc.)
+        models (list, optional): Modelos en orden de preferencia (por defecto LLM_MODELS)
+        hedge (bool, optional): Activa el hedging (por defecto LLM_HEDGE)
+    """
+
+    def __init__(self, url, headers, models=None, hedge=None):
+        self.url = url
+        self.headers = headers
+        self.models = list(models or LLM_MODELS)
+        self.hedge = LLM_HEDGE if hedge is None else hedge
+        self.breakers = {model: CircuitBreaker() for model in self.models}
+        self._latencies = {}
+        self._latency_lock = threading.Lock()
+
+    # --- Latencias ---
+
+    def _record_latency(self, model, stream, seconds):
+        with self._latency_lock:
+            samples = self._latencies.setdefault((model, stream), deque(maxlen=LATENCY_WINDOW))
+            samples.append(seconds)
+
+    def p95(self, model, stream):
+        """
+        Devuelve el p95 de latencia (hasta la primera respuesta) de un modelo, o None
+        """
+        with self._latency_lock:
+            samples = sorted(self._latencies.get((model, stream), ()))
+        if len(samples) < LATENCY_MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+
+    def _hedge_delay(self, model, stream):
+        p95 = self.p95(model, stream)
+        if p95 is None:
+            return LLM_HEDGE_DEFAULT_DELAY
+        return max(p95, LLM_HEDGE_MIN_DELAY)
+
+    # --- Intentos ---
+
+    def _attempt(self, model, body, stream, round_):
+        """
+        Envía la petición a un modelo (en su propio hilo) y entrega el resultado a la ronda.
+
+        En streaming el intento termina al recibir el primer evento, para que el
+        ganador se decida por el tiempo hasta el primer token.
+        """
+        start = time.monotonic()
+        response = None
+        try:
+            response = http_client.post(
+                self.url, tool="openrouter", headers=self.headers, data=body, stream=stream
+            )
+
+            if response.status_code >= 400:
+                detail = response.text[:500]
+                raise LLMError(
+                    f"Error {response.status_code} de {model}: {detail}",
+                    status=response.status_code,
+                    retryable=response.status_code in RETRYABLE_STATUS
+                )
+
+            if stream:
+                events = iter_sse_events(response)
+                first = next(events, None)
+                if first is None:
+                    raise LLMError(f"Stream vacío de {model}")
+                payload = {"response": response, "events": itertools.chain([first], events)}
+            else:
+                result = response.json()
+                if result.get("error") or not result.get("choices"):
+                    error = result.get("error") or {}
+                    raise LLMError(f"Respuesta inválida de {model}: {error.get('message', error)}")
+                payload = {"response": None, "result": result, "bytes_in": len(response.content)}
+
+            payload["bytes_out"] = len(body)
+            self._record_latency(model, stream, time.monotonic() - start)
+            round_.deliver(model, payload, None)
+
+        except Exception as e:
+            if response is not None:
+                response.close()
+            round_.deliver(model, None, e)
+
+    def _launch(self, model, build_body, stream, round_):
+        thread = threading.Thread(
+            target=tracing.run_in_context(self._attempt, model, build_body(model), stream, round_),
+            daemon=True
+        )
+        thread.start()
+
+    def _available_models(self):
+        return [model for model in self.models if self.breakers[model].is_available()]
+
+    def acquire_model(self, attempt_number, exclude=()):
+        """
+        Elige el modelo de un intento rotando entre los disponibles (fallback) y
+        lo reserva en su circuit breaker.
+
+        Args:
+            attempt_number (int): Número de intento (el n-ésimo usa el n-ésimo disponible)
+            exclude (iterable): Modelos que no se quieren (ej: el principal, para el hedge)
+
+        Returns:
+            tuple: (modelo o None si no hay ninguno, True si es una petición de prueba
+                que hay que liberar con release_trial si no llega a dar resultado)
+        """
+        candidates = [model for model in self._available_models() if model not in exclude]
+        for offset in range(len(candidates)):
+            model = candidates[(attempt_number + offset) % len(candidates)]
+            state = self.breakers[model].try_acquire()
+            if state is not None:
+                return model, state == "trial"
+        return None, False
+
+    def complete(self, build_body, stream=False, on_token=None, on_tool_call=None, on_usage=None, deadline=None):
+        """
+        Pide una respuesta al modelo con reintentos, fallback y hedging opcional.
+
+        Args:
+            build_body (callable): Función model -> bytes con el cuerpo de la petición
+            stream (bool): Si se pide la respuesta en streaming
+            on_token (callable, optional): Fragmentos de texto (solo streaming)
+            on_tool_call (callable, optional): tool_calls completas (solo streaming)
+            on_usage (callable, optional): Campo "usage" de la respuesta
+            deadline (float, optional): Segundos máximos (por defecto LLM_DEADLINE)
+
+        Returns:
+            tuple: (mensaje del asistente, modelo que respondió)
+        """
+        # Un span por petición lógica (con sus reintentos y hedges); se nombra
+        # con el modelo que acaba respondiendo
+        with tracing.span("llm", self.models[0], stream=stream) as current:
+            def track_usage(usage):
+                current.set_usage(usage)
+                if on_usage:
+                    on_usage(usage)
+
+            return self._complete(build_body, stream, on_token, on_tool_call, track_usage,
+                                  deadline, current)
+
+    def _complete(self, build_body, stream, on_token, on_tool_call, on_usage, deadline, current):
+        deadline_at = time.monotonic() + (deadline or LLM_DEADLINE)
+        last_error = None
+
+        for attempt_number in range(LLM_MAX_ATTEMPTS):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+
+            # En cada reintento se rota al siguiente modelo disponible (fallback)
+            primary, trial = self.acquire_model(attempt_number)
+            if primary is None:
+                # Todos los modelos tienen el circuito abierto: se prueba el principal
+                primary = self.models[0]
+            # Pruebas de circuitos semiabiertos reservadas en esta ronda y aún sin resultado
+            trials = {primary} if trial else set()
+            hedge_pending = self.hedge
+
+            round_ = _Round()
+            self._launch(primary, build_body, stream, round_)
+            current.add(attempts=1)
+            launched = 1
+
+            winner = None
+            try:
+                while launched and winner is None:
+                    timeout = deadline_at - time.monotonic()
+                    if hedge_pending:
+                        timeout = min(timeout, self._hedge_delay(primary, stream))
+                    if timeout <= 0:
+                        break
+
+                    try:
+                        model, payload, error = round_.results.get(timeout=timeout)
+                    except queue.Empty:
+                        if hedge_pending:
+                            # El principal va lento: se lanza el hedge y se sigue esperando.
+                            # Sin otro modelo disponible el hedge repite el mismo (OpenRouter
+                            # puede enrutarlo a otro proveedor)
+                            hedge_model, trial = self.acquire_model(0, exclude={primary})
+                            if hedge_model is None:
+                                hedge_model = primary
+                            elif trial:
+                                trials.add(hedge_model)
+                            self._launch(hedge_model, build_body, stream, round_)
+                            current.add(attempts=1, hedges=1)
+                            launched += 1
+                            hedge_pending = False
+                            continue
+                        break
+
+                    launched -= 1
+                    if error is None:
+                        self.breakers[model].record_success()
+                        trials.discard(model)
+                        winner = (model, payload)
+                    elif isinstance(error, LLMError) and not error.retryable:
+                        # Error del cliente (400, 401, 404...): repetir la misma petición
+                        # no lo arregla y no dice nada de la salud del modelo (su prueba,
+                        # si lo era, se libera abajo)
+                        raise error
+                    else:
+                        self.breakers[model].record_failure()
+                        trials.discard(model)
+                        last_error = error
+            finally:
+                round_.close()
+                # Una prueba sin resultado (perdió contra el otro intento, o se acabó
+                # el tiempo) no debe dejar el modelo excluido para siempre
+                for model in trials:
+                    self.breakers[model].release_trial()
+
+            if winner is not None:
+                return self._finish(winner, on_token, on_tool_call, on_usage, current)
+
+            # Backoff con jitter completo antes del siguiente intento
+            delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt_number))
+            remaining = deadline_at - time.monotonic()
+            if remaining <= delay:
+                break
+            time.sleep(delay)
+
+        if last_error is None:
+            raise LLMError("Tiempo agotado esperando respuesta del modelo")
+        raise last_error
+
+    def _finish(self, winner, on_token, on_tool_call, on_usage, current):
+        """
+        Consume la respuesta ganadora y devuelve (mensaje, modelo)
+        """
+        model, payload = winner
+        current.name = model
+        current.set(bytes_out=payload["bytes_out"])
+
+        if payload.get("response") is None:
+            result = payload["result"]
+            current.set(bytes_in=payload["bytes_in"])
+            if on_usage and result.get("usage"):
+                on_usage(result["usage"])
+            return result["choices"][0]["message"], model
+
+        accumulator = ChatStreamAccumulator(on_token, on_tool_call, on_usage)
+        try:
+            for data in payload["events"]:
+                current.add(bytes_in=len(data))
+                if accumulator.feed(data):
+                    break
+        finally:
+            payload["response"].close()
+
+        return accumulator.finish(), model
@@ -0,0 +1,156 @@
+import os
+import json
+import threading
+from datetime import datetime
+
+# Breakpoints cache_control de OpenRouter: "auto" solo los añade en los modelos que
+# los necesitan (Anthropic, Gemini); OpenAI, Grok o DeepSeek cachean el prefijo solos
+PROMPT_CACHE_CONTROL = os.getenv("PROMPT_CACHE_CONTROL", "auto").lower()
+
+CACHE_CONTROL_MODEL_PREFIXES = ("anthropic/", "google/gemini")
+
+_usage_lock = threading.Lock()
+_usage_stats = {
+    "requests": 0,
+    "prompt_tokens": 0,
+    "cached_tokens": 0,
+    "completion_tokens": 0,
+}
+
+
+def serialize_tools(tools):
+    """
+    Serializa las definiciones de las tools una sola vez.
+
+    Args:
+        tools (list): Definiciones de las tools
+
+    Returns:
+        str: JSON compacto, idéntico byte a byte en todas las peticiones
+    """
+    return json.dumps(tools, ensure_ascii=False, separators=(",", ":"))
+
+
+def date_message(now=None):
+    """
+    Mensaje con la fecha actual, separado del system prompt para no romper su caché
+    """
+    now = now or datetime.now()
+    fecha_actual = now.strftime("%Y-%m-%d")  # Formato: 2025-01-07
+    fecha_legible = now.strftime("%d de %B de %Y")  # Formato: 07 de enero de 2025
+    return {
+        "role": "system",
+        "content": f"Fecha actual: {fecha_actual} ({fecha_legible})"
+    }
+
+
+def uses_cache_control(model):
+    """
+    Indica si hay que marcar breakpoints cache_control para este modelo
+    """
+    if PROMPT_CACHE_CONTROL in ("on", "true", "1"):
+        return True
+    if PROMPT_CACHE_CONTROL in ("off", "false", "0"):
+        return False
+    return model.startswith(CACHE_CONTROL_MODEL_PREFIXES)
+
+
+def build_messages(history, model, now=None):
+    """
+    Construye la lista de mensajes a enviar con un prefijo estable.
+
+    Orden: system prompt (fijo, con breakpoint de caché si aplica), fecha del día
+    y después el resto del historial (resumen de turnos antiguos y turnos).
+
+    Args:
+        history (list): Historial de conversación (el primer mensaje es el system prompt)
+        model (str): Modelo al que se envía la petición
+        now (datetime, optional): Fecha a usar (por defecto la actual)
+
+    Returns:
+        list: Mensajes listos para la petición (el historial no se modifica)
+    """
+    system, rest = history[0], history[1:]
+
+    if uses_cache_control(model):
+        system = {
+            "role": "system",
+            "content": [
+                {
+                    "type": "text",
+                    "text": system["content"],
+                    "cache_control": {"type": "ephemeral"}
+                }
+            ]
+        }
+
+    return [system, date_message(now), *rest]
+
+
+def build_request_body(model, history, tools_json, stream=False, now=None):
+    """
+    Construye el cuerpo JSON de la petición a chat/completions.
+
+    Las claves van siempre en el mismo orden y las tools se insertan ya
+    serializadas, así el principio del cuerpo es idéntico en cada petición.
+
+    Args:
+        model (str): Modelo a usar
+        history (list): Historial de conversación
+        tools_json (str): Tools serializadas con serialize_tools()
+        stream (bool): Si se pide la respuesta en streaming
+        now (datetime, optional): Fecha a usar en el mensaje de fecha
+
+    Returns:
+        bytes: Cuerpo de la petición codificado en UTF-8
+    """
+    messages = json.dumps(build_messages(history, model, now), ensure_ascii=False, separators=(",", ":"))
+
+    body = (
+        f'{{"model":{json.dumps(model)},'
+        f'"tools":{tools_json},'
+        f'"messages":{messages},'
+        f'"stream":{"true" if stream else "false"},'
+        # Pide a OpenRouter el detalle de uso (incluye los tokens cacheados)
+        f'"usage":{{"include":true}}}}'
+    )
+    return body.encode("utf-8")
+
+
+def record_usage(usage):
+    """
+    Acumula el uso de tokens de una respuesta (incluidos los servidos desde caché).
+
+    Args:
+        usage (dict): Campo "usage" de la respuesta de OpenRouter
+
+    Returns:
+        dict: Resumen de la petición (prompt_tokens, cached_tokens, completion_tokens)
+    """
+    usage = usage or {}
+    details = usage.get("prompt_tokens_details") or {}
+    entry = {
+        "prompt_tokens": usage.get("prompt_tokens") or 0,
+        "cached_tokens": details.get("cached_tokens") or 0,
+        "completion_tokens": usage.get("completion_tokens") or 0,
+    }
+
+    with _usage_lock:
+        _usage_stats["requests"] += 1
+        for key, value in entry.items():
+            _usage_stats[key] += value
+
+    return entry
+
+
+def get_usage_stats():
+    """
+    Devuelve el uso acumulado y el porcentaje de tokens de entrada servidos desde caché
+    """
+    with _usage_lock:
+        stats = dict(_usage_stats)
+
+    stats["cache_hit_rate"] = (
+        stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+    )
+    return stats
@@ -0,0 +1,212 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+import requests
+
+# Límites por backend: peticiones por segundo y ráfaga máxima (token bucket).
+# Cada credencial (chat de Telegram, API key...) tiene su propio bucket.
+RATE_LIMITS = {
+    # Telegram recomienda no pasar de un mensaje por segundo en un mismo chat
+    "telegram": (1.0, 3),
+    # Tavily: ~100 peticiones/minuto en las cuentas de desarrollo
+    "tavily": (1.5, 5),
+    # Jina Reader sin API key: ~20 peticiones/minuto
+    "jina": (0.33, 5),
+    # Yahoo Finance corta a los clientes que hacen muchas peticiones seguidas
+    "yahoo": (2.0, 5),
+}
+
+# Permite ajustar los límites: "tavily=3:10,yahoo=1:2" (peticiones/s:ráfaga)
+for _item in os.getenv("RATE_LIMITS", "").split(","):
+    if "=" in _item:
+        _name, _value = _item.split("=", 1)
+        _rate, _, _burst = _value.partition(":")
+        RATE_LIMITS[_name.strip()] = (float(_rate), int(_burst or 1))
+
+# Host de cada backend con límite
+HOST_BACKENDS = {
+    "api.telegram.org": "telegram",
+    "api.tavily.com": "tavily",
+    "r.jina.ai": "jina",
+    "query1.finance.yahoo.com": "yahoo",
+    "query2.finance.yahoo.com": "yahoo",
+}
+
+# Espera máxima en cola (segundos) antes de rendirse, contando los Retry-After
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "60"))
+
+# Reintentos tras un 429 del backend
+RATE_LIMIT_MAX_RETRIES = 3
+
+# Prioridades: las peticiones de turnos interactivos pasan antes que las de batch
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+_priority = contextvars.ContextVar("rate_limit_priority", default=PRIORITY_INTERACTIVE)
+
+
+class RateLimitTimeout(requests.exceptions.RequestException):
+    """
+    No se ha conseguido turno para el backend dentro de la espera máxima
+    """
+
+
+class TokenBucket:
+    """
+    Token bucket con cola de espera ordenada por prioridad (y por llegada).
+
+    Args:
+        rate (float): Tokens que se recuperan por segundo
+        burst (int): Tokens máximos acumulados
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        # Tras un 429 con Retry-After no se envía nada hasta este instante
+        self._blocked_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """
+        Espera un turno para hacer una petición.
+
+        Args:
+            priority (int): Menor valor = antes
+            timeout (float, optional): Espera máxima en segundos
+
+        Returns:
+            float: Segundos esperados
+
+        Raises:
+            RateLimitTimeout: Si no hay turno antes del timeout
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        entry = (priority, next(self._sequence))
+
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    ready_at = max(self._blocked_until, now)
+                    if self._tokens < 1:
+                        ready_at = max(ready_at, now + (1 - self._tokens) / self.rate)
+
+                    # Solo avanza el primero de la cola, así se respetan las prioridades
+                    is_next = self._waiters[0] == entry
+                    if is_next and ready_at <= now:
+                        self._tokens -= 1
+                        return now - start
+
+                    if deadline is not None and (ready_at > deadline or now >= deadline):
+                        raise RateLimitTimeout(
+                            f"Límite de peticiones: sin turno en {timeout:.0f}s"
+                        )
+
+                    if is_next:
+                        self._condition.wait(max(ready_at - now, 0.005))
+                    else:
+                        # Se despierta cuando el primero de la cola sale
+                        self._condition.wait(None if deadline is None else deadline - now)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def penalize(self, seconds):
+        """
+        Bloquea el bucket tras un 429 (Retry-After) y descarta la ráfaga acumulada
+        """
+        with self._condition:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            # Al acabar el bloqueo se reanuda con un único token, sin ráfaga
+            self._tokens = min(self._tokens, 1.0)
+            self._updated = self._blocked_until
+            self._condition.notify_all()
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def backend_for_host(host):
+    """
+    Devuelve el backend con límite asociado a un host, o None
+    """
+    backend = HOST_BACKENDS.get(host)
+    return backend if backend in RATE_LIMITS else None
+
+
+def get_bucket(backend, credential=None):
+    """
+    Devuelve el bucket de un backend y una credencial (se crea al primer uso)
+    """
+    key = (backend, credential or "")
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            rate, burst = RATE_LIMITS[backend]
+            bucket = _buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+
+def current_priority():
+    return _priority.get()
+
+
+@contextmanager
+def priority(level):
+    """
+    Cambia la prioridad de las peticiones hechas dentro del bloque (y de sus tools)
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_retry_after(response):
+    """
+    Devuelve los segundos que pide esperar un 429/503, o None si no lo indica.
+
+    Entiende la cabecera Retry-After (segundos o fecha HTTP) y el campo
+    "parameters.retry_after" que usa Telegram en el cuerpo.
+    """
+    value = response.headers.get("Retry-After")
+    if value:
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            pass
+
+    if "json" in response.headers.get("Content-Type", ""):
+        try:
+            retry_after = (response.json().get("parameters") or {}).get("retry_after")
+        except ValueError:
+            retry_after = None
+        if isinstance(retry_after, (int, float)):
+            return float(retry_after)
+
+    return None
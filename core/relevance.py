@@ -0,0 +1,240 @@
+import re
+import math
+import unicodedata
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+# Parámetros de BM25 (saturación de la frecuencia y normalización por longitud)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Tamaño máximo (caracteres) de un trozo: las secciones más largas se parten por párrafos
+SECTION_MAX_CHARS = 2500
+
+# Máximo de secciones omitidas que se listan en el índice
+OMITTED_OUTLINE_LINES = 25
+
+# Palabras demasiado comunes para distinguir secciones (español e inglés)
+STOPWORDS = set("""
+a al algo algun alguna algunas alguno algunos ante antes como con contra cual cuales cuando de del
+desde donde dos el ella ellas ellos en entre era es esa esas ese eso esos esta estas este esto estos
+fue ha han hay la las le les lo los mas me mi muy nada ni no nos o os otra otro para pero poco por
+porque que quien se ser si sin sobre son su sus tambien te tiene todo tu un una uno unos y ya yo
+about an and are as at be but by can do does for from has have how i if in into is it its me my not
+of on or our so that the their then there these they this to was we what when where which who why
+will with you your
+""".split())
+
+# Pregunta del turno en curso (las tools la usan como consulta por defecto)
+_current_question = contextvars.ContextVar("current_question", default="")
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+
+
+@contextmanager
+def question(text):
+    """
+    Fija la pregunta del usuario para las tools que se ejecuten dentro del bloque
+    """
+    token = _current_question.set(text or "")
+    try:
+        yield
+    finally:
+        _current_question.reset(token)
+
+
+def current_question():
+    return _current_question.get()
+
+
+def tokenize(text):
+    """
+    Divide un texto en términos: minúsculas, sin acentos y sin palabras vacías
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [word for word in re.findall(r"\w+", text) if len(word) > 1 and word not in STOPWORDS]
+
+
+def bm25_scores(query, documents):
+    """
+    Puntúa cada documento contra la consulta con BM25.
+
+    Args:
+        query (str): Consulta
+        documents (list): Textos a puntuar (el propio conjunto sirve de corpus para el IDF)
+
+    Returns:
+        list: Una puntuación por documento (0 si no comparte ningún término)
+    """
+    terms = set(tokenize(query))
+    if not terms or not documents:
+        return [0.0] * len(documents)
+
+    counts = [Counter(tokenize(document)) for document in documents]
+    lengths = [sum(count.values()) for count in counts]
+    average = (sum(lengths) / len(lengths)) or 1
+
+    scores = []
+    for count, length in zip(counts, lengths):
+        score = 0.0
+        for term in terms:
+            frequency = count.get(term)
+            if not frequency:
+                continue
+            containing = sum(1 for other in counts if term in other)
+            idf = math.log(1 + (len(counts) - containing + 0.5) / (containing + 0.5))
+            score += idf * frequency * (BM25_K1 + 1) / (
+                frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average))
+        scores.append(score)
+    return scores
+
+
+def split_sections(markdown, max_chars=None):
+    """
+    Divide un markdown en secciones por sus encabezados.
+
+    Las secciones de más de max_chars se parten por párrafos; cada trozo
+    conserva el encabezado de su sección.
+
+    Returns:
+        list: Secciones ({"heading", "text"}) en el orden del documento
+    """
+    max_chars = max_chars or SECTION_MAX_CHARS
+    sections = []
+    heading = ""
+    lines = []
+    in_code = False
+
+    def close():
+        text = "\n".join(lines).strip()
+        if text:
+            sections.extend({"heading": heading, "text": part} for part in _split_long(text, max_chars))
+
+    for line in markdown.splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else _HEADING.match(line)
+        if match:
+            close()
+            heading = match.group(2).strip()
+            lines = [line]
+        else:
+            lines.append(line)
+    close()
+
+    return sections
+
+
+def _split_long(text, max_chars):
+    if len(text) <= max_chars:
+        return [text]
+
+    parts = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        # Un párrafo gigante (sin líneas en blanco) se corta a tamaño fijo
+        while len(paragraph) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        parts.append(current)
+    return parts
+
+
+def select_relevant(markdown, query, max_chars, preamble_chars=0):
+    """
+    Reduce un markdown a max_chars quedándose con las secciones más relevantes.
+
+    Si el texto cabe entero se devuelve tal cual. Si no, se puntúan las
+    secciones contra la consulta (BM25) y se añaden de mayor a menor
+    puntuación mientras quepan; sin consulta (o sin coincidencias) se toman
+    en orden desde el principio. Las elegidas se muestran en el orden
+    original y al final se añade un índice de las omitidas.
+
+    Args:
+        markdown (str): Texto completo
+        query (str): Consulta (pregunta del usuario o lo que busca el modelo)
+        max_chars (int): Caracteres máximos del resultado
+        preamble_chars (int): Caracteres del principio que se conservan siempre (cabecera)
+
+    Returns:
+        str: Texto reducido
+    """
+    if len(markdown) <= max_chars:
+        return markdown
+
+    preamble, body = markdown[:preamble_chars], markdown[preamble_chars:]
+    sections = split_sections(body)
+    scores = bm25_scores(query, [f"{s['heading']}\n{s['text']}" for s in sections])
+
+    if any(scores):
+        # La primera sección (entradilla) desempata a favor del principio
+        order = sorted(range(len(sections)), key=lambda i: (-scores[i], i))
+    else:
+        order = list(range(len(sections)))
+
+    # Se reserva sitio para el índice de lo omitido
+    budget = max_chars - len(preamble) - min(OMITTED_OUTLINE_LINES * 60, max(max_chars // 10, 80))
+    chosen = set()
+    for i in order:
+        # Cuenta también el posible "[...]" y el encabezado que se antepone a un trozo
+        size = len(sections[i]["text"]) + len(sections[i]["heading"]) + 12
+        if size <= budget:
+            chosen.add(i)
+            budget -= size
+        elif not chosen and budget > 0:
+            # Ni la mejor sección cabe: se recorta
+            cut = budget - len(sections[i]["heading"]) - 12
+            sections[i] = dict(sections[i], text=sections[i]["text"][:max(cut, 0)])
+            chosen.add(i)
+            budget = 0
+
+    parts = [preamble.rstrip()] if preamble.strip() else []
+    previous = -1
+    for i in sorted(chosen):
+        text = sections[i]["text"]
+        # Trozo de una sección larga sin su encabezado: se indica de dónde viene
+        if sections[i]["heading"] and not _HEADING.match(text.split("\n", 1)[0]) and previous != i - 1:
+            text = f"[{sections[i]['heading']}]\n{text}"
+        if previous != i - 1:
+            parts.append("[...]")
+        parts.append(text)
+        previous = i
+    if previous != len(sections) - 1:
+        parts.append("[...]")
+
+    # Índice de lo omitido: los trozos seguidos de una misma sección van en una línea
+    outline = []
+    for i in range(len(sections)):
+        if i in chosen:
+            continue
+        label = (sections[i]["heading"] or sections[i]["text"].replace("\n", " "))[:60]
+        if outline and outline[-1][0] == label and i - 1 not in chosen:
+            outline[-1][1] += len(sections[i]["text"])
+        else:
+            outline.append([label, len(sections[i]["text"])])
+    if outline:
+        # Se listan las que quepan sin pasar de max_chars
+        title = "[Secciones omitidas por tamaño:]"
+        room = max_chars - len("\n\n".join(parts)) - len(title) - 40
+        lines = []
+        for label, size in outline[:OMITTED_OUTLINE_LINES]:
+            line = f"- {label} ({size} caracteres)"
+            if len(line) + 1 > room:
+                break
+            lines.append(line)
+            room -= len(line) + 1
+        if len(lines) < len(outline):
+            lines.append(f"- ... y {len(outline) - len(lines)} más")
+        parts.append(title + "\n" + "\n".join(lines))
+
+    return "\n\n".join(parts)
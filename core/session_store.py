@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# Base de datos SQLite donde se guardan las sesiones
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+
+# Si el log de una sesión tiene más de este múltiplo de mensajes respecto a su
+# historial (ya compactado) en memoria, se reescribe con el historial actual
+SESSION_COMPACT_RATIO = 2
+
+# Mínimo de mensajes en el log antes de plantearse compactarlo
+SESSION_COMPACT_MIN_MESSAGES = 200
+
+# Respuesta que se guarda para las tool_calls que se quedaron sin ella (proceso cortado)
+INTERRUPTED_TOOL_RESULT = "Error: interrumpido (el proceso se detuvo antes de que terminara la tool)"
+
+
+def _missing_tool_replies(messages):
+    """
+    Respuestas de relleno para las tool_calls del último mensaje del asistente
+    que no tienen la suya (Ctrl-C o caída mientras se ejecutaban las tools).
+
+    Sin ellas el proveedor rechaza con un 400 cualquier turno posterior.
+    """
+    answered = set()
+    for message in reversed(messages):
+        if message.get("role") == "tool":
+            answered.add(message.get("tool_call_id"))
+            continue
+        if message.get("role") != "assistant" or not message.get("tool_calls"):
+            return []
+        return [
+            {"role": "tool", "tool_call_id": tool_call["id"], "content": INTERRUPTED_TOOL_RESULT}
+            for tool_call in message["tool_calls"]
+            if tool_call.get("id") not in answered
+        ]
+    return []
+
+
+class SessionStore:
+    """
+    Almacén persistente de sesiones: un log append-only de mensajes en SQLite (modo WAL).
+
+    Cada mensaje se escribe una sola vez al añadirse al historial; nunca se
+    reescribe el historial entero salvo al compactar. La clave primaria
+    (session_id, seq) hace que reanudar una sesión larga sea una lectura indexada.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or SESSION_DB_PATH
+        self._lock = threading.Lock()
+        self._counts = {}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # En WAL, NORMAL solo puede perder las últimas escrituras ante un corte de luz
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID;
+        """)
+
+    def _touch(self, session_id, now):
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, created_at, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (session_id, now, now)
+        )
+
+    def _next_seq(self, session_id):
+        row = self._conn.execute(
+            "SELECT MAX(seq) FROM messages WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return (row[0] or 0) + 1
+
+    def append(self, session_id, *messages):
+        """
+        Añade mensajes al final del log de una sesión (en una sola transacción).
+
+        Args:
+            session_id (str): Identificador de la sesión
+            *messages (dict): Mensajes a guardar
+        """
+        if not messages:
+            return
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._next_seq(session_id)
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, seq, data) VALUES (?, ?, ?)",
+                    [
+                        (session_id, seq + i, json.dumps(message, ensure_ascii=False))
+                        for i, message in enumerate(messages)
+                    ]
+                )
+                self._touch(session_id, time.time())
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._counts[session_id] = seq - 1 + len(messages)
+
+    def load(self, session_id):
+        """
+        Carga los mensajes de una sesión en orden.
+
+        Si la sesión se cortó mientras se ejecutaban tools, se añaden (y se
+        guardan) respuestas de error para las tool_calls que quedaron sin ella.
+
+        Returns:
+            list | None: Mensajes guardados, o None si la sesión no existe
+        """
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if not exists:
+                return None
+
+            rows = self._conn.execute(
+                "SELECT data FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+
+            self._counts[session_id] = len(rows)
+
+        messages = [json.loads(data) for (data,) in rows]
+        repairs = _missing_tool_replies(messages)
+        if repairs:
+            self.append(session_id, *repairs)
+            messages.extend(repairs)
+        return messages
+
+    def create(self, session_id):
+        """
+        Registra una sesión nueva (sin mensajes)
+        """
+        with self._lock:
+            self._touch(session_id, time.time())
+            self._counts[session_id] = 0
+
+    def list_sessions(self):
+        """
+        Devuelve las sesiones guardadas, de la más reciente a la más antigua.
+
+        Returns:
+            list: Tuplas (session_id, updated_at, número de mensajes)
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT s.session_id, s.updated_at, "
+                "(SELECT COUNT(*) FROM messages m WHERE m.session_id = s.session_id) "
+                "FROM sessions s ORDER BY s.updated_at DESC"
+            ).fetchall()
+
+    def delete(self, session_id):
+        """
+        Elimina una sesión y todos sus mensajes
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.execute("COMMIT")
+            self._counts.pop(session_id, None)
+
+    def compact(self, session_id, messages):
+        """
+        Sustituye el log de una sesión por su historial actual (ya compactado).
+
+        Args:
+            session_id (str): Identificador de la sesión
+            messages (list): Mensajes que quedan en la sesión
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, seq, data) VALUES (?, ?, ?)",
+                    [
+                        (session_id, i, json.dumps(message, ensure_ascii=False))
+                        for i, message in enumerate(messages, 1)
+                    ]
+                )
+                self._touch(session_id, time.time())
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._counts[session_id] = len(messages)
+
+            # Devuelve al fichero principal las páginas del WAL ya consolidadas
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def maybe_compact(self, session_id, messages):
+        """
+        Compacta el log si ha crecido mucho más que el historial en memoria.
+
+        Returns:
+            bool: True si se ha compactado
+        """
+        logged = self._counts.get(session_id, 0)
+        if logged < SESSION_COMPACT_MIN_MESSAGES or logged <= SESSION_COMPACT_RATIO * len(messages):
+            return False
+
+        self.compact(session_id, messages)
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,201 @@
+import json
+
+
+class SSEParser:
+    """
+    Parser incremental de server-sent events (SSE), línea a línea.
+
+    Sirve tanto para respuestas síncronas (requests) como asíncronas (aiohttp).
+    """
+
+    def __init__(self):
+        self._data_lines = []
+
+    def feed_line(self, raw_line):
+        """
+        Procesa una línea del stream.
+
+        Args:
+            raw_line (bytes | str): Línea recibida (con o sin salto de línea final)
+
+        Returns:
+            str | None: Campo "data" del evento si esta línea lo cierra
+        """
+        line = raw_line.decode("utf-8") if isinstance(raw_line, bytes) else raw_line
+        line = line.rstrip("\r\n")
+
+        # Una línea vacía cierra el evento actual
+        if not line:
+            return self.flush()
+
+        # Comentarios / keep-alive (OpenRouter envía ": OPENROUTER PROCESSING")
+        if line.startswith(":"):
+            return None
+
+        if line.startswith("data:"):
+            self._data_lines.append(line[5:].lstrip(" "))
+
+        return None
+
+    def flush(self):
+        """
+        Devuelve el evento pendiente (si lo hay) y vacía el buffer
+        """
+        if not self._data_lines:
+            return None
+
+        data = "\n".join(self._data_lines)
+        self._data_lines = []
+        return data
+
+
+class ChatStreamAccumulator:
+    """
+    Reconstruye el mensaje del asistente a partir de los eventos de chat/completions.
+
+    Args:
+        on_token (callable, optional): Se llama con cada fragmento de texto según llega
+        on_tool_call (callable, optional): Se llama con cada tool_call en cuanto
+            sus argumentos están completos (al empezar la siguiente o al terminar)
+        on_usage (callable, optional): Se llama con el campo "usage" si el stream lo incluye
+    """
+
+    def __init__(self, on_token=None, on_tool_call=None, on_usage=None):
+        self.on_token = on_token
+        self.on_tool_call = on_tool_call
+        self.on_usage = on_usage
+        self.content_parts = []
+        self.tool_calls = {}
+        self._notified = set()
+
+    def _notify_until(self, index):
+        # Avisa de las tool_calls anteriores a index que todavía no se han lanzado
+        for i in sorted(self.tool_calls):
+            if i < index and i not in self._notified:
+                self._notified.add(i)
+                if self.on_tool_call:
+                    self.on_tool_call(self.tool_calls[i])
+
+    def feed(self, data):
+        """
+        Procesa el campo "data" de un evento.
+
+        Args:
+            data (str): Contenido del evento (JSON o "[DONE]")
+
+        Returns:
+            bool: True si el stream ha terminado
+        """
+        if data == "[DONE]":
+            return True
+
+        chunk = json.loads(data)
+
+        if chunk.get("error"):
+            error = chunk["error"]
+            raise RuntimeError(f"Error en el streaming: {error.get('message', error)}")
+
+        # OpenRouter envía el uso de tokens en el último fragmento
+        if chunk.get("usage") and self.on_usage:
+            self.on_usage(chunk["usage"])
+
+        if not chunk.get("choices"):
+            return False
+
+        delta = chunk["choices"][0].get("delta") or {}
+
+        if delta.get("content"):
+            self.content_parts.append(delta["content"])
+            if self.on_token:
+                self.on_token(delta["content"])
+
+        for fragment in delta.get("tool_calls") or []:
+            index = fragment.get("index", len(self.tool_calls))
+
+            # Empieza una tool_call nueva: las anteriores ya están completas
+            if index not in self.tool_calls:
+                self._notify_until(index)
+                self.tool_calls[index] = {
+                    "id": "",
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""}
+                }
+
+            tool_call = self.tool_calls[index]
+            if fragment.get("id"):
+                tool_call["id"] = fragment["id"]
+            if fragment.get("type"):
+                tool_call["type"] = fragment["type"]
+
+            function = fragment.get("function") or {}
+            if function.get("name"):
+                tool_call["function"]["name"] += function["name"]
+            if function.get("arguments"):
+                tool_call["function"]["arguments"] += function["arguments"]
+
+        return False
+
+    def finish(self):
+        """
+        Cierra el stream y devuelve el mensaje completo.
+
+        Returns:
+            dict: Mensaje del asistente equivalente al de una respuesta sin streaming
+        """
+        # Al terminar el stream todas las tool_calls pendientes están completas
+        self._notify_until(float("inf"))
+
+        message = {
+            "role": "assistant",
+            "content": "".join(self.content_parts)
+        }
+
+        if self.tool_calls:
+            message["tool_calls"] = [self.tool_calls[i] for i in sorted(self.tool_calls)]
+
+        return message
+
+
+def iter_sse_events(response):
+    """
+    Recorre los eventos server-sent events (SSE) de una respuesta HTTP en streaming.
+
+    Args:
+        response: Respuesta de requests abierta con stream=True
+
+    Yields:
+        str: Campo "data" de cada evento (las líneas data: consecutivas se unen con \\n)
+    """
+    parser = SSEParser()
+
+    for raw_line in response.iter_lines():
+        data = parser.feed_line(raw_line)
+        if data is not None:
+            yield data
+
+    data = parser.flush()
+    if data is not None:
+        yield data
+
+
+def stream_chat_completion(response, on_token=None, on_tool_call=None, on_usage=None):
+    """
+    Consume una respuesta de chat/completions con stream=True y reconstruye el mensaje.
+
+    Args:
+        response: Respuesta de requests abierta con stream=True
+        on_token (callable, optional): Se llama con cada fragmento de texto según llega
+        on_tool_call (callable, optional): Se llama con cada tool_call en cuanto
+            sus argumentos están completos (al empezar la siguiente o al terminar)
+        on_usage (callable, optional): Se llama con el campo "usage" si el stream lo incluye
+
+    Returns:
+        dict: Mensaje del asistente equivalente al de una respuesta sin streaming
+    """
+    accumulator = ChatStreamAccumulator(on_token, on_tool_call, on_usage)
+
+    for data in iter_sse_events(response):
+        if accumulator.feed(data):
+            break
+
+    return accumulator.finish()
@@ -0,0 +1,172 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core import tracing
+
+# Número máximo de tools ejecutándose a la vez dentro de un mismo turno
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+
+# Límite de concurrencia por tool (las que no aparecen no tienen límite propio)
+TOOL_CONCURRENCY_LIMITS = {
+    # pygame.mixer es un estado global del proceso: siempre serializado
+    "control_audio": 1,
+    # execute_python redirige sys.stdout/sys.stderr de todo el proceso
+    "execute_python": 1,
+}
+
+_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+
+def _get_semaphore(function_name):
+    """
+    Devuelve el semáforo asociado a una tool, o None si no tiene límite
+    """
+    limit = TOOL_CONCURRENCY_LIMITS.get(function_name)
+    if not limit:
+        return None
+
+    with _semaphores_lock:
+        if function_name not in _semaphores:
+            _semaphores[function_name] = threading.BoundedSemaphore(limit)
+        return _semaphores[function_name]
+
+
+def run_limited(run_tool, function_name, arguments):
+    """
+    Ejecuta una tool respetando su límite de concurrencia.
+
+    Args:
+        run_tool (callable): Función (function_name, arguments) -> str que ejecuta una tool
+        function_name (str): Nombre de la tool
+        arguments (dict): Argumentos ya parseados
+
+    Returns:
+        str: Resultado de la tool
+    """
+    semaphore = _get_semaphore(function_name)
+    if semaphore is None:
+        return run_tool(function_name, arguments)
+
+    with semaphore:
+        return run_tool(function_name, arguments)
+
+
+def tool_error(function_name, error):
+    """
+    Convierte una excepción de una tool en el texto que recibe el modelo
+    """
+    # call_tool lanza TypeError cuando el modelo omite un argumento obligatorio
+    if isinstance(error, TypeError):
+        return f"Error: argumentos inválidos para {function_name}: {str(error)}"
+    return f"Error al ejecutar {function_name}: {type(error).__name__}: {str(error)}"
+
+
+def run_safely(run_tool, function_name, arguments):
+    """
+    Igual que run_limited, pero los errores de la tool se devuelven como texto
+    """
+    try:
+        return run_limited(run_tool, function_name, arguments)
+    except Exception as e:
+        return tool_error(function_name, e)
+
+
+class ToolCallBatch:
+    """
+    Grupo de tool_calls de un mismo mensaje que se lanzan a medida que llegan.
+
+    Permite empezar a ejecutar una tool mientras el modelo todavía está
+    generando las siguientes (modo streaming). Los resultados se devuelven
+    siempre en el orden en que se enviaron.
+    """
+
+    def __init__(self, run_tool, max_workers=None):
+        self.run_tool = run_tool
+        self.max_workers = max_workers or TOOL_MAX_WORKERS
+        self._pool = None
+        self._pending = []
+
+    def submit(self, tool_call):
+        """
+        Lanza una tool_call cuyos argumentos ya están completos.
+
+        Nunca lanza excepción: si la tool_call no se puede ejecutar (JSON
+        inválido, argumentos que faltan, error de la tool) su resultado es un
+        mensaje de error, para que cada tool_call tenga siempre su respuesta.
+
+        Args:
+            tool_call (dict): tool_call tal como la devuelve el modelo
+        """
+        function_name = tool_call["function"]["name"]
+        try:
+            arguments = json.loads(tool_call["function"]["arguments"] or "{}")
+        except json.JSONDecodeError as e:
+            self._pending.append((tool_call, f"Error: argumentos JSON inválidos para {function_name}: {e}", False))
+            return
+
+        # Sin paralelismo se ejecuta directamente en el hilo actual
+        if self.max_workers <= 1:
+            result = run_safely(self.run_tool, function_name, arguments)
+            self._pending.append((tool_call, result, False))
+            return
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        # La tool hereda la traza del turno aunque se ejecute en otro hilo
+        future = self._pool.submit(tracing.run_in_context(run_safely, self.run_tool, function_name, arguments))
+        self._pending.append((tool_call, future, True))
+
+    def collect(self):
+        """
+        Espera a que terminen todas las tools lanzadas.
+
+        Returns:
+            list: Mensajes con role "tool", en el orden de envío (uno por tool_call)
+        """
+        try:
+            messages = []
+            for tool_call, value, is_future in self._pending:
+                if is_future:
+                    try:
+                        value = value.result()
+                    except Exception as e:
+                        value = tool_error(tool_call["function"]["name"], e)
+                messages.append({"role": "tool", "tool_call_id": tool_call["id"], "content": value})
+            return messages
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Libera el pool de hilos (las tools que sigan en marcha terminan solas)
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        self._pending = []
+
+
+def execute_tool_calls(tool_calls, run_tool, max_workers=None):
+    """
+    Ejecuta de forma concurrente las tool_calls de un mismo mensaje del asistente.
+
+    Args:
+        tool_calls (list): Lista de tool_calls tal como las devuelve el modelo
+        run_tool (callable): Función (function_name, arguments) -> str que ejecuta una tool
+        max_workers (int, optional): Máximo de tools simultáneas (por defecto TOOL_MAX_WORKERS)
+
+    Returns:
+        list: Mensajes con role "tool", en el mismo orden que tool_calls
+    """
+    # Con una sola tool no merece la pena crear un pool
+    if len(tool_calls) == 1:
+        max_workers = 1
+
+    batch = ToolCallBatch(run_tool, max_workers=max_workers)
+    for tool_call in tool_calls:
+        batch.submit(tool_call)
+    return batch.collect()
@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Fichero JSONL donde se escribe un span por línea (vacío = no se escriben)
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+# Volcado de métricas en formato texto de Prometheus (al salir del agente)
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+
+# Puerto para servir /metrics en modo interactivo (vacío = desactivado)
+METRICS_PORT = os.getenv("METRICS_PORT", "")
+
+# Límites de los buckets del histograma de duración (segundos)
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Atributos numéricos que se acumulan como contadores en las métricas
+COUNTER_ATTRIBUTES = ("bytes_in", "bytes_out", "result_size",
+                      "prompt_tokens", "completion_tokens", "cached_tokens")
+
+# Traza (turno) y span activos en el contexto actual
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+_write_lock = threading.Lock()
+_trace_file = None
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+# Funciones que aportan líneas extra a las métricas (ej: cachés)
+_collectors = []
+
+
+class Span:
+    """
+    Operación medida (turno, petición al modelo, tool, petición HTTP)
+    """
+
+    def __init__(self, kind, name, attributes):
+        self.kind = kind
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = _current_span.get()
+        self.trace_id = _current_trace.get() or self.span_id
+        self.attributes = dict(attributes)
+        self.error = None
+        self.start = time.time()
+        self.duration = None
+
+    def set(self, **attributes):
+        """
+        Añade o actualiza atributos del span
+        """
+        self.attributes.update(attributes)
+
+    def add(self, **amounts):
+        """
+        Suma cantidades a atributos numéricos (ej: tokens, bytes)
+        """
+        for key, value in amounts.items():
+            self.attributes[key] = self.attributes.get(key, 0) + (value or 0)
+
+    def set_usage(self, usage):
+        """
+        Guarda los tokens del campo "usage" de una respuesta del modelo
+        """
+        usage = usage or {}
+        details = usage.get("prompt_tokens_details") or {}
+        self.set(
+            prompt_tokens=usage.get("prompt_tokens") or 0,
+            completion_tokens=usage.get("completion_tokens") or 0,
+            cached_tokens=details.get("cached_tokens") or 0
+        )
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "error": self.error,
+            **self.attributes
+        }
+
+
+@contextmanager
+def span(kind, name, **attributes):
+    """
+    Mide una operación y la registra como span (JSONL) y en las métricas.
+
+    Un span de tipo "turn" abre una traza nueva; el resto cuelga de la traza y
+    del span activos en el contexto.
+
+    Args:
+        kind (str): Tipo de operación ("turn", "llm", "tool", "http")
+        name (str): Nombre concreto (tool, modelo, host...)
+        **attributes: Atributos iniciales del span
+
+    Yields:
+        Span: El span, para añadir atributos mientras dura la operación
+    """
+    current = Span(kind, name, attributes)
+    if kind == "turn":
+        current.trace_id = current.span_id
+
+    trace_token = _current_trace.set(current.trace_id)
+    span_token = _current_span.set(current.span_id)
+    started = time.perf_counter()
+
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        _finish(current)
+
+
+def _finish(current):
+    _record_metrics(current)
+
+    if not TRACE_FILE:
+        return
+
+    global _trace_file
+    line = json.dumps(current.to_dict(), ensure_ascii=False, default=str)
+    with _write_lock:
+        if _trace_file is None:
+            directory = os.path.dirname(TRACE_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _trace_file = open(TRACE_FILE, "a", encoding="utf-8", buffering=1)
+        _trace_file.write(line + "\n")
+
+
+def _record_metrics(current):
+    key = (current.kind, current.name)
+    with _metrics_lock:
+        metric = _metrics.get(key)
+        if metric is None:
+            metric = _metrics[key] = {
+                "count": 0,
+                "errors": 0,
+                "duration_sum": 0.0,
+                "buckets": [0] * len(DURATION_BUCKETS),
+                "counters": {}
+            }
+
+        metric["count"] += 1
+        metric["duration_sum"] += current.duration
+        if current.error:
+            metric["errors"] += 1
+
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if current.duration <= bound:
+                metric["buckets"][i] += 1
+
+        for attribute in COUNTER_ATTRIBUTES:
+            value = current.attributes.get(attribute)
+            if isinstance(value, (int, float)):
+                metric["counters"][attribute] = metric["counters"].get(attribute, 0) + value
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus():
+    """
+    Devuelve las métricas agregadas en formato texto de Prometheus
+    """
+    with _metrics_lock:
+        snapshot = json.loads(json.dumps({f"{k}\x00{n}": v for (k, n), v in _metrics.items()}))
+
+    lines = [
+        "# HELP agent_spans_total Operaciones completadas por tipo y nombre",
+        "# TYPE agent_spans_total counter",
+    ]
+    rows = []
+    for key, metric in sorted(snapshot.items()):
+        kind, name = key.split("\x00", 1)
+        rows.append((f'kind="{_escape(kind)}",name="{_escape(name)}"', metric))
+
+    for labels, metric in rows:
+        lines.append(f"agent_spans_total{{{labels}}} {metric['count']}")
+
+    lines += ["# HELP agent_span_errors_total Operaciones que terminaron con error",
+              "# TYPE agent_span_errors_total counter"]
+    for labels, metric in rows:
+        lines.append(f"agent_span_errors_total{{{labels}}} {metric['errors']}")
+
+    lines += ["# HELP agent_span_duration_seconds Duración de las operaciones",
+              "# TYPE agent_span_duration_seconds histogram"]
+    for labels, metric in rows:
+        for bound, count in zip(DURATION_BUCKETS, metric["buckets"]):
+            lines.append(f'agent_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'agent_span_duration_seconds_bucket{{{labels},le="+Inf"}} {metric["count"]}')
+        lines.append(f"agent_span_duration_seconds_sum{{{labels}}} {metric['duration_sum']:.6f}")
+        lines.append(f"agent_span_duration_seconds_count{{{labels}}} {metric['count']}")
+
+    for attribute in COUNTER_ATTRIBUTES:
+        metric_name = f"agent_{attribute}_total"
+        values = [(labels, metric["counters"][attribute]) for labels, metric in rows
+                  if attribute in metric["counters"]]
+        if values:
+            lines.append(f"# TYPE {metric_name} counter")
+            lines += [f"{metric_name}{{{labels}}} {value}" for labels, value in values]
+
+    for collector in _collectors:
+        lines += collector()
+
+    return "\n".join(lines) + "\n"
+
+
+def register_collector(collector):
+    """
+    Añade una función () -> lista de líneas en formato Prometheus a las métricas
+    """
+    _collectors.append(collector)
+
+
+def dump_metrics(path=None):
+    """
+    Escribe las métricas en un fichero (por defecto METRICS_FILE)
+    """
+    path = path or METRICS_FILE
+    if not path:
+        return
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """
+    Sirve GET /metrics en un hilo aparte (para el modo interactivo).
+
+    Returns:
+        ThreadingHTTPServer | None: El servidor, o None si no hay puerto configurado
+    """
+    port = port or METRICS_PORT
+    if not port:
+        return None
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_in_context(function, *args):
+    """
+    Prepara una función para ejecutarse en otro hilo conservando la traza actual
+    """
+    context = contextvars.copy_context()
+    return lambda: context.run(function, *args)
@@ -1,32 +1,28 @@
-import requests
 import os
 import json
+import argparse
 from datetime import datetime
-from tools.buscador_tool import search_internet, TOOL_DEFINITION as BUSCADOR_TOOL
-from tools.scraper_tool import scrape_website, TOOL_DEFINITION as SCRAPER_TOOL
-from tools.telegram_tool import (
-    send_telegram_message,
-    send_telegram_document,
-    send_telegram_photo,
-    send_telegram_audio,
-    TOOL_DEFINITION as TELEGRAM_TOOL,
-    TOOL_DEFINITION_DOCUMENT as TELEGRAM_DOCUMENT_TOOL,
-    TOOL_DEFINITION_PHOTO as TELEGRAM_PHOTO_TOOL,
-    TOOL_DEFINITION_AUDIO as TELEGRAM_AUDIO_TOOL
-)
-from tools.bolsa_tool import get_stock_price, TOOL_DEFINITION as BOLSA_TOOL
-from tools.gmail_tool import send_email, TOOL_DEFINITION as GMAIL_TOOL
-from tools.image_generator_tool import generate_image, TOOL_DEFINITION as IMAGE_TOOL
-from tools.file_tool import read_file, write_file, list_files, TOOL_DEFINITIONS as FILE_TOOLS
-from tools.code_executor_tool import execute_python, TOOL_DEFINITION as CODE_EXECUTOR_TOOL
-from tools.tts_tool import text_to_speech, TOOL_DEFINITION as TTS_TOOL
-from tools.audio_player_tool import control_audio, TOOL_DEFINITION as AUDIO_PLAYER_TOOL
+from tools.registry import get_tool_definitions, describe_tool_call, call_tool
+from core.tool_executor import execute_tool_calls, ToolCallBatch
+from core.llm_client import LLMClient, LLM_MODELS
+from core.history import compact_history
+from core.artifacts import offload_tool_result
+from core.prompt import serialize_tools, build_request_body, record_usage, get_usage_stats
+from core.session_store import SessionStore
+from core import tracing, relevance
+from core.cache import get_cache_stats
 
 # Coloca tu API key aquí o mejor como variable de entorno
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY") or "TU_API_KEY_AQUI"
 
 url = "https://openrouter.ai/api/v1/chat/completions"
 
+# Modelo principal; LLM_MODELS define el pool completo con los de fallback
+MODEL = LLM_MODELS[0]
+
+# Streaming (SSE): muestra la respuesta a medida que se genera
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() not in ("0", "false", "no")
+
 headers = {
     "Authorization": f"Bearer {OPENROUTER_API_KEY}",
     "Content-Type": "application/json",
@@ -35,165 +31,246 @@ headers = {
     "X-Title": "hello-example"
 }
 
-# Obtener la fecha actual para el system prompt
-now = datetime.now()
-fecha_actual = now.strftime("%Y-%m-%d")  # Formato: 2025-01-07
-fecha_legible = now.strftime("%d de %B de %Y")  # Formato: 07 de enero de 2025
+# Cliente del modelo: reintentos con backoff, circuit breaker por modelo,
+# fallback al siguiente del pool y hedging opcional (LLM_HEDGE)
+llm = LLMClient(url, headers)
 
-# Memoria de sesión: historial de mensajes con mensaje de sistema
-conversation_history = [
-    {
-        "role": "system",
-        "content": f"""Eres un asistente de IA útil y conversacional.
+# Definiciones de las tools (solo los schemas; cada tool carga sus
+# dependencias pesadas la primera vez que se ejecuta). Se serializan una
+# sola vez para que el prefijo de cada petición sea idéntico y cacheable
+TOOLS = get_tool_definitions()
+TOOLS_JSON = serialize_tools(TOOLS)
+
+# System prompt fijo: la fecha actual se envía en un mensaje aparte en cada
+# petición (ver core/prompt.py) para no invalidar la caché del proveedor
+SYSTEM_PROMPT = """Eres un asistente de IA útil y conversacional.
 
 INFORMACIÓN IMPORTANTE:
-- Fecha actual: {fecha_actual} ({fecha_legible})
-- Cuando el usuario pida información del "último mes", "última semana", o "reciente", usa esta fecha como referencia.
+- La fecha actual se indica en el mensaje de sistema que sigue a este.
+- Cuando el usuario pida información del "último mes", "última semana", o "reciente", usa esa fecha como referencia.
 - Siempre usa la fecha actual para cálculos de tiempo y búsquedas.
 
 Tienes acceso a múltiples herramientas para ayudar al usuario. Úsalas cuando sea necesario."""
+
+# Memoria de sesión: historial de mensajes con mensaje de sistema
+conversation_history = [
+    {
+        "role": "system",
+        "content": SYSTEM_PROMPT
     }
 ]
 
-def send_message(user_message):
+# Persistencia de la sesión (la activa main(); None = solo en memoria)
+session_store = None
+session_id = None
+
+def resume_session(store, resume_id=None):
     """
-    Envía un mensaje al modelo y mantiene el historial de conversación.
-    Maneja function calling si el modelo necesita usar tools.
+    Activa la persistencia y reanuda una sesión guardada (o crea una nueva).
+
+    Args:
+        store (SessionStore): Almacén de sesiones
+        resume_id (str, optional): Sesión a reanudar; si no existe se crea con ese id
+
+    Returns:
+        int: Número de mensajes recuperados
     """
-    # Agregar el mensaje del usuario al historial
-    conversation_history.append({"role": "user", "content": user_message})
+    global session_store, session_id
 
-    # Loop para manejar múltiples llamadas a tools
-    while True:
-        data = {
-            "model": "x-ai/grok-4.1-fast",
-            "messages": conversation_history,
-            "tools": [
-                BUSCADOR_TOOL,
-                SCRAPER_TOOL,
-                TELEGRAM_TOOL,
-                TELEGRAM_DOCUMENT_TOOL,
-                TELEGRAM_PHOTO_TOOL,
-                TELEGRAM_AUDIO_TOOL,
-                BOLSA_TOOL,
-                GMAIL_TOOL,
-                IMAGE_TOOL,
-                *FILE_TOOLS,  # Expande las 3 tools de archivos
-                CODE_EXECUTOR_TOOL,
-                TTS_TOOL,
-                AUDIO_PLAYER_TOOL
-            ]
-        }
-
-        response = requests.post(url, headers=headers, json=data)
-        result = response.json()
-
-        message = result["choices"][0]["message"]
-
-        # Agregar la respuesta del asistente al historial
-        conversation_history.append(message)
-
-        # Si el modelo quiere usar una tool
-        if message.get("tool_calls"):
-            for tool_call in message["tool_calls"]:
-                function_name = tool_call["function"]["name"]
-                arguments = json.loads(tool_call["function"]["arguments"])
-
-                # Mostrar qué tool se está usando
-                if function_name == "search_internet":
-                    print(f"[Buscador: buscando '{arguments.get('query')}']")
-                    tool_result = search_internet(arguments["query"])
-                elif function_name == "scrape_website":
-                    print(f"[Scraper: leyendo {arguments.get('url')}]")
-                    tool_result = scrape_website(arguments["url"])
-                elif function_name == "send_telegram_message":
-                    print(f"[Telegram: enviando mensaje...]")
-                    tool_result = send_telegram_message(arguments["message"])
-                elif function_name == "send_telegram_document":
-                    print(f"[Telegram: enviando documento {arguments.get('file_path')}...]")
-                    tool_result = send_telegram_document(
-                        arguments["file_path"],
-                        arguments.get("caption")
-                    )
-                elif function_name == "send_telegram_photo":
-                    print(f"[Telegram: enviando imagen {arguments.get('file_path')}...]")
-                    tool_result = send_telegram_photo(
-                        arguments["file_path"],
-                        arguments.get("caption")
-                    )
-                elif function_name == "send_telegram_audio":
-                    print(f"[Telegram: enviando audio {arguments.get('file_path')}...]")
-                    tool_result = send_telegram_audio(
-                        arguments["file_path"],
-                        arguments.get("caption"),
-                        arguments.get("title")
-                    )
-                elif function_name == "get_stock_price":
-                    print(f"[Bolsa: consultando {arguments.get('symbol')}...]")
-                    tool_result = get_stock_price(arguments["symbol"])
-                elif function_name == "send_email":
-                    print(f"[Gmail: enviando email a {arguments.get('to')}...]")
-                    tool_result = send_email(arguments["to"], arguments["subject"], arguments["body"])
-                elif function_name == "generate_image":
-                    print(f"[IA Image: generando '{arguments.get('prompt')[:50]}...']")
-                    tool_result = generate_image(arguments["prompt"])
-                elif function_name == "read_file":
-                    print(f"[File: leyendo {arguments.get('file_path')}]")
-                    tool_result = read_file(arguments["file_path"])
-                elif function_name == "write_file":
-                    print(f"[File: escribiendo {arguments.get('file_path')}]")
-                    tool_result = write_file(arguments["file_path"], arguments["content"])
-                elif function_name == "list_files":
-                    directory = arguments.get("directory", ".")
-                    print(f"[File: listando {directory}]")
-                    tool_result = list_files(directory)
-                elif function_name == "execute_python":
-                    print(f"[Python: ejecutando código...]")
-                    tool_result = execute_python(arguments["code"])
-                elif function_name == "text_to_speech":
-                    voice = arguments.get("voice", "es-ES-AlvaroNeural")
-                    print(f"[TTS: generando audio con voz {voice}...]")
-                    tool_result = text_to_speech(arguments["text"], voice)
-                elif function_name == "control_audio":
-                    action = arguments.get("action")
-                    print(f"[Audio Player: {action}...]")
-                    tool_result = control_audio(
-                        action=action,
-                        file_path=arguments.get("file_path"),
-                        wait=arguments.get("wait", False)
+    session_store = store
+    session_id = resume_id or datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    # El system prompt no se guarda: siempre se usa el de la versión actual
+    messages = store.load(session_id)
+    if messages is None:
+        store.create(session_id)
+        messages = []
+
+    conversation_history[1:] = messages
+    return len(messages)
+
+
+def run_tool(function_name, arguments):
+    """
+    Ejecuta una tool por su nombre con los argumentos que pidió el modelo.
+
+    Args:
+        function_name (str): Nombre de la tool
+        arguments (dict): Argumentos ya parseados desde el JSON del modelo
+
+    Returns:
+        str: Resultado de la tool
+    """
+    # Mostrar qué tool se está usando
+    log_line = describe_tool_call(function_name, arguments)
+    if log_line:
+        print(log_line)
+
+    with tracing.span("tool", function_name) as current:
+        current.set(bytes_in=len(json.dumps(arguments, ensure_ascii=False)))
+        tool_result = call_tool(function_name, arguments)
+
+        # Los resultados grandes se guardan en disco y al modelo solo le llega
+        # un handle con el principio y un índice (puede leer más con read_artifact)
+        result = offload_tool_result(function_name, tool_result)
+        current.set(result_size=len(str(tool_result)), bytes_out=len(result))
+        # Las tools devuelven los errores como texto: se marcan para las métricas
+        if str(tool_result).startswith(("Error", "❌")):
+            current.error = "ToolError"
+        return result
+
+
+def run_turn(history, user_message, on_token=None, store=None, store_session_id=None):
+    """
+    Procesa un mensaje del usuario sobre un historial cualquiera (incluidas las tools).
+
+    Cada historial es una conversación independiente, así que se pueden
+    ejecutar varias a la vez desde hilos distintos (ver batch.py).
+
+    Args:
+        history (list): Historial de la conversación (empieza por el system prompt)
+        user_message (str): Mensaje del usuario
+        on_token (callable, optional): Si se indica, la respuesta se pide en
+            streaming y se llama con cada fragmento de texto según llega
+        store (SessionStore, optional): Almacén donde se guardan los mensajes nuevos
+        store_session_id (str, optional): Sesión del almacén
+
+    Returns:
+        str: Respuesta final del modelo
+    """
+    def add(*messages):
+        history.extend(messages)
+        if store is not None:
+            store.append(store_session_id, *messages)
+
+    # Las tools usan la pregunta como consulta por defecto (ej: secciones de una página)
+    with relevance.question(user_message), tracing.span("turn", "send_message", session_id=store_session_id, stream=on_token is not None) as turn:
+        # Agregar el mensaje del usuario al historial
+        add({"role": "user", "content": user_message})
+
+        # Loop para manejar múltiples llamadas a tools
+        while True:
+            # Mantiene el historial dentro del presupuesto de tokens: resume los
+            # resultados de tools antiguos y pliega los turnos viejos en un resumen
+            compact_history(history)
+            if store is not None:
+                store.maybe_compact(store_session_id, history[1:])
+
+            stream = on_token is not None
+
+            def build_body(model):
+                return build_request_body(model, history, TOOLS_JSON, stream=stream)
+
+            if stream:
+                # En streaming cada tool se lanza en cuanto sus argumentos están
+                # completos, mientras el modelo sigue generando las demás
+                batch = ToolCallBatch(run_tool)
+                try:
+                    message, _ = llm.complete(
+                        build_body,
+                        stream=True,
+                        on_token=on_token,
+                        on_tool_call=batch.submit,
+                        on_usage=record_usage
                     )
+                except BaseException:
+                    batch.close()
+                    raise
+            else:
+                batch = None
+                message, _ = llm.complete(build_body, on_usage=record_usage)
+
+            # Agregar la respuesta del asistente al historial
+            add(message)
+            turn.add(llm_requests=1)
+
+            # Si el modelo quiere usar una tool
+            if message.get("tool_calls"):
+                # Las tool_calls de un mismo mensaje son independientes: se ejecutan
+                # en paralelo y los resultados se agregan en el orden original
+                if batch is not None:
+                    tool_messages = batch.collect()
                 else:
-                    tool_result = "Tool no encontrada"
+                    tool_messages = execute_tool_calls(message["tool_calls"], run_tool)
+                add(*tool_messages)
+                turn.add(tool_calls=len(tool_messages))
 
-                # Agregar el resultado de la tool al historial
-                conversation_history.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call["id"],
-                    "content": tool_result
-                })
+                # Continuar el loop para que el modelo procese el resultado
+                continue
 
-            # Continuar el loop para que el modelo procese el resultado
-            continue
+            # Si no hay tool calls, retornar la respuesta final
+            return message.get("content", "")
+
+
+def send_message(user_message, on_token=None):
+    """
+    Envía un mensaje al modelo y mantiene el historial de conversación.
+    Maneja function calling si el modelo necesita usar tools.
+
+    Args:
+        user_message (str): Mensaje del usuario
+        on_token (callable, optional): Si se indica, la respuesta se pide en
+            streaming y se llama con cada fragmento de texto según llega
+
+    Returns:
+        str: Respuesta final del modelo
+    """
+    return run_turn(conversation_history, user_message, on_token, session_store, session_id)
+
+
+def main():
+    """
+    Bucle principal de conversación interactiva
+    """
+    parser = argparse.ArgumentParser(description="Agente de IA con memoria de sesión")
+    parser.add_argument("--session", help="Sesión a reanudar (o crear con ese nombre)")
+    parser.add_argument("--no-persist", action="store_true", help="No guardar la sesión en disco")
+    args = parser.parse_args()
+
+    print("Agente de IA con memoria de sesión iniciado.")
+
+    if not args.no_persist:
+        restored = resume_session(SessionStore(), args.session)
+        if restored:
+            print(f"Sesión '{session_id}' reanudada ({restored} mensajes).")
+        else:
+            print(f"Sesión '{session_id}' (reanúdala con: python main.py --session {session_id})")
 
-        # Si no hay tool calls, retornar la respuesta final
-        return message.get("content", "")
+    if tracing.start_metrics_server():
+        print(f"Métricas en http://127.0.0.1:{tracing.METRICS_PORT}/metrics")
 
-# Bucle principal de conversación
-print("Agente de IA con memoria de sesión iniciado.")
-print("Escribe 'salir' o 'exit' para terminar.\n")
+    print("Escribe 'salir' o 'exit' para terminar.\n")
 
-while True:
-    user_input = input("Tú: ")
+    while True:
+        user_input = input("Tú: ")
+
+        if user_input.lower() in ["salir", "exit", "quit"]:
+            stats = get_usage_stats()
+            if stats["requests"]:
+                print(f"Caché de prompt: {stats['cache_hit_rate']:.0%} de los tokens de entrada "
+                      f"({stats['cached_tokens']}/{stats['prompt_tokens']}) en {stats['requests']} peticiones")
+            for name, cache_stats in get_cache_stats().items():
+                lookups = cache_stats["hits"] + cache_stats["stale_hits"] + cache_stats["misses"]
+                if lookups:
+                    print(f"Caché '{name}': {cache_stats['hit_rate']:.0%} de aciertos en {lookups} consultas")
+            tracing.dump_metrics()
+            print("¡Hasta luego!")
+            break
+
+        if not user_input.strip():
+            continue
 
-    if user_input.lower() in ["salir", "exit", "quit"]:
-        print("¡Hasta luego!")
-        break
+        try:
+            if STREAM_RESPONSES:
+                print("Asistente: ", end="", flush=True)
+                send_message(user_input, on_token=lambda token: print(token, end="", flush=True))
+                print("\n")
+            else:
+                response = send_message(user_input)
+                print(f"Asistente: {response}\n")
+        except Exception as e:
+            print(f"Error: {e}\n")
 
-    if not user_input.strip():
-        continue
 
-    try:
-        response = send_message(user_input)
-        print(f"Asistente: {response}\n")
-    except Exception as e:
-        print(f"Error: {e}\n")
+if __name__ == "__main__":
+    main()
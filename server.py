@@ -0,0 +1,478 @@
+"""
+Servidor HTTP asyncio del agente: muchas conversaciones independientes en un proceso.
+
+API (JSON):
+    POST   /sessions                       -> {"session_id": "..."}
+    POST   /sessions/{id}/messages         {"message": "...", "stream": false}
+           -> {"response": "..."}  o, con "stream": true, eventos SSE:
+              data: {"type": "token", "content": "..."}
+              data: {"type": "tool", "name": "...", "arguments": {...}}
+              data: {"type": "done", "response": "..."}
+    GET    /sessions/{id}                  -> historial de la sesión
+    DELETE /sessions/{id}
+    GET    /health
+    GET    /metrics                        -> métricas en formato Prometheus
+
+Las llamadas al modelo son asíncronas (aiohttp) y las tools, que son bloqueantes,
+se ejecutan en un pool de hilos acotado.
+
+Las tools incluyen execute_python, write_file o send_email: sin SERVER_API_TOKEN
+el servidor solo escucha en localhost. Con token, todas las rutas salvo /health
+exigen la cabecera "Authorization: Bearer <token>".
+
+Uso:
+    python server.py [--port 8000]
+    SERVER_API_TOKEN=... python server.py --host 0.0.0.0
+"""
+import os
+import hmac
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web, ClientSession, ClientTimeout, ClientError, TCPConnector
+
+from main import url, headers, llm, MODEL, TOOLS_JSON, SYSTEM_PROMPT, run_tool
+from core.llm_client import (
+    LLMError, LLM_DEADLINE, LLM_MAX_ATTEMPTS, RETRYABLE_STATUS, BACKOFF_BASE, BACKOFF_CAP
+)
+from core.tool_executor import run_safely, tool_error
+from core.streaming import SSEParser, ChatStreamAccumulator
+from core.history import compact_history
+from core.prompt import build_request_body, record_usage
+from core.session_store import SessionStore
+from core import tracing, relevance
+
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+
+# Token que deben enviar los clientes; obligatorio para escuchar fuera de localhost
+SERVER_API_TOKEN = os.getenv("SERVER_API_TOKEN", "")
+
+# Hilos para ejecutar tools bloqueantes (compartidos por todas las sesiones)
+SERVER_TOOL_WORKERS = int(os.getenv("SERVER_TOOL_WORKERS", "32"))
+
+# Conexiones simultáneas máximas hacia OpenRouter
+SERVER_LLM_CONNECTIONS = int(os.getenv("SERVER_LLM_CONNECTIONS", "200"))
+
+# Sesiones inactivas más de este tiempo (segundos) se eliminan
+SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "3600"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1000"))
+
+# Guarda las sesiones en disco (SESSION_DB_PATH) para sobrevivir a reinicios
+SERVER_PERSIST_SESSIONS = os.getenv("SERVER_PERSIST_SESSIONS", "true").lower() not in ("0", "false", "no")
+
+
+class Session:
+    """
+    Conversación independiente con su propio historial
+    """
+
+    def __init__(self, session_id, messages=None):
+        self.session_id = session_id
+        self.history = [{"role": "system", "content": SYSTEM_PROMPT}, *(messages or [])]
+        # Los turnos de una misma sesión se procesan de uno en uno
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class AgentServer:
+    """
+    Aloja las sesiones y ejecuta los turnos de conversación
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.tool_pool = ThreadPoolExecutor(max_workers=SERVER_TOOL_WORKERS)
+        self.http = None
+        self.store = SessionStore() if SERVER_PERSIST_SESSIONS else None
+        # SQLite es bloqueante: el log de sesiones se escribe fuera del event loop,
+        # en un único hilo para que las operaciones se apliquen en orden
+        self.store_pool = ThreadPoolExecutor(max_workers=1)
+
+    async def start(self, app):
+        self.http = ClientSession(
+            connector=TCPConnector(limit=SERVER_LLM_CONNECTIONS),
+            timeout=ClientTimeout(sock_connect=10, sock_read=120)
+        )
+        app["cleanup_task"] = asyncio.create_task(self._cleanup_loop())
+
+    async def stop(self, app):
+        app["cleanup_task"].cancel()
+        await self.http.close()
+        self.tool_pool.shutdown(wait=False)
+        self.store_pool.shutdown(wait=True)
+        if self.store is not None:
+            self.store.close()
+
+    async def _cleanup_loop(self):
+        # Elimina periódicamente las sesiones inactivas
+        while True:
+            await asyncio.sleep(60)
+            now = time.monotonic()
+            # (solo se liberan de memoria; si hay persistencia se pueden reanudar)
+            for session_id, session in list(self.sessions.items()):
+                if now - session.last_used > SESSION_IDLE_TTL and not session.lock.locked():
+                    del self.sessions[session_id]
+
+    def create_session(self):
+        if len(self.sessions) >= MAX_SESSIONS:
+            # Se descarta la sesión libre que lleva más tiempo sin usarse
+            idle = [s for s in self.sessions.values() if not s.lock.locked()]
+            if not idle:
+                return None
+            oldest = min(idle, key=lambda s: s.last_used)
+            del self.sessions[oldest.session_id]
+
+        session = Session(uuid.uuid4().hex)
+        self.sessions[session.session_id] = session
+        return session
+
+    async def _persist(self, method, *args):
+        # Ejecuta una operación del SessionStore en su hilo (nada si no hay persistencia)
+        if self.store is None:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(
+            self.store_pool, getattr(self.store, method), *args
+        )
+
+    async def _remember(self, session, *messages):
+        # Agrega mensajes al historial de la sesión y a su log persistente
+        session.history.extend(messages)
+        await self._persist("append", session.session_id, *messages)
+
+    async def _open_stream(self, model, history, deadline_at, current):
+        """
+        Envía la petición a un modelo y espera a su primer evento SSE.
+
+        Los fallos hasta ese momento (conexión, HTTP >= 400, stream vacío,
+        deadline) se devuelven como LLMError para poder reintentar sin haber
+        emitido nada al cliente.
+
+        Returns:
+            tuple: (respuesta abierta, parser SSE, primer evento)
+        """
+        body = build_request_body(model, history, TOOLS_JSON, stream=True)
+        current.set(bytes_out=len(body))
+        response = None
+        try:
+            response = await asyncio.wait_for(
+                self.http.post(url, data=body, headers=headers), deadline_at - time.monotonic()
+            )
+            current.set(status=response.status)
+            if response.status >= 400:
+                detail = await response.text()
+                raise LLMError(
+                    f"Error {response.status} de {model}: {detail[:500]}",
+                    status=response.status,
+                    retryable=response.status in RETRYABLE_STATUS
+                )
+
+            parser = SSEParser()
+            while True:
+                raw_line = await asyncio.wait_for(response.content.readline(), deadline_at - time.monotonic())
+                if not raw_line:
+                    raise LLMError(f"Stream vacío de {model}")
+                current.add(bytes_in=len(raw_line))
+                data = parser.feed_line(raw_line)
+                if data is not None:
+                    return response, parser, data
+
+        except (ClientError, asyncio.TimeoutError) as e:
+            if response is not None:
+                response.release()
+            raise LLMError(f"Sin respuesta de {model}: {type(e).__name__}: {e}") from e
+        except BaseException:
+            if response is not None:
+                response.release()
+            raise
+
+    async def _complete(self, history, on_token, on_tool_call):
+        """
+        Pide una respuesta al modelo en streaming sin bloquear el event loop.
+
+        Usa el pool de modelos y los circuit breakers del cliente de main.py:
+        hasta el primer evento se reintenta con backoff rotando al siguiente
+        modelo disponible, sin pasar de LLM_DEADLINE. Los errores del cliente
+        (4xx no reintentables) se propagan en el acto.
+        """
+        deadline_at = time.monotonic() + LLM_DEADLINE
+
+        with tracing.span("llm", MODEL, stream=True) as current:
+            def track_usage(usage):
+                current.set_usage(usage)
+                record_usage(usage)
+
+            opened = None
+            last_error = None
+            for attempt_number in range(LLM_MAX_ATTEMPTS):
+                if deadline_at - time.monotonic() <= 0:
+                    break
+
+                model, trial = llm.acquire_model(attempt_number)
+                if model is None:
+                    # Todos los modelos con el circuito abierto: se prueba el principal
+                    model = llm.models[0]
+                current.add(attempts=1)
+
+                try:
+                    opened = await self._open_stream(model, history, deadline_at, current)
+                except LLMError as e:
+                    if not e.retryable:
+                        # Un error del cliente no cuenta como resultado de la prueba
+                        if trial:
+                            llm.breakers[model].release_trial()
+                        raise
+                    llm.breakers[model].record_failure()
+                    last_error = e
+                    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt_number))
+                    if deadline_at - time.monotonic() <= delay:
+                        break
+                    await asyncio.sleep(delay)
+                    continue
+                except BaseException:
+                    # Cancelación u otro fallo inesperado: la prueba queda libre
+                    if trial:
+                        llm.breakers[model].release_trial()
+                    raise
+
+                llm.breakers[model].record_success()
+                break
+
+            if opened is None:
+                raise last_error or LLMError("Tiempo agotado esperando respuesta del modelo")
+
+            response, parser, data = opened
+            current.name = model
+            accumulator = ChatStreamAccumulator(on_token, on_tool_call, track_usage)
+            try:
+                if not accumulator.feed(data):
+                    async for raw_line in response.content:
+                        current.add(bytes_in=len(raw_line))
+                        data = parser.feed_line(raw_line)
+                        if data is not None and accumulator.feed(data):
+                            break
+            finally:
+                response.release()
+
+            return accumulator.finish()
+
+    async def run_turn(self, session, user_message, emit):
+        """
+        Procesa un mensaje del usuario en una sesión (incluidas las tools).
+
+        Args:
+            session (Session): Sesión de la conversación
+            user_message (str): Mensaje del usuario
+            emit (callable): Recibe los eventos (dict) que se envían al cliente
+
+        Returns:
+            str: Respuesta final del modelo
+        """
+        loop = asyncio.get_running_loop()
+
+        # Las tools usan la pregunta como consulta por defecto (ej: secciones de una página)
+        with relevance.question(user_message), tracing.span("turn", "run_turn", session_id=session.session_id) as turn:
+            await self._remember(session, {"role": "user", "content": user_message})
+
+            while True:
+                compact_history(session.history)
+                await self._persist("maybe_compact", session.session_id, session.history[1:])
+                pending = []
+
+                def on_tool_call(tool_call):
+                    # Cada tool se lanza en el pool en cuanto sus argumentos están completos
+                    name = tool_call["function"]["name"]
+                    try:
+                        arguments = json.loads(tool_call["function"]["arguments"] or "{}")
+                    except json.JSONDecodeError as e:
+                        # Toda tool_call necesita su respuesta, aunque sea un error
+                        future = loop.create_future()
+                        future.set_result(f"Error: argumentos JSON inválidos para {name}: {e}")
+                        pending.append((tool_call, future))
+                        return
+                    emit({"type": "tool", "name": name, "arguments": arguments})
+                    future = loop.run_in_executor(
+                        self.tool_pool, tracing.run_in_context(run_safely, run_tool, name, arguments)
+                    )
+                    pending.append((tool_call, future))
+
+                message = await self._complete(
+                    session.history,
+                    on_token=lambda token: emit({"type": "token", "content": token}),
+                    on_tool_call=on_tool_call
+                )
+                await self._remember(session, message)
+                turn.add(llm_requests=1)
+
+                if not message.get("tool_calls"):
+                    return message.get("content", "")
+
+                results = await asyncio.gather(*(future for _, future in pending), return_exceptions=True)
+                results = [
+                    tool_error(tool_call["function"]["name"], result) if isinstance(result, BaseException) else result
+                    for (tool_call, _), result in zip(pending, results)
+                ]
+                turn.add(tool_calls=len(results))
+                await self._remember(session, *(
+                    {"role": "tool", "tool_call_id": tool_call["id"], "content": result}
+                    for (tool_call, _), result in zip(pending, results)
+                ))
+
+    # --- Handlers HTTP ---
+
+    async def _get_session(self, request):
+        session_id = request.match_info["session_id"]
+        session = self.sessions.get(session_id)
+
+        # Sesión que no está en memoria (reinicio o inactividad): se reanuda del disco
+        if session is None and self.store is not None:
+            messages = await self._persist("load", session_id)
+            if messages is not None:
+                session = self.sessions.setdefault(session_id, Session(session_id, messages))
+
+        if session is None:
+            raise web.HTTPNotFound(text=json.dumps({"error": "Sesión no encontrada"}),
+                                   content_type="application/json")
+        session.last_used = time.monotonic()
+        return session
+
+    async def handle_health(self, request):
+        return web.json_response({"status": "ok", "sessions": len(self.sessions)})
+
+    async def handle_metrics(self, request):
+        return web.Response(text=tracing.render_prometheus(), content_type="text/plain")
+
+    async def handle_create_session(self, request):
+        session = self.create_session()
+        if session is None:
+            return web.json_response({"error": "Demasiadas sesiones activas"}, status=503)
+        await self._persist("create", session.session_id)
+        return web.json_response({"session_id": session.session_id}, status=201)
+
+    async def handle_get_session(self, request):
+        session = await self._get_session(request)
+        return web.json_response({"session_id": session.session_id, "messages": session.history[1:]})
+
+    async def handle_delete_session(self, request):
+        session = await self._get_session(request)
+        self.sessions.pop(session.session_id, None)
+        await self._persist("delete", session.session_id)
+        return web.json_response({"deleted": session.session_id})
+
+    async def handle_message(self, request):
+        session = await self._get_session(request)
+
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.json_response({"error": "El cuerpo debe ser JSON"}, status=400)
+
+        user_message = payload.get("message")
+        if not isinstance(user_message, str) or not user_message.strip():
+            return web.json_response({"error": "Falta el campo 'message'"}, status=400)
+
+        if not payload.get("stream"):
+            async with session.lock:
+                try:
+                    answer = await self.run_turn(session, user_message, emit=lambda event: None)
+                except Exception as e:
+                    return web.json_response({"error": str(e)}, status=502)
+            return web.json_response({"response": answer})
+
+        # Streaming SSE hacia el cliente: los eventos se encolan desde los
+        # callbacks síncronos y se escriben desde esta corrutina
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache"
+        })
+        await response.prepare(request)
+
+        queue = asyncio.Queue()
+
+        async def produce():
+            async with session.lock:
+                try:
+                    answer = await self.run_turn(session, user_message, emit=queue.put_nowait)
+                    queue.put_nowait({"type": "done", "response": answer})
+                except Exception as e:
+                    queue.put_nowait({"type": "error", "error": str(e)})
+            queue.put_nowait(None)
+
+        task = asyncio.create_task(produce())
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                await response.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+        finally:
+            # Si el cliente se desconecta, el turno termina igualmente en su sesión
+            await asyncio.shield(task)
+
+        await response.write_eof()
+        return response
+
+
+def _auth_middleware(token):
+    expected = f"Bearer {token}".encode("utf-8")
+
+    @web.middleware
+    async def check_token(request, handler):
+        # /health queda abierto para los balanceadores y las sondas
+        if request.path != "/health":
+            supplied = request.headers.get("Authorization", "").encode("utf-8")
+            if not hmac.compare_digest(supplied, expected):
+                return web.json_response({"error": "No autorizado"}, status=401,
+                                         headers={"WWW-Authenticate": "Bearer"})
+        return await handler(request)
+
+    return check_token
+
+
+def _is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+
+def create_app(api_token=None):
+    """
+    Crea la aplicación aiohttp con las rutas del agente
+
+    Args:
+        api_token (str, optional): Token que deben enviar los clientes (por defecto SERVER_API_TOKEN)
+    """
+    server = AgentServer()
+    api_token = SERVER_API_TOKEN if api_token is None else api_token
+    app = web.Application(middlewares=[_auth_middleware(api_token)] if api_token else [])
+    app.on_startup.append(server.start)
+    app.on_cleanup.append(server.stop)
+    app.add_routes([
+        web.get("/health", server.handle_health),
+        web.get("/metrics", server.handle_metrics),
+        web.post("/sessions", server.handle_create_session),
+        web.get("/sessions/{session_id}", server.handle_get_session),
+        web.delete("/sessions/{session_id}", server.handle_delete_session),
+        web.post("/sessions/{session_id}/messages", server.handle_message),
+    ])
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor HTTP multi-sesión del agente")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+
+    if not SERVER_API_TOKEN and not _is_loopback(args.host):
+        parser.error(f"escuchar en {args.host} sin autenticación expondría las tools a la red: "
+                     "define SERVER_API_TOKEN")
+
+    web.run_app(create_app(), host=args.host, port=args.port)
@@ -0,0 +1,80 @@
+from core.artifacts import load_artifact
+
+# Máximo de caracteres que devuelve una lectura
+MAX_READ_CHARS = 8000
+
+def read_artifact(artifact_id, start_line=None, end_line=None, offset=None, length=None):
+    """
+    Lee un fragmento de un artefacto guardado (resultado grande de una tool anterior).
+
+    Args:
+        artifact_id (str): Identificador del artefacto
+        start_line (int, optional): Primera línea a leer (empieza en 1)
+        end_line (int, optional): Última línea a leer (incluida)
+        offset (int, optional): Byte inicial (alternativa a las líneas)
+        length (int, optional): Número de bytes a leer desde offset
+
+    Returns:
+        str: Fragmento solicitado o mensaje de error
+    """
+    data = load_artifact(artifact_id)
+    if data is None:
+        return f"Error: No existe el artefacto '{artifact_id}'"
+
+    try:
+        if offset is not None or length is not None:
+            start = max(int(offset or 0), 0)
+            end = start + int(length or MAX_READ_CHARS)
+            # Un corte en mitad de un carácter UTF-8 se descarta
+            fragment = data[start:end].decode("utf-8", errors="ignore")
+            header = f"Artefacto {artifact_id}, bytes {start}-{min(end, len(data))} de {len(data)}"
+        else:
+            lines = data.decode("utf-8", errors="replace").splitlines()
+            first = max(int(start_line or 1), 1)
+            last = min(int(end_line or len(lines)), len(lines))
+            fragment = "\n".join(lines[first - 1:last])
+            header = f"Artefacto {artifact_id}, líneas {first}-{last} de {len(lines)}"
+
+    except (TypeError, ValueError):
+        return "Error: start_line, end_line, offset y length deben ser números enteros"
+
+    if len(fragment) > MAX_READ_CHARS:
+        fragment = fragment[:MAX_READ_CHARS] + "\n\n[Fragmento truncado: pide un rango más pequeño]"
+
+    return f"{header}\n\n{fragment}"
+
+
+# Definición de la tool para el modelo
+TOOL_DEFINITION = {
+    "type": "function",
+    "function": {
+        "name": "read_artifact",
+        "description": "Lee un fragmento de un artefacto: un resultado grande de una tool anterior (página scrapeada, archivo, salida de código) que se guardó en disco y del que solo se mostró el principio y un índice. Usa el id del artefacto y pide un rango de líneas (start_line/end_line) o de bytes (offset/length). Pide solo la parte que necesites.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "artifact_id": {
+                    "type": "string",
+                    "description": "Identificador del artefacto (ej: '3f9a1c0b7d2e4a61')"
+                },
+                "start_line": {
+                    "type": "integer",
+                    "description": "Primera línea a leer (empieza en 1)"
+                },
+                "end_line": {
+                    "type": "integer",
+                    "description": "Última línea a leer (incluida)"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Byte inicial, como alternativa a start_line/end_line"
+                },
+                "length": {
+                    "type": "integer",
+                    "description": "Número de bytes a leer desde offset (máximo 8000)"
+                }
+            },
+            "required": ["artifact_id"]
+        }
+    }
+}
@@ -1,14 +1,30 @@
 import os
-import pygame
 import time
 
-# Inicializa pygame mixer (solo una vez)
-pygame.mixer.init()
+# pygame se importa e inicializa en el primer uso (ver _get_pygame)
+_pygame = None
 
 # Variable global para controlar el estado de reproducción
 _current_audio_file = None
 _is_playing = False
 
+def _get_pygame():
+    """
+    Importa pygame e inicializa el mixer la primera vez que se usa el reproductor.
+
+    Inicializarlo al importar el módulo ralentiza el arranque del agente y falla
+    en servidores sin tarjeta de sonido aunque nunca se reproduzca nada.
+    """
+    global _pygame
+
+    if _pygame is None:
+        import pygame
+        pygame.mixer.init()
+        _pygame = pygame
+
+    return _pygame
+
+
 def control_audio(action, file_path=None, wait=False):
     """
     Controla la reproducción de audio (MP3, WAV, OGG)
@@ -28,6 +44,13 @@ def control_audio(action, file_path=None, wait=False):
     """
     global _current_audio_file, _is_playing
 
+    try:
+        pygame = _get_pygame()
+    except ImportError:
+        return "Error: pygame no está instalado (pip install pygame)"
+    except Exception as e:
+        return f"Error al inicializar el audio: {str(e)}\n\nVerifica que el sistema tenga un dispositivo de sonido disponible"
+
     try:
         # PLAY - Reproduce un archivo de audio
         if action == "play":
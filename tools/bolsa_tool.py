@@ -1,5 +1,136 @@
+import os
+import time
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from core import http_client, tracing
+from core.cache import TTLCache
+
+# Máximo de símbolos por llamada a get_stock_prices
+MAX_SYMBOLS = 50
+
+# Peticiones a Yahoo en paralelo (el rate limiter de core/rate_limiter.py las sigue espaciando)
+MAX_WORKERS = 8
+
+# Caché de cotizaciones (segundos). Con el mercado abierto una cotización vale
+# QUOTE_OPEN_TTL (Yahoo ya la da con ~15 min de retraso); con el mercado
+# cerrado, hasta la siguiente apertura (como mucho QUOTE_CLOSED_MAX_TTL).
+# Las criptomonedas cotizan 24/7 y usan siempre QUOTE_CRYPTO_TTL
+QUOTE_OPEN_TTL = float(os.getenv("QUOTE_OPEN_TTL", "60"))
+QUOTE_CRYPTO_TTL = float(os.getenv("QUOTE_CRYPTO_TTL", "30"))
+QUOTE_CLOSED_MAX_TTL = 4 * 86400
+
+# Nombre, moneda y tipo de activo apenas cambian: se guardan una semana
+QUOTE_META_TTL = 7 * 86400
+
+quote_cache = TTLCache("quotes", QUOTE_OPEN_TTL, max_entries=512)
+quote_meta_cache = TTLCache("quote_meta", QUOTE_META_TTL, max_entries=512)
+
+SYMBOL_EXAMPLES = "Ejemplos:\n- Acciones: AAPL, MSFT, GOOGL, TSLA\n- Crypto: BTC-USD, ETH-USD\n- Índices: ^GSPC (S&P 500), ^DJI (Dow Jones)"
+
+
+class SymbolNotFound(Exception):
+    """
+    Yahoo Finance no tiene datos para el símbolo
+    """
+
+
+def _fetch_quote(symbol):
+    """
+    Pide a Yahoo Finance la cotización del día de un símbolo (lanza excepción si falla).
+
+    Returns:
+        dict: Nombre, precios, volumen, moneda, tipo de activo y sesión de mercado
+    """
+    # URL de la API de Yahoo Finance
+    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=1d"
+
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+
+    response = http_client.get(url, tool="get_stock_price", headers=headers)
+    # Yahoo responde 404 con el error en el JSON cuando el símbolo no existe
+    if response.status_code == 404:
+        raise SymbolNotFound(symbol)
+    response.raise_for_status()
+    data = response.json()
+
+    # Verificar si hay error
+    if data.get('chart', {}).get('error'):
+        raise SymbolNotFound(symbol)
+
+    # Extraer datos
+    result = data['chart']['result'][0]
+    meta = result['meta']
+    quote = result['indicators']['quote'][0]
+
+    # Datos estables del activo: si Yahoo no manda alguno (a veces falta longName) se usa el guardado
+    cached_meta = quote_meta_cache.get(symbol)
+    known = cached_meta[0] if cached_meta else {}
+    stable = {
+        "nombre": meta.get('longName') or known.get("nombre") or meta.get('shortName') or symbol,
+        "moneda": meta.get('currency') or known.get("moneda") or "USD",
+        "tipo": meta.get('instrumentType') or known.get("tipo") or "",
+    }
+    if stable != known:
+        quote_meta_cache.set(symbol, stable)
+
+    precio_actual = meta['regularMarketPrice']
+    precio_anterior = meta.get('chartPreviousClose') or meta['previousClose']
+    regular = (meta.get('currentTradingPeriod') or {}).get('regular') or {}
+
+    return {
+        **stable,
+        "precio_actual": precio_actual,
+        "precio_anterior": precio_anterior,
+        "precio_apertura": quote['open'][0] if quote.get('open') else precio_anterior,
+        "precio_max": quote['high'][0] if quote.get('high') else precio_actual,
+        "precio_min": quote['low'][0] if quote.get('low') else precio_actual,
+        "volumen": quote['volume'][0] if quote.get('volume') else 0,
+        "sesion": {
+            "start": regular.get('start'),
+            "end": regular.get('end'),
+            "gmtoffset": regular.get('gmtoffset') or meta.get('gmtoffset') or 0,
+        } if regular.get('start') and regular.get('end') else None,
+    }
+
+
+def quote_ttl(datos, now=None):
+    """
+    Devuelve cuántos segundos se puede reutilizar una cotización según su mercado.
+
+    Criptomonedas: siempre QUOTE_CRYPTO_TTL. Mercado abierto (o sin datos de
+    sesión): QUOTE_OPEN_TTL. Mercado cerrado: hasta la siguiente apertura,
+    saltando sábados y domingos en la hora local de la bolsa.
+    """
+    if datos.get("tipo") == "CRYPTOCURRENCY":
+        return QUOTE_CRYPTO_TTL
+
+    sesion = datos.get("sesion")
+    if not sesion:
+        return QUOTE_OPEN_TTL
+
+    now = time.time() if now is None else now
+    start, end = sesion["start"], sesion["end"]
+    if start <= now < end:
+        return QUOTE_OPEN_TTL
+
+    if now < start:
+        next_open = start
+    else:
+        # Yahoo da la última sesión: la siguiente abre un día laborable después
+        next_open = start + 86400
+        while time.gmtime(next_open + sesion["gmtoffset"]).tm_wday >= 5:
+            next_open += 86400
+
+    return min(max(next_open - now, QUOTE_OPEN_TTL), QUOTE_CLOSED_MAX_TTL)
+
+
+def _get_quote(symbol):
+    # Cotización desde la caché si sigue valiendo para la sesión de su mercado
+    return quote_cache.get_or_fetch(symbol, lambda: _fetch_quote(symbol), ttl=quote_ttl)
+
 
 def get_stock_price(symbol):
     """
@@ -13,65 +144,99 @@ def get_stock_price(symbol):
     """
     try:
         symbol = symbol.upper()
-
-        # URL de la API de Yahoo Finance
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=1d"
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # Verificar si hay error
-        if data.get('chart', {}).get('error'):
-            return f"No se encontró información para '{symbol}'. Verifica que el símbolo sea correcto."
-
-        # Extraer datos
-        result = data['chart']['result'][0]
-        meta = result['meta']
-        quote = result['indicators']['quote'][0]
-
-        nombre = meta.get('longName') or meta.get('shortName') or symbol
-        precio_actual = meta['regularMarketPrice']
-        precio_anterior = meta['chartPreviousClose']
-        precio_apertura = quote['open'][0] if quote['open'] else precio_anterior
-        precio_max = quote['high'][0] if quote['high'] else precio_actual
-        precio_min = quote['low'][0] if quote['low'] else precio_actual
-        volumen = quote['volume'][0] if quote['volume'] else 0
+        datos = _get_quote(symbol)
 
         # Calcular cambio
-        cambio = precio_actual - precio_anterior
-        cambio_porcentaje = (cambio / precio_anterior) * 100
+        cambio = datos["precio_actual"] - datos["precio_anterior"]
+        cambio_porcentaje = (cambio / datos["precio_anterior"]) * 100
 
         # Determinar tendencia
         tendencia = "📈" if cambio >= 0 else "📉"
 
         # Formatear respuesta
-        resultado = f"""**{nombre} ({symbol})**
+        resultado = f"""**{datos["nombre"]} ({symbol})**
 
-Precio actual: ${precio_actual:.2f}
+Precio actual: ${datos["precio_actual"]:.2f}
 Cambio: {tendencia} ${cambio:.2f} ({cambio_porcentaje:+.2f}%)
 
-Apertura: ${precio_apertura:.2f}
-Máximo del día: ${precio_max:.2f}
-Mínimo del día: ${precio_min:.2f}
-Volumen: {volumen:,.0f}
+Apertura: ${datos["precio_apertura"]:.2f}
+Máximo del día: ${datos["precio_max"]:.2f}
+Mínimo del día: ${datos["precio_min"]:.2f}
+Volumen: {datos["volumen"]:,.0f}
 
 Datos con ~15 min de delay (Yahoo Finance)"""
 
         return resultado
 
+    except SymbolNotFound:
+        return f"No se encontró información para '{symbol}'. Verifica que el símbolo sea correcto."
     except requests.exceptions.RequestException as e:
         return f"Error al conectar con Yahoo Finance: {str(e)}"
     except (KeyError, IndexError, TypeError) as e:
-        return f"Error al procesar datos de '{symbol}': {str(e)}\n\nVerifica que el símbolo sea correcto. Ejemplos:\n- Acciones: AAPL, MSFT, GOOGL, TSLA\n- Crypto: BTC-USD, ETH-USD\n- Índices: ^GSPC (S&P 500), ^DJI (Dow Jones)"
+        return f"Error al procesar datos de '{symbol}': {str(e)}\n\nVerifica que el símbolo sea correcto. {SYMBOL_EXAMPLES}"
     except Exception as e:
         return f"Error inesperado: {str(e)}"
 
 
+def _quote_row(symbol):
+    # Una fila de la tabla de get_stock_prices: los errores se quedan en su fila
+    try:
+        datos = _get_quote(symbol)
+        cambio = datos["precio_actual"] - datos["precio_anterior"]
+        cambio_porcentaje = (cambio / datos["precio_anterior"]) * 100
+        tendencia = "📈" if cambio >= 0 else "📉"
+        return (f"| {symbol} | {datos['nombre']} | {datos['precio_actual']:.2f} {datos['moneda']} | "
+                f"{tendencia} {cambio:+.2f} | {cambio_porcentaje:+.2f}% |")
+    except SymbolNotFound:
+        error = "símbolo no encontrado"
+    except requests.exceptions.Timeout:
+        error = "timeout de Yahoo Finance"
+    except requests.exceptions.RequestException as e:
+        error = f"error de conexión ({type(e).__name__})"
+    except (KeyError, IndexError, TypeError, ZeroDivisionError):
+        error = "datos incompletos"
+    except Exception as e:
+        error = f"error inesperado: {str(e)}"
+    return f"| {symbol} | ❌ {error} | | | |"
+
+
+def get_stock_prices(symbols):
+    """
+    Obtiene la cotización de varios activos a la vez, en una tabla compacta.
+
+    Las peticiones se hacen en paralelo; si un símbolo falla, su fila indica
+    el error y el resto de la tabla sigue adelante.
+
+    Args:
+        symbols (list): Símbolos de los tickers (ej: ["AAPL", "MSFT", "BTC-USD"])
+
+    Returns:
+        str: Tabla en markdown con precio y cambio del día de cada activo
+    """
+    if isinstance(symbols, str):
+        symbols = symbols.replace(",", " ").split()
+
+    # Sin duplicados y en el orden en que se pidieron
+    symbols = list(dict.fromkeys(
+        symbol.strip().upper() for symbol in symbols if isinstance(symbol, str) and symbol.strip()
+    ))
+    if not symbols:
+        return f"Error: no se ha indicado ningún símbolo. {SYMBOL_EXAMPLES}"
+
+    omitted = symbols[MAX_SYMBOLS:]
+    symbols = symbols[:MAX_SYMBOLS]
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(symbols))) as pool:
+        futures = [pool.submit(tracing.run_in_context(_quote_row, symbol)) for symbol in symbols]
+        rows = [future.result() for future in futures]
+
+    lines = ["| Símbolo | Nombre | Precio | Cambio | % |", "|---|---|---|---|---|"] + rows
+    if omitted:
+        lines.append(f"\nOmitidos (máximo {MAX_SYMBOLS} por llamada): {', '.join(omitted)}")
+    lines.append("\nDatos con ~15 min de delay (Yahoo Finance)")
+    return "\n".join(lines)
+
+
 # Definición de la tool para el modelo
 TOOL_DEFINITION = {
     "type": "function",
@@ -90,3 +255,22 @@ TOOL_DEFINITION = {
         }
     }
 }
+
+TOOL_DEFINITION_BATCH = {
+    "type": "function",
+    "function": {
+        "name": "get_stock_prices",
+        "description": f"Igual que get_stock_price pero para varios activos a la vez (hasta {MAX_SYMBOLS}), en paralelo. Devuelve una tabla compacta con precio y cambio del día de cada uno. Úsala EN LUGAR de varias llamadas a get_stock_price cuando el usuario pregunte por una cartera, una comparación o varios valores.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "symbols": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Lista de símbolos ticker (ej: [\"AAPL\", \"MSFT\", \"BTC-USD\", \"^GSPC\"])"
+                }
+            },
+            "required": ["symbols"]
+        }
+    }
+}
@@ -1,55 +1,309 @@
 import os
-import requests
+import re
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from core import http_client, tracing
+from core.cache import TTLCache
+from core.knowledge import index_document
 
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 
-def search_internet(query):
-    """
-    Busca información en internet usando Tavily API.
+# Caché de búsquedas: una búsqueda se considera fresca durante SEARCH_CACHE_TTL
+# segundos y, durante SEARCH_CACHE_STALE_TTL más, se devuelve al instante
+# mientras se repite en segundo plano
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_STALE_TTL = float(os.getenv("SEARCH_CACHE_STALE_TTL", "86400"))
+SEARCH_CACHE_MEMORY_ENTRIES = 256
 
-    Args:
-        query (str): La consulta de búsqueda
+# En consultas de hasta estas palabras el orden no importa ("precio oro" == "oro precio")
+SEARCH_CACHE_SORT_MAX_WORDS = 4
 
-    Returns:
-        str: Resultados de la búsqueda formateados
+# Profundidad de búsqueda: "auto" empieza con "basic" (rápida) y solo repite en
+# "advanced" si los resultados son pobres; "basic" o "advanced" la fijan
+SEARCH_DEPTH = os.getenv("SEARCH_DEPTH", "auto")
+
+# Resultados pobres: sin respuesta, menos de SEARCH_MIN_RESULTS fuentes o la
+# mejor con puntuación de Tavily por debajo de SEARCH_MIN_SCORE
+SEARCH_MIN_RESULTS = 3
+SEARCH_MIN_SCORE = 0.5
+
+# Latencia estimada (segundos) de cada profundidad, ajustada con cada búsqueda
+# real (media móvil exponencial) para decidir si cabe en el presupuesto
+SEARCH_LATENCY_ESTIMATES = {"basic": 1.5, "advanced": 4.0}
+SEARCH_LATENCY_ALPHA = 0.2
+
+# Búsqueda múltiple: consultas por llamada, resultados fusionados que se
+# devuelven y constante k de reciprocal rank fusion
+SEARCH_MULTI_MAX_QUERIES = 5
+SEARCH_MULTI_MAX_RESULTS = 15
+SEARCH_RRF_K = 60
+
+search_cache = TTLCache("search", SEARCH_CACHE_TTL, SEARCH_CACHE_STALE_TTL,
+                        max_entries=SEARCH_CACHE_MEMORY_ENTRIES)
+
+
+def normalize_query(query):
     """
-    if not TAVILY_API_KEY:
-        return "Error: TAVILY_API_KEY no está configurada"
+    Normaliza una consulta para usarla como clave de caché.
 
+    Ignora mayúsculas, acentos, signos de puntuación y espacios repetidos; en
+    consultas cortas también el orden de las palabras.
+    """
+    text = unicodedata.normalize("NFKD", query.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    words = re.findall(r"[\w$%&+#.-]+", text)
+    words = [w.strip(".-") for w in words if w.strip(".-")]
+
+    if len(words) <= SEARCH_CACHE_SORT_MAX_WORDS:
+        words.sort()
+    return " ".join(words)
+
+
+def _search_tavily(query, depth="advanced", timeout=None):
+    """
+    Hace la búsqueda en Tavily y devuelve la respuesta y las fuentes (lanza excepción si falla)
+    """
     url = "https://api.tavily.com/search"
 
     payload = {
         "api_key": TAVILY_API_KEY,
         "query": query,
-        "search_depth": "advanced",
+        "search_depth": depth,
         "include_answer": True,
         "max_results": 10
     }
 
+    kwargs = {}
+    if timeout is not None:
+        kwargs["timeout"] = (min(http_client.get_timeout("search_internet")[0], timeout), timeout)
+
+    started = time.monotonic()
+    response = http_client.post(url, tool="search_internet", rate_key=TAVILY_API_KEY, json=payload, **kwargs)
+    response.raise_for_status()
+    data = response.json()
+
+    elapsed = time.monotonic() - started
+    SEARCH_LATENCY_ESTIMATES[depth] += SEARCH_LATENCY_ALPHA * (elapsed - SEARCH_LATENCY_ESTIMATES[depth])
+
+    # Las fuentes quedan en el índice local para search_local_knowledge
+    for result in data.get("results") or []:
+        if result.get("url") and result.get("content"):
+            index_document(result["url"], result.get("title"), result["content"], "search_internet")
+
+    # Solo se guarda lo que se muestra al modelo (y la puntuación, para decidir si escalar)
+    return {
+        "answer": data.get("answer") or "",
+        "results": [
+            {
+                "title": result.get("title", "Sin título"),
+                "url": result.get("url", "N/A"),
+                "content": (result.get("content") or "Sin contenido")[:200],
+                "score": result.get("score") or 0,
+            }
+            for result in data.get("results") or []
+        ],
+    }
+
+
+def _cache_key(query, depth):
+    return f"results:{depth}:10:{normalize_query(query)}"
+
+
+def _cached_search(query, depth="advanced", timeout=None):
+    return search_cache.get_or_fetch(_cache_key(query, depth), lambda: _search_tavily(query, depth, timeout))
+
+
+def is_thin(data):
+    """
+    Indica si unos resultados son demasiado pobres y merece la pena repetir la búsqueda en "advanced"
+    """
+    results = data["results"]
+    if not data["answer"] or len(results) < SEARCH_MIN_RESULTS:
+        return True
+    return max(result.get("score", 0) for result in results) < SEARCH_MIN_SCORE
+
+
+def _tiered_search(query, max_seconds=None):
+    """
+    Busca con la profundidad configurada (SEARCH_DEPTH) dentro de un presupuesto de tiempo.
+
+    En modo "auto" se hace primero una búsqueda "basic" y solo se escala a
+    "advanced" si los resultados son pobres y la latencia estimada cabe en el
+    tiempo que queda. Si la búsqueda avanzada falla, se devuelve la básica.
+
+    Args:
+        query (str): La consulta de búsqueda
+        max_seconds (float, optional): Tiempo máximo para la búsqueda completa
+
+    Returns:
+        dict: Respuesta y fuentes ({"answer", "results"})
+    """
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+
+    def remaining():
+        return None if deadline is None else max(deadline - time.monotonic(), 0.1)
+
+    if SEARCH_DEPTH in ("basic", "advanced"):
+        return _cached_search(query, SEARCH_DEPTH, remaining())
+
+    # Una búsqueda avanzada ya hecha vale más que una básica nueva
+    cached = search_cache.get(_cache_key(query, "advanced"))
+    if cached is not None:
+        return _cached_search(query, "advanced")
+
+    data = _cached_search(query, "basic", remaining())
+    if not is_thin(data):
+        return data
+
+    if deadline is not None and deadline - time.monotonic() < SEARCH_LATENCY_ESTIMATES["advanced"]:
+        return data
+
     try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        data = response.json()
+        advanced = _cached_search(query, "advanced", remaining())
+    except Exception:
+        return data
+    return advanced if advanced["results"] or not data["results"] else data
+
 
-        # Formatear los resultados
-        results = []
+def _format_sources(sources):
+    lines = ["Fuentes:"]
+    for i, result in enumerate(sources, 1):
+        lines.append(f"{i}. {result['title']}")
+        lines.append(f"   URL: {result['url']}")
+        lines.append(f"   {result['content']}...")
+        lines.append("")
+    return lines
 
-        if data.get("answer"):
-            results.append(f"Respuesta: {data['answer']}\n")
 
-        if data.get("results"):
-            results.append("Fuentes:")
-            for i, result in enumerate(data["results"], 1):
-                results.append(f"{i}. {result.get('title', 'Sin título')}")
-                results.append(f"   URL: {result.get('url', 'N/A')}")
-                results.append(f"   {result.get('content', 'Sin contenido')[:200]}...")
-                results.append("")
+def merge_results(result_lists, limit=None):
+    """
+    Fusiona varias listas de resultados con reciprocal rank fusion.
+
+    Los resultados que apuntan a la misma URL canónica se juntan en uno solo
+    (se queda el de mejor posición) y suman 1 / (k + posición) por cada lista
+    en la que aparecen.
 
-        return "\n".join(results) if results else "No se encontraron resultados"
+    Args:
+        result_lists (list): Listas de resultados ({"title", "url", "content"}), ordenadas por relevancia
+        limit (int, optional): Número máximo de resultados devueltos
 
+    Returns:
+        list: Resultados sin duplicados, de mayor a menor puntuación
+    """
+    merged = {}
+    for results in result_lists:
+        seen = set()
+        for rank, result in enumerate(results, 1):
+            key = http_client.canonicalize_url(result["url"])
+            # Si una misma lista repite la URL, solo cuenta su mejor posición
+            if key in seen:
+                continue
+            seen.add(key)
+
+            entry = merged.setdefault(key, {"result": result, "score": 0.0, "best_rank": rank})
+            entry["score"] += 1.0 / (SEARCH_RRF_K + rank)
+            if rank < entry["best_rank"]:
+                entry["result"], entry["best_rank"] = result, rank
+
+    ranked = sorted(merged.values(), key=lambda entry: (-entry["score"], entry["best_rank"]))
+    return [entry["result"] for entry in ranked[:limit]]
+
+
+def search_internet(query, max_seconds=None):
+    """
+    Busca información en internet usando Tavily API.
+
+    Empieza con una búsqueda rápida y solo usa la avanzada si los resultados
+    son pobres (ver _tiered_search). Las búsquedas repetidas (o que solo
+    cambian en mayúsculas, acentos, espacios u orden de palabras) se sirven
+    desde la caché.
+
+    Args:
+        query (str): La consulta de búsqueda
+        max_seconds (float, optional): Tiempo máximo que puede tardar la búsqueda
+
+    Returns:
+        str: Resultados de la búsqueda formateados
+    """
+    if not TAVILY_API_KEY:
+        return "Error: TAVILY_API_KEY no está configurada"
+
+    try:
+        data = _tiered_search(query, max_seconds)
     except Exception as e:
         return f"Error al buscar en internet: {str(e)}"
 
+    results = []
+    if data["answer"]:
+        results.append(f"Respuesta: {data['answer']}\n")
+    if data["results"]:
+        results.extend(_format_sources(data["results"]))
+
+    return "\n".join(results) if results else "No se encontraron resultados"
+
+
+def search_internet_multi(queries, max_seconds=None):
+    """
+    Lanza varias búsquedas a la vez y devuelve una única lista de fuentes.
+
+    Las fuentes repetidas entre consultas se muestran una sola vez, ordenadas
+    por reciprocal rank fusion (primero las que salen arriba en más consultas).
+
+    Args:
+        queries (list): Consultas de búsqueda (variantes de una misma pregunta)
+        max_seconds (float, optional): Tiempo máximo que pueden tardar las búsquedas
+
+    Returns:
+        str: Respuesta de cada consulta y fuentes fusionadas
+    """
+    if not TAVILY_API_KEY:
+        return "Error: TAVILY_API_KEY no está configurada"
+
+    if isinstance(queries, str):
+        queries = [queries]
+
+    # Consultas equivalentes (misma clave de caché) se buscan una sola vez
+    unique = {}
+    for query in queries:
+        if isinstance(query, str) and query.strip():
+            unique.setdefault(normalize_query(query), query.strip())
+    queries = list(unique.values())[:SEARCH_MULTI_MAX_QUERIES]
+
+    if not queries:
+        return "Error: no se ha indicado ninguna consulta"
+
+    def search(query):
+        try:
+            return _tiered_search(query, max_seconds), None
+        except Exception as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        futures = [pool.submit(tracing.run_in_context(search, query)) for query in queries]
+        outcomes = [future.result() for future in futures]
+
+    results = []
+    answers = []
+    for query, (data, error) in zip(queries, outcomes):
+        if error is not None:
+            results.append(f"Error al buscar '{query}': {error}")
+        elif data["answer"]:
+            answers.append(f"- {query}: {data['answer']}")
+    if answers:
+        results.append("Respuestas:")
+        results.extend(answers)
+        results.append("")
+
+    sources = merge_results(
+        [data["results"] for data, error in outcomes if error is None],
+        limit=SEARCH_MULTI_MAX_RESULTS
+    )
+    if sources:
+        results.extend(_format_sources(sources))
+
+    return "\n".join(results) if results else "No se encontraron resultados"
+
 
 # Definición de la tool para el modelo
 TOOL_DEFINITION = {
@@ -63,9 +317,36 @@ TOOL_DEFINITION = {
                 "query": {
                     "type": "string",
                     "description": "La consulta de búsqueda en internet"
+                },
+                "max_seconds": {
+                    "type": "number",
+                    "description": "Opcional. Segundos máximos que puede tardar la búsqueda; con poco margen se devuelven los resultados rápidos sin profundizar"
                 }
             },
             "required": ["query"]
         }
     }
 }
+
+TOOL_DEFINITION_MULTI = {
+    "type": "function",
+    "function": {
+        "name": "search_internet_multi",
+        "description": f"Igual que search_internet pero con varias consultas a la vez (hasta {SEARCH_MULTI_MAX_QUERIES}), que se buscan en paralelo. Devuelve una sola lista de fuentes sin duplicados, ordenada por relevancia combinada. Úsala EN LUGAR de varias llamadas a search_internet cuando quieras buscar un mismo tema con distintas formulaciones o desde varios ángulos.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "queries": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Lista de consultas de búsqueda (reformulaciones o aspectos del mismo tema)"
+                },
+                "max_seconds": {
+                    "type": "number",
+                    "description": "Opcional. Segundos máximos que puede tardar la búsqueda; con poco margen se devuelven los resultados rápidos sin profundizar"
+                }
+            },
+            "required": ["queries"]
+        }
+    }
+}
@@ -2,11 +2,6 @@ import os
 import pickle
 import base64
 from email.mime.text import MIMEText
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 
 # Scopes necesarios para enviar emails con Gmail
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
@@ -15,6 +10,12 @@ def get_gmail_service():
     """
     Autentica y retorna el servicio de Gmail API
     """
+    # Las librerías de Google se importan al enviar el primer email, no al
+    # arrancar el agente (la discovery de googleapiclient es lenta de cargar)
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+
     credentials = None
 
     # El archivo gmail_token.pickle almacena los tokens de acceso
@@ -51,6 +52,11 @@ def send_email(to, subject, body):
     Returns:
         str: Confirmación del envío o mensaje de error
     """
+    try:
+        from googleapiclient.errors import HttpError
+    except ImportError:
+        return "Error: Faltan las librerías de Google (pip install google-api-python-client google-auth-oauthlib)"
+
     try:
         # Obtiene el servicio autenticado
         service = get_gmail_service()
@@ -1,6 +1,6 @@
 import os
 import requests
-import replicate
+from core import http_client
 from datetime import datetime
 
 def generate_image(prompt, output_dir="generated_images"):
@@ -20,6 +20,12 @@ def generate_image(prompt, output_dir="generated_images"):
     if not api_key:
         return "Error: REPLICATE_API_TOKEN (o REPLICATE_API_KEY) no está configurada en las variables de entorno"
 
+    # replicate se importa solo cuando se genera la primera imagen
+    try:
+        import replicate
+    except ImportError:
+        return "Error: La librería replicate no está instalada (pip install replicate)"
+
     try:
         # Crea el directorio si no existe
         os.makedirs(output_dir, exist_ok=True)
@@ -47,7 +53,7 @@ def generate_image(prompt, output_dir="generated_images"):
         image_url = output[0]
 
         # Descarga la imagen
-        response = requests.get(image_url, timeout=30)
+        response = http_client.get(image_url, tool="generate_image")
         response.raise_for_status()
 
         # Genera un nombre de archivo único con timestamp
@@ -0,0 +1,77 @@
+from datetime import datetime
+from core.knowledge import get_index
+
+# Máximo de resultados que se pueden pedir en una consulta
+MAX_RESULTS = 20
+
+
+def search_local_knowledge(query, limit=5, source=None):
+    """
+    Busca en el índice local de páginas y resultados de búsqueda ya consultados.
+
+    No hace ninguna petición a internet: sirve para recuperar al instante lo
+    que dijo una página o búsqueda de esta sesión o de sesiones anteriores.
+
+    Args:
+        query (str): Palabras a buscar
+        limit (int, optional): Número máximo de resultados
+        source (str, optional): Solo resultados de esta tool ("scrape_website" o "search_internet")
+
+    Returns:
+        str: Documentos encontrados con su URL, fecha y un fragmento
+    """
+    index = get_index()
+    if index is None:
+        return "Error: el índice local está desactivado (KNOWLEDGE_DB_PATH vacío)"
+
+    try:
+        limit = min(max(int(limit or 5), 1), MAX_RESULTS)
+    except (TypeError, ValueError):
+        return "Error: limit debe ser un número entero"
+
+    try:
+        results = index.search(query, limit=limit, source=source)
+    except Exception as e:
+        return f"Error al buscar en el índice local: {str(e)}"
+
+    if not results:
+        return f"No hay nada guardado sobre '{query}'. Usa search_internet o scrape_website."
+
+    lines = []
+    for i, result in enumerate(results, 1):
+        fetched = datetime.fromtimestamp(result["fetched_at"]).strftime("%Y-%m-%d %H:%M")
+        lines.append(f"{i}. {result['title']} ({result['source']}, {fetched})")
+        lines.append(f"   URL: {result['url']}")
+        lines.append(f"   {result['snippet']}")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+# Definición de la tool para el modelo
+TOOL_DEFINITION = {
+    "type": "function",
+    "function": {
+        "name": "search_local_knowledge",
+        "description": "Busca en el índice local de todo lo que el agente ya ha leído (scrape_website) o buscado (search_internet), en esta sesión o en anteriores. Responde al instante y sin conexión. Úsala PRIMERO cuando el usuario pregunte por algo ya consultado ('lo que decía el artículo de ayer', 'la página que leímos'). Si no encuentra nada o los datos deben ser actuales, usa search_internet o scrape_website.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Palabras clave a buscar en los documentos guardados"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": f"Opcional. Número máximo de resultados (por defecto 5, máximo {MAX_RESULTS})"
+                },
+                "source": {
+                    "type": "string",
+                    "enum": ["scrape_website", "search_internet"],
+                    "description": "Opcional. Solo páginas leídas (scrape_website) o solo resultados de búsqueda (search_internet)"
+                }
+            },
+            "required": ["query"]
+        }
+    }
+}
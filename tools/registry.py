@@ -0,0 +1,195 @@
+import importlib
+
+# Registro de tools disponibles para el modelo.
+# Cada entrada indica el módulo que la implementa (la función se llama igual que
+# la tool), el atributo con su definición y la línea que se muestra en consola.
+# Los módulos se importan la primera vez que se necesitan, y las dependencias
+# pesadas (pygame, replicate, googleapiclient, edge_tts) dentro de cada tool
+# solo se cargan cuando esa tool se ejecuta por primera vez.
+TOOL_REGISTRY = {
+    "search_internet": {
+        "module": "tools.buscador_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[Buscador: buscando '{query}']",
+    },
+    "search_internet_multi": {
+        "module": "tools.buscador_tool",
+        "definition": "TOOL_DEFINITION_MULTI",
+        "log": "[Buscador: buscando {queries}]",
+    },
+    "scrape_website": {
+        "module": "tools.scraper_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[Scraper: leyendo {url}]",
+    },
+    "scrape_websites": {
+        "module": "tools.scraper_tool",
+        "definition": "TOOL_DEFINITION_MULTI",
+        "log": "[Scraper: leyendo {urls}]",
+    },
+    "send_telegram_message": {
+        "module": "tools.telegram_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[Telegram: enviando mensaje...]",
+    },
+    "send_telegram_document": {
+        "module": "tools.telegram_tool",
+        "definition": "TOOL_DEFINITION_DOCUMENT",
+        "log": "[Telegram: enviando documento {file_path}...]",
+    },
+    "send_telegram_photo": {
+        "module": "tools.telegram_tool",
+        "definition": "TOOL_DEFINITION_PHOTO",
+        "log": "[Telegram: enviando imagen {file_path}...]",
+    },
+    "send_telegram_audio": {
+        "module": "tools.telegram_tool",
+        "definition": "TOOL_DEFINITION_AUDIO",
+        "log": "[Telegram: enviando audio {file_path}...]",
+    },
+    "get_stock_price": {
+        "module": "tools.bolsa_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[Bolsa: consultando {symbol}...]",
+    },
+    "get_stock_prices": {
+        "module": "tools.bolsa_tool",
+        "definition": "TOOL_DEFINITION_BATCH",
+        "log": "[Bolsa: consultando {symbols}...]",
+    },
+    "send_email": {
+        "module": "tools.gmail_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[Gmail: enviando email a {to}...]",
+    },
+    "generate_image": {
+        "module": "tools.image_generator_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[IA Image: generando '{prompt:.50}...']",
+    },
+    "read_file": {
+        "module": "tools.file_tool",
+        "definition": "TOOL_DEFINITIONS",
+        "log": "[File: leyendo {file_path}]",
+    },
+    "write_file": {
+        "module": "tools.file_tool",
+        "definition": "TOOL_DEFINITIONS",
+        "log": "[File: escribiendo {file_path}]",
+    },
+    "list_files": {
+        "module": "tools.file_tool",
+        "definition": "TOOL_DEFINITIONS",
+        "log": "[File: listando {directory}]",
+        "defaults": {"directory": "."},
+    },
+    "execute_python": {
+        "module": "tools.code_executor_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[Python: ejecutando código...]",
+    },
+    "text_to_speech": {
+        "module": "tools.tts_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[TTS: generando audio con voz {voice}...]",
+        "defaults": {"voice": "es-ES-AlvaroNeural"},
+    },
+    "control_audio": {
+        "module": "tools.audio_player_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[Audio Player: {action}...]",
+    },
+    "search_local_knowledge": {
+        "module": "tools.knowledge_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[Índice local: buscando '{query}']",
+    },
+    "read_artifact": {
+        "module": "tools.artifact_tool",
+        "definition": "TOOL_DEFINITION",
+        "log": "[Artefacto: leyendo {artifact_id}]",
+    },
+}
+
+_definitions_cache = {}
+
+
+class _LogArguments(dict):
+    """
+    Argumentos para formatear la línea de log: las claves que faltan valen None
+    """
+
+    def __missing__(self, key):
+        return None
+
+
+def get_tool_definition(name):
+    """
+    Devuelve la definición (schema) de una tool registrada.
+
+    Args:
+        name (str): Nombre de la tool
+
+    Returns:
+        dict: Definición de la tool en formato function calling
+    """
+    if name not in _definitions_cache:
+        entry = TOOL_REGISTRY[name]
+        definition = getattr(importlib.import_module(entry["module"]), entry["definition"])
+
+        # Algunos módulos exponen varias tools en una lista (ej: file_tool)
+        if isinstance(definition, list):
+            definition = next(d for d in definition if d["function"]["name"] == name)
+
+        _definitions_cache[name] = definition
+
+    return _definitions_cache[name]
+
+
+def get_tool_definitions():
+    """
+    Devuelve las definiciones de todas las tools registradas, en orden de registro
+    """
+    return [get_tool_definition(name) for name in TOOL_REGISTRY]
+
+
+def describe_tool_call(name, arguments):
+    """
+    Devuelve la línea que se muestra en consola al usar una tool (o None)
+    """
+    entry = TOOL_REGISTRY.get(name)
+    if not entry:
+        return None
+
+    values = _LogArguments(entry.get("defaults", {}))
+    values.update(arguments)
+
+    try:
+        return entry["log"].format_map(values)
+    except (TypeError, ValueError):
+        # Argumentos con un tipo inesperado: se muestra la plantilla sin formatear
+        return entry["log"]
+
+
+def call_tool(name, arguments):
+    """
+    Ejecuta una tool registrada, importando su módulo si es la primera vez.
+
+    Args:
+        name (str): Nombre de la tool
+        arguments (dict): Argumentos ya parseados desde el JSON del modelo
+
+    Returns:
+        str: Resultado de la tool
+    """
+    entry = TOOL_REGISTRY.get(name)
+    if not entry:
+        return "Tool no encontrada"
+
+    function = getattr(importlib.import_module(entry["module"]), name)
+
+    # Solo se pasan los parámetros declarados en el schema de la tool
+    properties = get_tool_definition(name)["function"]["parameters"]["properties"]
+    kwargs = {key: value for key, value in arguments.items() if key in properties}
+
+    return function(**kwargs)
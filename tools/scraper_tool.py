@@ -1,31 +1,452 @@
+import os
+import re
+import time
+import codecs
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import requests
+from core import http_client, tracing, relevance
+from core.cache import TTLCache
+from core.html_extractor import html_to_markdown
+from core.knowledge import index_document
 
-def scrape_website(url):
+# Caché de páginas en disco (comprimidas) por URL canónica. Cada página se
+# considera fresca según su dominio / tipo y, después, se revalida con
+# ETag / Last-Modified durante SCRAPE_CACHE_REVALIDATE_TTL segundos más
+SCRAPE_FRONT_PAGE_TTL = float(os.getenv("SCRAPE_FRONT_PAGE_TTL", "300"))
+SCRAPE_ARTICLE_TTL = float(os.getenv("SCRAPE_ARTICLE_TTL", "86400"))
+SCRAPE_CACHE_REVALIDATE_TTL = float(os.getenv("SCRAPE_CACHE_REVALIDATE_TTL", "604800"))
+SCRAPE_CACHE_MEMORY_ENTRIES = 64
+
+# Frescura propia de algunos dominios (segundos); también "dominio=segundos,..."
+# en SCRAPE_DOMAIN_TTLS. Se aplica también a sus subdominios
+SCRAPE_DOMAIN_TTLS = {
+    # Tiempo y datos de mercado cambian de un minuto a otro
+    "aemet.es": 600,
+    "eltiempo.es": 600,
+    "finance.yahoo.com": 60,
+    "investing.com": 60,
+    # La documentación y las enciclopedias apenas cambian
+    "wikipedia.org": 604800,
+    "docs.python.org": 604800,
+}
+
+for _item in os.getenv("SCRAPE_DOMAIN_TTLS", "").split(","):
+    if "=" in _item:
+        _domain, _seconds = _item.split("=", 1)
+        SCRAPE_DOMAIN_TTLS[_domain.strip().lower()] = float(_seconds)
+
+# Motor de extracción: "jina" (proxy r.jina.ai), "local" (descarga directa y
+# extracción en el propio proceso) o "auto" (el más rápido según la latencia
+# medida, con Jina como respaldo para páginas que necesitan JavaScript)
+SCRAPE_ENGINE = os.getenv("SCRAPE_ENGINE", "auto")
+SCRAPE_ENGINES = ("auto", "local", "jina")
+
+# Latencia estimada (segundos) de cada motor, ajustada con cada lectura real
+SCRAPE_LATENCY_ESTIMATES = {"local": 1.0, "jina": 3.0}
+SCRAPE_LATENCY_ALPHA = 0.2
+
+# Con menos texto que esto la extracción local se da por fallida (página que
+# se monta con JavaScript, muro de cookies...) y se usa Jina
+SCRAPE_LOCAL_MIN_CHARS = 500
+
+# Dominios recordados como "necesitan Jina" (los más antiguos se olvidan)
+SCRAPE_JINA_DOMAINS_MAX = 512
+
+SCRAPE_USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                     "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+# Caracteres máximos de una página en el resultado: si es más larga se
+# devuelven las secciones más relevantes para la pregunta (ver core/relevance.py).
+# El resultado ya viene recortado, así que no se guarda como artefacto
+# (ver NEVER_OFFLOAD en core/artifacts.py)
+SCRAPE_MAX_LENGTH = int(os.getenv("SCRAPE_MAX_LENGTH", "15000"))
+
+# Descarga en streaming: se deja de leer (y se cierra la conexión) al llegar a
+# SCRAPE_MAX_DOWNLOAD_BYTES o, en texto ya convertido (Jina), a
+# SCRAPE_MAX_READ_CHARS caracteres, de sobra para elegir secciones relevantes
+SCRAPE_MAX_DOWNLOAD_BYTES = int(os.getenv("SCRAPE_MAX_DOWNLOAD_BYTES", str(2 * 1024 * 1024)))
+SCRAPE_MAX_READ_CHARS = 120000
+SCRAPE_CHUNK_BYTES = 16 * 1024
+
+_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.I)
+
+# Lectura de varias URLs: máximo por llamada, lecturas simultáneas a un mismo
+# dominio y segundos que se espera al conjunto antes de devolver lo que haya
+SCRAPE_MULTI_MAX_URLS = 10
+SCRAPE_MULTI_PER_DOMAIN = 2
+SCRAPE_MULTI_DEADLINE = float(os.getenv("SCRAPE_MULTI_DEADLINE", "45"))
+
+# Caracteres máximos del resultado de scrape_websites: se reparten entre las
+# páginas (cada una sin pasar de SCRAPE_MAX_LENGTH)
+SCRAPE_MULTI_MAX_LENGTH = int(os.getenv("SCRAPE_MULTI_MAX_LENGTH", "40000"))
+
+_jina_domains = {}
+_jina_domains_lock = threading.Lock()
+
+_domain_semaphores = {}
+_domain_semaphores_lock = threading.Lock()
+
+scrape_cache = TTLCache("scrape", SCRAPE_ARTICLE_TTL, SCRAPE_CACHE_REVALIDATE_TTL,
+                        max_entries=SCRAPE_CACHE_MEMORY_ENTRIES)
+
+
+def get_freshness(url):
+    """
+    Devuelve los segundos que una página de esta URL se sirve sin revalidar.
+
+    Primero mira la lista de dominios; si no está, las portadas (sin ruta)
+    caducan pronto y el resto de páginas (artículos) tarda mucho más.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    while host:
+        if host in SCRAPE_DOMAIN_TTLS:
+            return SCRAPE_DOMAIN_TTLS[host]
+        host = host.partition(".")[2]
+
+    if not parts.path.strip("/"):
+        return SCRAPE_FRONT_PAGE_TTL
+    return SCRAPE_ARTICLE_TTL
+
+
+class LocalExtractionError(Exception):
+    """
+    La extracción local no ha obtenido contenido útil (hay que usar Jina)
+    """
+
+
+def _domain(url):
+    host = (urlsplit(url).hostname or url).lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _conditional_headers(cached, engine):
+    # Los validadores solo valen para el mismo origen que los dio
+    headers = {}
+    if cached and cached.get("engine", "jina") == engine:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+
+def _make_entry(content, response, engine):
+    return {
+        "content": content,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+        "engine": engine,
+    }
+
+
+def _detect_encoding(response, head):
+    content_type = response.headers.get("Content-Type", "")
+    match = re.search(r"charset=([\w-]+)", content_type, re.I)
+    # Sin charset en la cabecera requests supone ISO-8859-1: mejor mirar el <meta> del HTML
+    if match is None:
+        match = _CHARSET.search(head)
+    encoding = match.group(1) if match else "utf-8"
+    if isinstance(encoding, bytes):
+        encoding = encoding.decode("ascii")
+
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = "utf-8"
+    return encoding
+
+
+def _read_body(response, max_chars=None):
     """
-    Extrae el contenido actual de una URL usando Jina AI Reader.
-    Obtiene contenido en tiempo real directamente del sitio web.
+    Lee el cuerpo de una respuesta en streaming, con un tope de bytes y de caracteres.
+
+    El texto se decodifica a medida que llega; al superar cualquiera de los
+    dos topes se deja de leer y se cierra la conexión, así una página enorme
+    no se descarga ni se guarda en memoria entera.
 
     Args:
-        url (str): La URL completa del sitio a scrapear
+        response (requests.Response): Respuesta pedida con stream=True
+        max_chars (int, optional): Caracteres máximos del texto decodificado
 
     Returns:
-        str: Contenido de la página en formato markdown
+        tuple: (texto, True si se ha cortado antes del final)
+    """
+    decoder = None
+    parts = []
+    read_bytes = 0
+    read_chars = 0
+    truncated = False
+
+    try:
+        for chunk in response.iter_content(chunk_size=SCRAPE_CHUNK_BYTES):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(_detect_encoding(response, chunk[:4096]))(errors="replace")
+
+            if read_bytes + len(chunk) > SCRAPE_MAX_DOWNLOAD_BYTES:
+                chunk = chunk[:SCRAPE_MAX_DOWNLOAD_BYTES - read_bytes]
+                truncated = True
+            read_bytes += len(chunk)
+
+            text = decoder.decode(chunk)
+            if max_chars is not None and read_chars + len(text) > max_chars:
+                text = text[:max_chars - read_chars]
+                truncated = True
+            parts.append(text)
+            read_chars += len(text)
+
+            if truncated:
+                break
+        else:
+            if decoder is not None:
+                parts.append(decoder.decode(b"", final=True))
+    finally:
+        response.close()
+
+    return "".join(parts), truncated
+
+
+def _truncation_note(content, truncated):
+    if not truncated:
+        return content
+    return content + "\n\n[Página demasiado grande: solo se ha leído el principio...]"
+
+
+def _fetch_jina(url, cached=None):
+    """
+    Descarga la página a través de Jina AI Reader (lanza excepción si falla).
+
+    Si hay una copia anterior se pide condicionalmente y, cuando el servidor
+    responde 304, se reutiliza su contenido.
+
+    Returns:
+        tuple: (entrada de caché, True si se ha revalidado sin descargar)
     """
     # Jina AI Reader convierte cualquier URL a markdown limpio
     jina_url = f"https://r.jina.ai/{url}"
 
+    response = http_client.get(jina_url, tool="scrape_website", headers=_conditional_headers(cached, "jina"),
+                               stream=True)
+    if response.status_code == 304 and cached:
+        response.close()
+        return dict(cached, fetched_at=time.time()), True
+
+    if not response.ok:
+        response.close()
+    response.raise_for_status()
+
+    content, truncated = _read_body(response, SCRAPE_MAX_READ_CHARS)
+    return _make_entry(_truncation_note(content, truncated), response, "jina"), False
+
+
+def _fetch_local(url, cached=None, strict=True):
+    """
+    Descarga la página directamente y extrae su contenido principal en local.
+
+    Args:
+        url (str): URL de la página
+        cached (dict, optional): Copia anterior, para pedir la página condicionalmente
+        strict (bool): Lanzar LocalExtractionError si sale poco texto o no es HTML
+
+    Returns:
+        tuple: (entrada de caché, True si se ha revalidado sin descargar)
+    """
+    headers = {"User-Agent": SCRAPE_USER_AGENT, "Accept": "text/html,application/xhtml+xml,*/*;q=0.8"}
+    headers.update(_conditional_headers(cached, "local"))
+
+    response = http_client.get(url, tool="scrape_website", headers=headers, stream=True)
+    if response.status_code == 304 and cached:
+        response.close()
+        return dict(cached, fetched_at=time.time()), True
+
+    if not response.ok:
+        response.close()
+    response.raise_for_status()
+
+    content_type = response.headers.get("Content-Type", "").lower()
+    if "html" in content_type:
+        html, truncated = _read_body(response)
+        try:
+            markdown = html_to_markdown(html, response.url or url)
+        except Exception as e:
+            # HTML que el extractor no sabe tratar: en modo auto se pasa a Jina
+            raise LocalExtractionError(f"No se pudo extraer el contenido de {url}: {type(e).__name__}: {e}") from e
+        content = _truncation_note(markdown, truncated)
+        if strict and len(content) < SCRAPE_LOCAL_MIN_CHARS:
+            raise LocalExtractionError(f"Poco contenido extraído de {url}")
+    elif content_type.startswith("text/") or "json" in content_type or "xml" in content_type:
+        content, truncated = _read_body(response, SCRAPE_MAX_READ_CHARS)
+        content = _truncation_note(content, truncated)
+    else:
+        # PDF, imágenes...: no se descargan (Jina sabe convertirlos)
+        response.close()
+        if strict:
+            raise LocalExtractionError(f"Tipo de contenido no soportado: {content_type or 'desconocido'}")
+        content = f"[Contenido no textual: {content_type or 'desconocido'}]"
+
+    return _make_entry(content, response, "local"), False
+
+
+def _choose_engine(url, engine):
+    if engine in ("local", "jina"):
+        return engine
+    with _jina_domains_lock:
+        if _domain(url) in _jina_domains:
+            return "jina"
+    return min(SCRAPE_LATENCY_ESTIMATES, key=SCRAPE_LATENCY_ESTIMATES.get)
+
+
+def _remember_jina_domain(url):
+    with _jina_domains_lock:
+        _jina_domains[_domain(url)] = True
+        while len(_jina_domains) > SCRAPE_JINA_DOMAINS_MAX:
+            _jina_domains.pop(next(iter(_jina_domains)))
+
+
+def _timed_fetch(engine, url, cached, **kwargs):
+    started = time.monotonic()
+    fetch = _fetch_local if engine == "local" else _fetch_jina
+    result = fetch(url, cached, **kwargs)
+    elapsed = time.monotonic() - started
+    SCRAPE_LATENCY_ESTIMATES[engine] += SCRAPE_LATENCY_ALPHA * (elapsed - SCRAPE_LATENCY_ESTIMATES[engine])
+    return result
+
+
+def _fetch_page(url, cached=None, engine=None):
+    """
+    Descarga la página con el motor indicado (o el elegido automáticamente).
+
+    En modo "auto", si la extracción local no saca contenido útil se usa Jina
+    (y se recuerda el dominio para ir directo a Jina la próxima vez); si el
+    motor elegido falla por red, se prueba con el otro.
+
+    Returns:
+        tuple: (entrada de caché, True si se ha revalidado sin descargar)
+    """
+    engine = engine or SCRAPE_ENGINE
+    if engine not in SCRAPE_ENGINES:
+        engine = "auto"
+    chosen = _choose_engine(url, engine)
+
+    if engine == "local":
+        return _timed_fetch("local", url, cached, strict=False)
+    if engine == "jina":
+        return _timed_fetch("jina", url, cached)
+
+    if chosen == "local":
+        try:
+            return _timed_fetch("local", url, cached)
+        except LocalExtractionError:
+            _remember_jina_domain(url)
+            return _timed_fetch("jina", url, cached)
+        except requests.exceptions.RequestException:
+            return _timed_fetch("jina", url, cached)
+
     try:
-        response = requests.get(jina_url, timeout=30)
-        response.raise_for_status()
+        return _timed_fetch("jina", url, cached)
+    except requests.exceptions.RequestException:
+        return _timed_fetch("local", url, cached, strict=False)
 
-        content = response.text
 
-        # Limitar el tamaño si es muy grande (para no saturar el contexto)
-        max_length = 15000
-        if len(content) > max_length:
-            content = content[:max_length] + "\n\n[Contenido truncado por tamaño...]"
+def _page_title(content):
+    # Jina y el extractor local empiezan con "Title: ..."
+    if content.startswith("Title:"):
+        return content[6:content.find("\n") if "\n" in content else None].strip()
+    return None
 
-        return content
+
+def _get_page(url, max_age=None, engine=None):
+    """
+    Devuelve el contenido de la página, desde la caché si es lo bastante reciente.
+
+    Args:
+        url (str): URL de la página
+        max_age (float, optional): Antigüedad máxima aceptable en segundos (por
+            defecto la frescura del dominio)
+        engine (str, optional): Motor de extracción ("auto", "local" o "jina")
+
+    Returns:
+        str: Contenido en markdown
+    """
+    key = http_client.canonicalize_url(url)
+    freshness = get_freshness(url)
+    if max_age is not None:
+        freshness = min(freshness, max(float(max_age), 0))
+
+    cached = scrape_cache.get(key)
+    entry = cached[0] if cached else None
+    # Si se pide un motor concreto, lo extraído con el otro no sirve (ej: reintento con Jina)
+    same_engine = engine not in ("local", "jina") or entry is None or entry.get("engine", "jina") == engine
+    if entry is not None and same_engine and time.time() - entry["fetched_at"] <= freshness:
+        scrape_cache.count("hits")
+        return entry["content"]
+
+    scrape_cache.count("misses")
+    try:
+        entry, revalidated = _fetch_page(url, entry, engine)
+    except Exception:
+        scrape_cache.count("errors")
+        raise
+
+    if revalidated:
+        scrape_cache.count("revalidations")
+    else:
+        # La página completa queda en el índice local para search_local_knowledge
+        index_document(url, _page_title(entry["content"]), entry["content"], "scrape_website")
+    scrape_cache.set(key, entry, ttl=get_freshness(url))
+    return entry["content"]
+
+
+def _preamble_length(content):
+    # Cabecera de Jina / del extractor local (Title, URL Source...) que se conserva siempre
+    marker = content.find("Markdown Content:", 0, 2000)
+    if marker < 0:
+        return 0
+    end = content.find("\n", marker)
+    return len(content) if end < 0 else end + 1
+
+
+def scrape_website(url, max_age=None, engine=None, query=None):
+    """
+    Extrae el contenido actual de una URL en formato markdown.
+    Obtiene contenido en tiempo real directamente del sitio web, con el
+    extractor local o a través de Jina AI Reader (ver _fetch_page).
+
+    Las páginas leídas hace poco se sirven desde una caché en disco; con
+    max_age se puede exigir una copia más reciente (0 = siempre revalidar).
+    Si la página no cabe en SCRAPE_MAX_LENGTH se devuelven las secciones más
+    relevantes para query (por defecto, la pregunta del usuario en este turno)
+    y un índice de las omitidas.
+
+    Args:
+        url (str): La URL completa del sitio a scrapear
+        max_age (float, optional): Antigüedad máxima aceptable del contenido, en segundos
+        engine (str, optional): Motor de extracción ("auto", "local" o "jina"; por defecto SCRAPE_ENGINE)
+        query (str, optional): Qué se busca en la página, para elegir las secciones relevantes
+
+    Returns:
+        str: Contenido de la página en formato markdown
+    """
+    return _scrape(url, max_age, engine, query, SCRAPE_MAX_LENGTH)
+
+
+def _scrape(url, max_age, engine, query, max_chars):
+    try:
+        content = _get_page(url, max_age, engine)
+
+        # Limitar el tamaño si es muy grande (para no saturar el contexto)
+        return relevance.select_relevant(
+            content,
+            query or relevance.current_question(),
+            max_chars,
+            preamble_chars=_preamble_length(content)
+        )
 
     except requests.exceptions.Timeout:
         return f"Error: Timeout al acceder a {url}"
@@ -35,6 +456,80 @@ def scrape_website(url):
         return f"Error inesperado: {str(e)}"
 
 
+def _get_domain_semaphore(url):
+    host = _domain(url)
+    with _domain_semaphores_lock:
+        if host not in _domain_semaphores:
+            _domain_semaphores[host] = threading.BoundedSemaphore(SCRAPE_MULTI_PER_DOMAIN)
+        return _domain_semaphores[host]
+
+
+def scrape_websites(urls, timeout=None, max_age=None, query=None):
+    """
+    Lee varias URLs a la vez con scrape_website y devuelve lo que termine a tiempo.
+
+    Como mucho SCRAPE_MULTI_PER_DOMAIN lecturas simultáneas van al mismo
+    dominio. Las páginas aparecen en el orden en que terminan; las que no
+    terminan antes del plazo se indican al final (siguen descargándose en
+    segundo plano y quedan en la caché para la próxima vez).
+
+    Args:
+        urls (list): URLs completas a leer
+        timeout (float, optional): Segundos máximos para el conjunto (por defecto SCRAPE_MULTI_DEADLINE)
+        max_age (float, optional): Antigüedad máxima aceptable del contenido, en segundos
+        query (str, optional): Qué se busca en las páginas, para elegir las secciones relevantes
+
+    Returns:
+        str: Contenido de cada página y lista de URLs que no han terminado a tiempo
+    """
+    if isinstance(urls, str):
+        urls = [urls]
+
+    # Las URLs repetidas (misma URL canónica) se leen una sola vez
+    unique = {}
+    for url in urls:
+        if isinstance(url, str) and url.strip():
+            unique.setdefault(http_client.canonicalize_url(url), url.strip())
+    urls = list(unique.values())[:SCRAPE_MULTI_MAX_URLS]
+
+    if not urls:
+        return "Error: no se ha indicado ninguna URL"
+
+    deadline = time.monotonic() + (float(timeout) if timeout else SCRAPE_MULTI_DEADLINE)
+
+    # SCRAPE_MULTI_MAX_LENGTH se reparte entre las páginas (descontando los
+    # separadores y la posible lista de las que no terminen)
+    overhead = sum(2 * len(url) + 16 for url in urls) + 40
+    max_chars = min((SCRAPE_MULTI_MAX_LENGTH - overhead) // len(urls), SCRAPE_MAX_LENGTH)
+
+    def scrape(url):
+        with _get_domain_semaphore(url):
+            return _scrape(url, max_age, None, query, max_chars)
+
+    pool = ThreadPoolExecutor(max_workers=len(urls))
+    futures = {pool.submit(tracing.run_in_context(scrape, url)): url for url in urls}
+    pending = set(futures)
+    results = []
+
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                results.append(f"=== {futures[future]} ===\n{future.result()}")
+    finally:
+        # No se espera a las lecturas lentas: terminan solas en segundo plano
+        pool.shutdown(wait=False)
+
+    if pending:
+        timed_out = [url for future, url in futures.items() if future in pending]
+        results.append("=== Sin respuesta a tiempo ===\n" + "\n".join(f"- {url}" for url in timed_out))
+
+    return "\n\n".join(results)
+
+
 # Definición de la tool para el modelo
 TOOL_DEFINITION = {
     "type": "function",
@@ -47,9 +542,53 @@ TOOL_DEFINITION = {
                 "url": {
                     "type": "string",
                     "description": "La URL completa del sitio web a scrapear (debe incluir https://). Ejemplos: 'https://www.elmundo.es', 'https://www.elpais.com/economia'"
+                },
+                "max_age": {
+                    "type": "number",
+                    "description": "Opcional. Antigüedad máxima en segundos de la copia guardada que se acepta (0 = volver a leer la página ahora). Úsalo para datos en tiempo real; sin él, las páginas leídas hace poco se devuelven al instante."
+                },
+                "engine": {
+                    "type": "string",
+                    "enum": list(SCRAPE_ENGINES),
+                    "description": "Opcional. Cómo leer la página: 'auto' (por defecto), 'local' (descarga directa, más rápido) o 'jina' (proxy que ejecuta JavaScript, para webs que se cargan dinámicamente)"
+                },
+                "query": {
+                    "type": "string",
+                    "description": "Opcional. Qué información buscas en la página. Si es muy larga se devuelven las secciones más relevantes para esto (por defecto, la pregunta del usuario); para leer una sección omitida, vuelve a llamar con su título como query"
                 }
             },
             "required": ["url"]
         }
     }
 }
+
+TOOL_DEFINITION_MULTI = {
+    "type": "function",
+    "function": {
+        "name": "scrape_websites",
+        "description": f"Lee varias URLs a la vez (hasta {SCRAPE_MULTI_MAX_URLS}) en paralelo, igual que scrape_website. Úsala EN LUGAR de varias llamadas seguidas a scrape_website cuando quieras comparar o resumir varias fuentes. Devuelve las páginas que terminen dentro del plazo e indica qué URLs no respondieron a tiempo.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "urls": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Lista de URLs completas a leer (deben incluir https://)"
+                },
+                "timeout": {
+                    "type": "number",
+                    "description": f"Opcional. Segundos máximos para leerlas todas (por defecto {SCRAPE_MULTI_DEADLINE:g}); las que no terminen se omiten"
+                },
+                "max_age": {
+                    "type": "number",
+                    "description": "Opcional. Antigüedad máxima en segundos de las copias guardadas que se aceptan (0 = volver a leer las páginas ahora)"
+                },
+                "query": {
+                    "type": "string",
+                    "description": "Opcional. Qué información buscas en la página. Si es muy larga se devuelven las secciones más relevantes para esto (por defecto, la pregunta del usuario)"
+                }
+            },
+            "required": ["urls"]
+        }
+    }
+}
@@ -1,5 +1,6 @@
 import os
 import requests
+from core import http_client
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
@@ -39,7 +40,7 @@ def send_telegram_message(message):
     }
 
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = http_client.post(url, tool="telegram", rate_key=TELEGRAM_CHAT_ID, json=payload)
         data = response.json()
 
         if data.get("ok"):
@@ -91,7 +92,7 @@ def send_telegram_document(file_path, caption=None):
             if caption:
                 data['caption'] = caption
 
-            response = requests.post(url, data=data, files=files, timeout=30)
+            response = http_client.post(url, tool="telegram_upload", rate_key=TELEGRAM_CHAT_ID, data=data, files=files)
             result = response.json()
 
             if result.get("ok"):
@@ -144,7 +145,7 @@ def send_telegram_photo(file_path, caption=None):
             if caption:
                 data['caption'] = caption
 
-            response = requests.post(url, data=data, files=files, timeout=30)
+            response = http_client.post(url, tool="telegram_upload", rate_key=TELEGRAM_CHAT_ID, data=data, files=files)
             result = response.json()
 
             if result.get("ok"):
@@ -201,7 +202,7 @@ def send_telegram_audio(file_path, caption=None, title=None):
             if title:
                 data['title'] = title
 
-            response = requests.post(url, data=data, files=files, timeout=30)
+            response = http_client.post(url, tool="telegram_upload", rate_key=TELEGRAM_CHAT_ID, data=data, files=files)
             result = response.json()
 
             if result.get("ok"):
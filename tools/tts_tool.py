@@ -1,12 +1,14 @@
 import os
 import asyncio
-import edge_tts
 from datetime import datetime
 
 async def _generate_speech_async(text, voice, output_path):
     """
     Función asíncrona interna para generar el audio
     """
+    # edge_tts se importa solo cuando se genera el primer audio
+    import edge_tts
+
     communicate = edge_tts.Communicate(text, voice)
     await communicate.save(output_path)
 